@@ -0,0 +1,35 @@
+import { NextRequest } from 'next/server'
+
+export const dynamic = 'force-dynamic'
+
+// Proxy del stream SSE de actividad: se reenvía el cuerpo tal cual, sin bufferizar
+export async function GET(request: NextRequest) {
+  const { searchParams } = new URL(request.url)
+  const tipos = searchParams.get('tipos')
+  const backendUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000'
+  const lastEventId = request.headers.get('last-event-id')
+
+  const response = await fetch(
+    `${backendUrl}/api/children/alerts/stream${tipos ? `?tipos=${encodeURIComponent(tipos)}` : ''}`,
+    {
+      headers: {
+        Accept: 'text/event-stream',
+        ...(lastEventId ? { 'Last-Event-ID': lastEventId } : {}),
+      },
+      signal: request.signal,
+      cache: 'no-store',
+    }
+  )
+
+  if (!response.ok || !response.body) {
+    return new Response('Failed to open alerts stream', { status: response.status || 502 })
+  }
+
+  return new Response(response.body, {
+    headers: {
+      'Content-Type': 'text/event-stream',
+      'Cache-Control': 'no-cache',
+      'X-Accel-Buffering': 'no',
+    },
+  })
+}
@@ -0,0 +1,4 @@
+"""
+Benchmarks package
+Generador de cohortes sintéticas y medición de rendimiento de importación/evaluación.
+"""
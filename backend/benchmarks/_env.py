@@ -0,0 +1,32 @@
+# backend/benchmarks/_env.py
+# Prepara sys.path y variables de entorno para poder importar src.* desde los benchmarks
+# sin levantar la API ni depender de una base de datos externa.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = BACKEND_DIR / "src"
+
+
+def setup(database_url: str = None) -> str:
+    """
+    Debe llamarse ANTES de importar cualquier módulo de src.*:
+    src.db.session crea el engine al importarse a partir de DATABASE_URL.
+    Devuelve la URL efectiva.
+    """
+    for p in (str(BACKEND_DIR), str(SRC_DIR)):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    elif not os.getenv("DATABASE_URL"):
+        db_path = Path(tempfile.gettempdir()) / f"bench_nutricion_{os.getpid()}.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # DEBUG=True activa echo en el engine; los logs de SQL distorsionan los tiempos
+    os.environ.setdefault("DEBUG", "false")
+    os.environ.setdefault("VECTOR_DATA_DIR", str(Path(tempfile.gettempdir()) / "bench_imports"))
+    return os.environ["DATABASE_URL"]
@@ -0,0 +1,277 @@
+# backend/benchmarks/bench_import.py
+"""
+Benchmark de extremo a extremo de la importación (ExcelService.process_children_excel).
+
+Por cada tamaño de cohorte mide, etapa por etapa:
+  - generate:  generación de la cohorte sintética (benchmarks.cohort)
+  - serialize: escritura del archivo (xlsx/csv/parquet)
+  - validate:  validación en seco (ExcelService.validate_children_excel)
+  - import:    importación completa contra la base de datos
+y reporta segundos, filas/seg, pico de RSS y número de consultas SQL (por verbo y tabla).
+
+Por defecto usa un SQLite temporal; con --database-url se puede apuntar a un PostgreSQL local
+(la base se llena con datos de prueba, NO usar contra producción).
+
+Uso:
+    python -m benchmarks.bench_import --rows 1000 10000 --format csv
+    python -m benchmarks.bench_import --rows 10000 --json resultados.json
+    python -m benchmarks.bench_import --rows 10000 --baseline resultados.json --max-regression 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import _env  # noqa: E402
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_SQL_TABLE = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|SELECT\b.*?\bFROM)\s+\"?(\w+)\"?", re.I | re.S)
+
+
+def _current_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE / 1024 / 1024
+    except OSError:
+        return None
+
+
+class PeakRSS:
+    """Muestrea el RSS del proceso en un hilo para obtener el pico de cada etapa"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = _current_rss_mb()
+        if rss is None:
+            # Sin /proc (macOS): ru_maxrss es el pico de todo el proceso, no de la etapa
+            factor = 1024 * 1024 if sys.platform == "darwin" else 1024
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / factor
+        self.peak_mb = max(self.peak_mb, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL enviadas por el engine, agrupadas por verbo y tabla"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.by_statement: Counter = Counter()
+        self.total = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+        match = _SQL_TABLE.match(statement)
+        key = f"{verb} {match.group(1)}" if match else verb
+        self.by_statement[key] += 1
+        self.total += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextlib.contextmanager
+def _stage(results: Dict[str, Any], name: str, rows: int, engine=None):
+    counter = QueryCounter(engine) if engine is not None else contextlib.nullcontext()
+    with PeakRSS() as rss, counter:
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+    stage = {
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "peak_rss_mb": round(rss.peak_mb, 1),
+    }
+    if engine is not None:
+        stage["queries"] = counter.total
+        stage["queries_by_statement"] = dict(counter.by_statement.most_common())
+    results[name] = stage
+
+
+def _prepare_database(n_sedes: int):
+    """Crea las tablas y las sedes/usuario que la importación espera encontrar"""
+    from src.db.base import Base
+    from src.db.session import SessionLocal, engine
+    from src.db import models  # noqa: F401  registra los modelos en Base.metadata
+    from src.db.models import Sede, Usuario
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for sede_id in range(1, n_sedes + 1):
+            if not db.query(Sede).filter(Sede.id_sede == sede_id).first():
+                db.add(Sede(id_sede=sede_id, nombre=f"Sede benchmark {sede_id}"))
+        if not db.query(Usuario).first():
+            db.add(Usuario(nombre="Benchmark", correo="benchmark@example.com", telefono="3000000000", contrasena="x"))
+        db.commit()
+    finally:
+        db.close()
+    return engine
+
+
+def _reset_data(engine):
+    """Vacía las tablas de infantes/seguimientos para que cada tamaño arranque igual"""
+    from src.db.base import Base
+
+    keep = {"sedes", "usuarios", "roles", "sintomas"}
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name not in keep:
+                conn.execute(table.delete())
+
+
+def run_benchmark(n_rows: int, fmt: str, seed: int, n_sedes: int, engine, verbose: bool = False) -> Dict[str, Any]:
+    from benchmarks.cohort import cohort_to_bytes, generate_cohort
+    from src.db.session import SessionLocal
+    from src.services.excel_service import ExcelService
+
+    filename = f"cohorte_{n_rows}.{fmt}"
+    stages: Dict[str, Any] = {}
+
+    _reset_data(engine)
+    # Las tablas (caché nutricional y LMS del generador) se cargan una vez por proceso;
+    # se calientan fuera de la medición
+    ExcelService._ensure_nutrition_cache()
+    generate_cohort(10, seed=seed, n_sedes=n_sedes)
+
+    with _stage(stages, "generate", n_rows):
+        df = generate_cohort(n_rows, seed=seed, n_sedes=n_sedes)
+    with _stage(stages, "serialize", n_rows):
+        content = cohort_to_bytes(df, fmt)
+    del df
+
+    with _stage(stages, "validate", n_rows):
+        validation = ExcelService.validate_children_excel(content, filename)
+
+    db = SessionLocal()
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with _stage(stages, "import", n_rows, engine=engine), sink:
+            result = ExcelService.process_children_excel(content, db, filename=filename)
+    finally:
+        db.close()
+
+    return {
+        "rows": n_rows,
+        "format": fmt,
+        "file_mb": round(len(content) / 1024 / 1024, 2),
+        "validation": {k: validation.get(k) for k in ("valid_count", "error_count", "duplicate_count")},
+        "import": {k: result.get(k) for k in ("success", "processed_rows", "error_count", "error")
+                   if result.get(k) is not None},
+        "stages": stages,
+    }
+
+
+def _print_report(run: Dict[str, Any]):
+    print(f"\n=== {run['rows']} filas ({run['format']}, {run['file_mb']} MB) ===")
+    print(f"{'etapa':<10} {'seg':>9} {'filas/seg':>11} {'RSS pico MB':>12} {'consultas':>10}")
+    for name, s in run["stages"].items():
+        print(f"{name:<10} {s['seconds']:>9.3f} {s['rows_per_sec'] or 0:>11.1f} "
+              f"{s['peak_rss_mb']:>12.1f} {s.get('queries', '-'):>10}")
+    queries = run["stages"]["import"].get("queries_by_statement", {})
+    if queries:
+        top = ", ".join(f"{k}={v}" for k, v in list(queries.items())[:8])
+        print(f"consultas import: {top}")
+    print(f"resultado: {run['import']}  validación: {run['validation']}")
+
+
+def compare_with_baseline(runs: List[Dict[str, Any]], baseline: List[Dict[str, Any]], max_regression: float) -> List[str]:
+    """
+    Compara filas/seg y consultas de la etapa import con un JSON anterior.
+    Devuelve la lista de regresiones que superan la tolerancia.
+    """
+    base_by_key = {(b["rows"], b["format"]): b for b in baseline}
+    problems = []
+    for run in runs:
+        base = base_by_key.get((run["rows"], run["format"]))
+        if not base:
+            continue
+        cur, old = run["stages"]["import"], base["stages"]["import"]
+        if old.get("rows_per_sec") and cur["rows_per_sec"] < old["rows_per_sec"] * (1 - max_regression):
+            problems.append(f"{run['rows']} filas: {cur['rows_per_sec']} filas/seg vs {old['rows_per_sec']} en la línea base")
+        if old.get("queries") and cur.get("queries", 0) > old["queries"] * (1 + max_regression):
+            problems.append(f"{run['rows']} filas: {cur['queries']} consultas vs {old['queries']} en la línea base")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de importación de infantes")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000], help="Tamaños de cohorte (p.ej. 1000 10000 100000)")
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sedes", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="Base de pruebas (por defecto un SQLite temporal)")
+    parser.add_argument("--json", type=Path, default=None, help="Guardar resultados en JSON")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerancia relativa (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los logs de la importación")
+    args = parser.parse_args(argv)
+
+    url = _env.setup(args.database_url)
+    print(f"🔧 Base de datos: {url}")
+    engine = _prepare_database(args.sedes)
+
+    runs = []
+    for n_rows in args.rows:
+        run = run_benchmark(n_rows, args.format, args.seed, args.sedes, engine, verbose=args.verbose)
+        _print_report(run)
+        runs.append(run)
+
+    if args.json:
+        args.json.write_text(json.dumps(runs, indent=2, ensure_ascii=False))
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+    if args.baseline:
+        problems = compare_with_baseline(runs, json.loads(args.baseline.read_text()), args.max_regression)
+        if problems:
+            print("\n❌ Regresiones detectadas:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print("\n✅ Sin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# backend/benchmarks/cohort.py
+"""
+Generador de cohortes sintéticas para pruebas de carga de la importación.
+
+Produce archivos con el mismo contrato de columnas que ExcelService.generate_template.
+Las medidas se muestrean desde las tablas LMS de la OMS (data/who_tables): para cada
+infante se sortea un z-score y se invierte la transformación LMS, así peso, talla y
+perímetro cefálico son plausibles para la edad y el sexo.
+
+Uso:
+    python -m benchmarks.cohort --rows 10000 --format csv --out cohorte_10k.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+NOMBRES_F = ["Ana", "María", "Sofía", "Valentina", "Isabella", "Camila", "Luciana", "Mariana", "Daniela", "Gabriela",
+             "Salomé", "Sara", "Emilia", "Antonella", "Juliana", "Paula", "Laura", "Valeria", "Victoria", "Lucía"]
+NOMBRES_M = ["Juan", "Santiago", "Matías", "Sebastián", "Samuel", "Nicolás", "Alejandro", "Daniel", "Tomás", "Martín",
+             "Emmanuel", "Jerónimo", "Gabriel", "David", "Andrés", "Felipe", "Miguel", "José", "Luis", "Carlos"]
+APELLIDOS = ["Pérez", "González", "Rodríguez", "Gómez", "López", "Martínez", "Díaz", "Hernández", "Álvarez", "Torres",
+             "Ramírez", "Moreno", "Jiménez", "Castro", "Rojas", "Vargas", "Ortiz", "Romero", "Herrera", "Mendoza",
+             "Julio", "Barrios", "Cassiani", "Pacheco", "Marrugo", "Cabarcas", "Arrieta", "Guerrero", "Ospino", "Villa"]
+PARENTESCOS = ["Madre", "Padre", "Abuela", "Abuelo", "Tía", "Tío"]
+ACTIVIDADES = ["Ligera", "Moderada", "Intensa"]
+ALIMENTACION = ["Lactancia materna", "Fórmula", "Mixta"]
+
+# Archivos LMS por indicador/sexo/banda. La columna clave es 'Day' (0-5 años) o 'Month' (>5 años).
+_WHO_FILES = {
+    ("weight", "male", "0-5"): "Peso-Niños- de 0 a 5 años.xlsx",
+    ("weight", "male", "5+"): "Peso-Niños- de 5 a 10 años.xlsx",
+    ("weight", "female", "0-5"): "Peso-Niñas- de 0 a 5 años.xlsx",
+    ("weight", "female", "5+"): "Peso-niñas- de 5 a 10 años.xlsx",
+    ("height", "male", "0-5"): "Estatura-Niños- de 0 a 5 años.xlsx",
+    ("height", "male", "5+"): "Estatura-Niños- de 5 a 19 años.xlsx",
+    ("height", "female", "0-5"): "Estatura-Niñas- de 0 a 5 años.xlsx",
+    ("height", "female", "5+"): "Estatura-Niñas- de 5 a 19 años.xlsx",
+    ("head_circumference", "male", "0-5"): "Circunferencia craneal-Niños- de 0 a 5 años.xlsx",
+    ("head_circumference", "female", "0-5"): "Circunferencia craneal-Niñas- de 0 a 5 años.xlsx",
+}
+
+DAYS_0_5 = 1856          # último día de las tablas 0-5 años
+MAX_AGE_DAYS = 10 * 365  # la importación rechaza mayores de 11 años
+DAYS_PER_MONTH = 30.4375
+
+_lms_cache: Dict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, str]] = {}
+
+
+def _lms_arrays(variable: str, gender: str, band: str):
+    """(claves, L, M, S, unidad) de la tabla OMS, leída una vez por proceso"""
+    key = (variable, gender, band)
+    if key not in _lms_cache:
+        from src.services.nutrition_service import NutritionService
+
+        path = NutritionService.CONFIG_DATA_DIR / "who_tables" / _WHO_FILES[key]
+        table = NutritionService._safe_read_excel(str(path))
+        key_col = "Day" if "Day" in table.columns else table.columns[0]
+        _lms_cache[key] = (
+            pd.to_numeric(table[key_col], errors="coerce").to_numpy(dtype=float),
+            table["L"].to_numpy(dtype=float),
+            table["M"].to_numpy(dtype=float),
+            table["S"].to_numpy(dtype=float),
+            "day" if key_col == "Day" else "month",
+        )
+    return _lms_cache[key]
+
+
+def _lms_inverse(z: np.ndarray, L: np.ndarray, M: np.ndarray, S: np.ndarray) -> np.ndarray:
+    """Medida correspondiente a un z-score: X = M (1 + L S z)^(1/L), o M e^(S z) si L == 0"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base = np.clip(1.0 + L * S * z, 1e-6, None)
+        safe_L = np.where(L == 0, 1.0, L)
+        return np.where(L == 0, M * np.exp(S * z), M * np.power(base, 1.0 / safe_L))
+
+
+def sample_measurement(variable: str, gender: np.ndarray, age_days: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Muestrea la medida de 'variable' para cada (sexo, edad, z) con las tablas LMS"""
+    out = np.full(len(age_days), np.nan)
+    for g in ("male", "female"):
+        for band in ("0-5", "5+"):
+            if (variable, g, band) not in _WHO_FILES:
+                continue
+            mask = (gender == g) & ((age_days <= DAYS_0_5) if band == "0-5" else (age_days > DAYS_0_5))
+            if not mask.any():
+                continue
+            keys, L, M, S, unit = _lms_arrays(variable, g, band)
+            ages = age_days[mask] if unit == "day" else age_days[mask] / DAYS_PER_MONTH
+            idx = np.clip(np.searchsorted(keys, ages), 0, len(keys) - 1)
+            out[mask] = _lms_inverse(z[mask], L[idx], M[idx], S[idx])
+    return out
+
+
+def _names(rng: np.random.Generator, first: np.ndarray, n: int) -> np.ndarray:
+    a1 = rng.choice(APELLIDOS, n)
+    a2 = rng.choice(APELLIDOS, n)
+    return np.char.add(np.char.add(np.char.add(np.char.add(first, " "), a1), " "), a2)
+
+
+def generate_cohort(
+    n_rows: int,
+    seed: int = 42,
+    n_sedes: int = 5,
+    followups_per_child: float = 1.5,
+    reference_date: Optional[date] = None,
+) -> pd.DataFrame:
+    """
+    Genera n_rows filas de importación (una por seguimiento).
+    - ~followups_per_child seguimientos por infante, 1-3 infantes por acudiente
+    - 85% de 0-5 años y 15% de 5-10 años, sexo 50/50
+    - z-scores de talla ~ N(-0.3, 1.1) y de peso correlacionado (rho=0.7) con la talla
+    """
+    rng = np.random.default_rng(seed)
+    reference_date = reference_date or date.today()
+
+    n_children = max(1, int(round(n_rows / followups_per_child)))
+    n_guardians = max(1, int(round(n_children / 1.6)))
+
+    # --- Acudientes ---
+    guardian_first = rng.choice(NOMBRES_F + NOMBRES_M, n_guardians)
+    guardian_names = _names(rng, guardian_first, n_guardians)
+    guardian_phones = np.char.add("3", rng.integers(0, 10**9, n_guardians).astype(str).astype("U9"))
+    guardian_phones = np.array([p.ljust(10, "0") for p in guardian_phones])
+    guardian_docs = rng.integers(10**9, 1.2 * 10**9, n_guardians).astype(np.int64).astype(str)
+    guardian_sede = rng.integers(1, n_sedes + 1, n_guardians)
+
+    # --- Infantes ---
+    child_guardian = rng.integers(0, n_guardians, n_children)
+    child_gender = np.where(rng.random(n_children) < 0.5, "male", "female")
+    child_first = np.where(child_gender == "male", rng.choice(NOMBRES_M, n_children), rng.choice(NOMBRES_F, n_children))
+    child_names = _names(rng, child_first, n_children)
+    child_age_last = np.where(
+        rng.random(n_children) < 0.85,
+        rng.integers(30, DAYS_0_5, n_children),
+        rng.integers(DAYS_0_5 + 1, MAX_AGE_DAYS, n_children),
+    )
+    child_birth = np.array([reference_date - timedelta(days=int(d)) for d in child_age_last])
+    child_z_h = rng.normal(-0.3, 1.1, n_children)
+
+    # --- Seguimientos: cada fila apunta a un infante, con visitas espaciadas ~2 meses ---
+    row_child = np.concatenate([np.arange(n_children), rng.integers(0, n_children, max(0, n_rows - n_children))])[:n_rows]
+    rng.shuffle(row_child)
+    visit_rank = pd.Series(row_child).groupby(row_child).cumcount().to_numpy()
+    age_days = np.clip(child_age_last[row_child] - visit_rank * rng.integers(45, 75, n_rows), 1, None)
+    followup_date = child_birth[row_child] + pd.to_timedelta(age_days, unit="D").to_pytimedelta()
+
+    gender = child_gender[row_child]
+    z_h = np.clip(child_z_h[row_child] + rng.normal(0, 0.15, n_rows), -4, 4)
+    z_w = np.clip(0.7 * z_h + np.sqrt(1 - 0.7 ** 2) * rng.normal(0, 1.1, n_rows), -4, 4)
+    z_hc = np.clip(rng.normal(0, 1, n_rows), -4, 4)
+
+    height = sample_measurement("height", gender, age_days, z_h)
+    weight = sample_measurement("weight", gender, age_days, z_w)
+    head = sample_measurement("head_circumference", gender, age_days, z_hc)
+    under5 = age_days <= DAYS_0_5
+
+    guardian = child_guardian[row_child]
+    df = pd.DataFrame({
+        'infante_documento': (10**10 + row_child).astype(str),
+        'infante_tipo_documento': np.where(age_days < 7 * 365, "RC", "TI"),
+        'infante_nombre': child_names[row_child],
+        'infante_fecha_nacimiento': [d.isoformat() for d in child_birth[row_child]],
+        'infante_genero': np.where(gender == "male", "Masculino", "Femenino"),
+        'sede_id': guardian_sede[guardian],
+        'acudiente_documento': guardian_docs[guardian],
+        'acudiente_tipo_documento': "CC",
+        'acudiente_nombre': guardian_names[guardian],
+        'acudiente_telefono': guardian_phones[guardian],
+        'acudiente_email': None,
+        'acudiente_direccion': np.char.add("Calle ", rng.integers(1, 120, n_rows).astype(str)),
+        'acudiente_parentesco': rng.choice(PARENTESCOS, n_rows),
+        'seguimiento_fecha': [d.isoformat() for d in followup_date],
+        'peso': np.round(weight, 1),
+        'estatura': np.round(height, 1),
+        'perimetro_cefalico': np.where(under5, np.round(head, 1), np.nan),
+        'pliegue_triceps': np.where(under5, np.round(rng.normal(9, 1.8, n_rows).clip(4, 20), 1), np.nan),
+        'pliegue_subescapular': np.where(under5, np.round(rng.normal(7, 1.5, n_rows).clip(3, 18), 1), np.nan),
+        'circunferencia_braquial': np.round(rng.normal(15, 1.3, n_rows).clip(10, 22), 1),
+        'perimetro_abdominal': np.round(rng.normal(50, 4, n_rows).clip(35, 75), 1),
+        'nivel_actividad': rng.choice(ACTIVIDADES, n_rows),
+        'tipo_alimentacion': rng.choice(ALIMENTACION, n_rows),
+        'observacion': "Cohorte sintética",
+        'hemoglobina': np.round(rng.normal(11.8, 1.2, n_rows).clip(6, 16), 1),
+    })
+    return df
+
+
+def cohort_to_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    """Serializa la cohorte en el formato de importación pedido (xlsx, csv o parquet)"""
+    out = io.BytesIO()
+    if fmt == "csv":
+        df.to_csv(out, index=False)
+    elif fmt == "parquet":
+        df.to_parquet(out, index=False)
+    elif fmt == "xlsx":
+        # xlsxwriter escribe bastante más rápido que openpyxl para libros grandes
+        with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Plantilla")
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    return out.getvalue()
+
+
+def main(argv=None):
+    from benchmarks import _env
+
+    _env.setup()
+
+    parser = argparse.ArgumentParser(description="Genera una cohorte sintética de importación")
+    parser.add_argument("--rows", type=int, default=1000, help="Filas (seguimientos) a generar")
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sedes", type=int, default=5, help="Número de sedes (sede_id 1..N)")
+    parser.add_argument("--out", type=Path, default=None, help="Ruta de salida")
+    args = parser.parse_args(argv)
+
+    df = generate_cohort(args.rows, seed=args.seed, n_sedes=args.sedes)
+    out = args.out or Path(f"cohorte_{args.rows}.{args.format}")
+    out.write_bytes(cohort_to_bytes(df, args.format))
+    print(f"✅ Cohorte de {len(df)} filas escrita en {out}")
+
+
+if __name__ == "__main__":
+    main()
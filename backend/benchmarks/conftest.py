@@ -0,0 +1,76 @@
+# backend/benchmarks/conftest.py
+# Configuración compartida de los micro-benchmarks (pytest-benchmark)
+
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks import _env
+
+_env.setup()
+
+BASELINES_DIR = Path(__file__).resolve().parent / ".baselines"
+# Umbral de regresión que se aplica por defecto si hay línea base para esta máquina ("" lo desactiva)
+BENCHMARK_COMPARE_FAIL = os.getenv("BENCHMARK_COMPARE_FAIL", "mean:25%")
+
+
+def pytest_configure(config):
+    # Las líneas base se guardan junto a los benchmarks (y no en ./.benchmarks del cwd)
+    # para poder versionarlas y compararlas con --benchmark-compare
+    storage = getattr(config.option, "benchmark_storage", None)
+    if storage not in (None, "file://./.benchmarks"):
+        return
+    config.option.benchmark_storage = f"file://{BASELINES_DIR}"
+
+    # Con una línea base guardada para esta máquina, la comparación queda activa por defecto:
+    # un `pytest benchmarks` a secas falla si alguna función empeora más que el umbral
+    from pytest_benchmark.utils import get_machine_id, parse_compare_fail
+
+    if (
+        BENCHMARK_COMPARE_FAIL
+        and not (config.option.benchmark_disable or config.option.benchmark_skip)
+        and not config.option.benchmark_compare
+        and not config.option.benchmark_compare_fail
+        and any((BASELINES_DIR / get_machine_id()).glob("*.json"))
+    ):
+        config.option.benchmark_compare = True
+        config.option.benchmark_compare_fail = [parse_compare_fail(BENCHMARK_COMPARE_FAIL)]
+
+
+@pytest.fixture
+def clear_excel_cache():
+    """Devuelve una función que vacía la caché de _safe_read_excel (variante 'cold')"""
+    from src.services.nutrition_service import NutritionService
+
+    def _clear():
+        if hasattr(NutritionService, "_excel_cache"):
+            NutritionService._excel_cache.clear()
+
+    return _clear
+
+
+@pytest.fixture
+def count_excel_reads(monkeypatch):
+    """
+    Ejecuta fn una vez contando las lecturas reales de Excel (pd.read_excel).
+    Se guarda en extra_info para ver cuántas lecturas cuesta cada llamada.
+    """
+    import pandas as pd
+
+    def _count(fn, *args, **kwargs):
+        calls = {"n": 0}
+        original = pd.read_excel
+
+        def counting_read_excel(*a, **kw):
+            calls["n"] += 1
+            return original(*a, **kw)
+
+        monkeypatch.setattr(pd, "read_excel", counting_read_excel)
+        try:
+            fn(*args, **kwargs)
+        finally:
+            monkeypatch.setattr(pd, "read_excel", original)
+        return calls["n"]
+
+    return _count
@@ -0,0 +1,123 @@
+# backend/benchmarks/test_nutrition_service.py
+"""
+Micro-benchmarks de las funciones de NutritionService que se ejecutan por cada seguimiento.
+
+Cada función tiene variante 'cold' (caché de _safe_read_excel vacía antes de cada ronda)
+y 'warm' (tablas ya en memoria). En extra_info se registra cuántas lecturas de Excel hace
+una llamada en frío.
+
+    pytest benchmarks/test_nutrition_service.py --benchmark-save=baseline
+    pytest benchmarks/test_nutrition_service.py --benchmark-compare --benchmark-compare-fail=mean:25%
+"""
+
+import pytest
+
+from src.services.nutrition_service import NutritionService
+
+COLD_ROUNDS = 3
+
+# (edad en días, peso, talla, sexo, perímetro cefálico, pliegue tricipital, pliegue subescapular)
+CHILDREN = {
+    "male_2y": (730, 12.2, 86.0, "male", 48.5, 9.0, 7.0),
+    "male_7y": (2555, 22.0, 120.0, "male", None, None, None),
+}
+
+
+def _run(benchmark, mode, clear_cache, fn, *args, **kwargs):
+    """Cold: vacía la caché antes de cada ronda. Warm: precalienta y mide en caliente."""
+    if mode == "cold":
+        return benchmark.pedantic(fn, args=args, kwargs=kwargs, setup=clear_cache, rounds=COLD_ROUNDS, iterations=1)
+    fn(*args, **kwargs)
+    return benchmark(fn, *args, **kwargs)
+
+
+def _cold_reads(benchmark, clear_cache, count_excel_reads, fn, *args, **kwargs):
+    clear_cache()
+    benchmark.extra_info["excel_reads_cold"] = count_excel_reads(fn, *args, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def assessment_inputs():
+    """Evaluación, recomendaciones y datos del infante para el PDF"""
+    age_days, weight, height, gender, hc, tsf, ssf = CHILDREN["male_2y"]
+    assessment = NutritionService.assess_nutritional_status(age_days, weight, height, gender, hc, tsf, ssf)
+    recommendations = NutritionService.generate_recommendations(assessment)
+    child_data = {
+        "name": "Benchmark",
+        "weight": weight,
+        "height": height,
+        "head_circumference": hc,
+        "triceps_skinfold": tsf,
+        "subscapular_skinfold": ssf,
+        "activity_level": "moderate",
+        "feeding_mode": "breast",
+        "nutricionist_observation": "",
+    }
+    return assessment, recommendations, child_data
+
+
+@pytest.mark.parametrize("variable,age_days", [
+    ("weight", 730),   # tabla por días: coincidencia exacta
+    ("height", 2555),  # tabla por meses: el día se convierte a mes cumplido
+])
+def test_get_lms_row(benchmark, variable, age_days):
+    table = NutritionService.get_table_for_indicator(variable, "male", age_days)
+    benchmark.extra_info["table_rows"] = len(table)
+    row = benchmark(NutritionService.get_lms_row, table, age_days)
+    assert {"L", "M", "S"} <= set(row.index)
+
+
+@pytest.mark.parametrize("mode", ["cold", "warm"])
+@pytest.mark.parametrize("child", list(CHILDREN))
+def test_assess_nutritional_status(benchmark, clear_excel_cache, count_excel_reads, mode, child):
+    args = CHILDREN[child]
+    if mode == "cold":
+        _cold_reads(benchmark, clear_excel_cache, count_excel_reads, NutritionService.assess_nutritional_status, *args)
+    result = _run(benchmark, mode, clear_excel_cache, NutritionService.assess_nutritional_status, *args)
+    assert "bmi" in result
+
+
+@pytest.mark.parametrize("mode", ["cold", "warm"])
+@pytest.mark.parametrize("age_days,feeding_mode", [(240, "breast"), (1460, "breast")])
+def test_get_energy_requirement(benchmark, clear_excel_cache, count_excel_reads, mode, age_days, feeding_mode):
+    kwargs = dict(age_days=age_days, weight=12.0, gender="female", feeding_mode=feeding_mode, activity_level="moderate")
+    if mode == "cold":
+        _cold_reads(benchmark, clear_excel_cache, count_excel_reads, NutritionService.get_energy_requirement, **kwargs)
+    result = _run(benchmark, mode, clear_excel_cache, NutritionService.get_energy_requirement, **kwargs)
+    assert isinstance(result, dict)
+
+
+@pytest.mark.parametrize("mode", ["cold", "warm"])
+def test_get_rien_row(benchmark, clear_excel_cache, count_excel_reads, mode):
+    if mode == "cold":
+        _cold_reads(benchmark, clear_excel_cache, count_excel_reads, NutritionService.get_rien_row, 730, "male")
+    row = _run(benchmark, mode, clear_excel_cache, NutritionService.get_rien_row, 730, "male")
+    assert row is not None
+
+
+@pytest.mark.parametrize("mode", ["cold", "warm"])
+def test_get_nutrient_food_table_data(benchmark, clear_excel_cache, count_excel_reads, mode):
+    kwargs = dict(age_days=730, gender="male", weight=12.2, kcal_per_day=1000.0)
+    if mode == "cold":
+        _cold_reads(benchmark, clear_excel_cache, count_excel_reads, NutritionService.get_nutrient_food_table_data, **kwargs)
+    result = _run(benchmark, mode, clear_excel_cache, NutritionService.get_nutrient_food_table_data, **kwargs)
+    assert result is not None
+
+
+def test_plot_indicator_curve(benchmark, tmp_path):
+    table = NutritionService.get_table_for_indicator("weight", "male", 730)
+    output = tmp_path / "peso_curve.png"
+    benchmark(NutritionService.plot_indicator_curve, table, 730, 12.2, "Peso (kg)", "male", str(output))
+    assert output.exists()
+
+
+@pytest.mark.parametrize("mode", ["cold", "warm"])
+def test_export_report_pdf(benchmark, clear_excel_cache, count_excel_reads, assessment_inputs, tmp_path, monkeypatch, mode):
+    # export_report_pdf deja las curvas .png en el directorio actual
+    monkeypatch.chdir(tmp_path)
+    assessment, recommendations, child_data = assessment_inputs
+    args = (str(tmp_path / "reporte.pdf"), assessment, 730, "male", recommendations, child_data)
+    if mode == "cold":
+        _cold_reads(benchmark, clear_excel_cache, count_excel_reads, NutritionService.export_report_pdf, *args)
+    _run(benchmark, mode, clear_excel_cache, NutritionService.export_report_pdf, *args)
+    assert (tmp_path / "reporte.pdf").exists()
@@ -8,4 +8,9 @@ importlib.import_module("src.db.models")
 
 print("Creating database tables...")
 Base.metadata.create_all(bind=engine)
+# Columnas e índices que create_all no agrega a tablas existentes
+migrations = importlib.import_module("src.db.migrations")
+migrations.aplicar(engine)
+# Tablas derivadas (proyecciones) en bases que ya tenían datos
+migrations.rellenar_derivadas(engine)
 print("Done.")
@@ -107,8 +107,26 @@ async def lifespan(app: FastAPI):
             logger.info("Tablas creadas OK")
         except Exception as e:
             logger.error(f"Error creando tablas: {e}")
+        # Columnas e índices agregados después de crear las tablas (búsqueda por nombre)
+        try:
+            from src.db import migrations
+            migrations.aplicar(_engine)
+        except Exception as e:
+            logger.error(f"Error aplicando migraciones: {e}")
+        # Tablas derivadas: se llenan en bloque la primera vez
+        try:
+            from src.db import migrations
+            migrations.rellenar_derivadas(_engine)
+        except Exception as e:
+            logger.error(f"Error rellenando tablas derivadas: {e}")
     yield
     logger.info("Apagando Nutritional Assessment API...")
+    # Escribir la actividad que quede en cola antes de salir
+    try:
+        from src.services.activity_service import writer as activity_writer
+        activity_writer.close()
+    except Exception as e:
+        logger.error(f"Error vaciando la cola de actividad: {e}")
 
 # ---------- App ----------
 app = FastAPI(
@@ -131,6 +149,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimate"],  # paginación
 )
 
 # ---------- Endpoints base ----------
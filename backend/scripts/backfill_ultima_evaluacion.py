@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconstruye la proyección ultima_evaluacion_infante a partir de seguimientos y evaluaciones
+(por ejemplo después de cargar datos directamente en la base).
+"""
+
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.db.session import SessionLocal
+from src.db.models import UltimaEvaluacionInfante
+from src.services.projection_service import ProjectionService
+
+
+def backfill():
+    db = SessionLocal()
+    try:
+        UltimaEvaluacionInfante.__table__.create(bind=db.get_bind(), checkfirst=True)
+        filas = ProjectionService.backfill(db)
+        print(f"✅ Proyección reconstruida: {filas} infantes")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconstruyendo la proyección: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reconstruye resumen_mensual_sede (conteos de prevalencia por sede, mes, grupo de edad y sexo)
+a partir de las evaluaciones guardadas.
+"""
+
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.db.session import SessionLocal
+from src.db.models import ResumenMensualSede
+from src.services.rollup_service import RollupService
+
+
+def reconstruir():
+    db = SessionLocal()
+    try:
+        ResumenMensualSede.__table__.create(bind=db.get_bind(), checkfirst=True)
+        filas = RollupService.reconstruir(db)
+        print(f"✅ Resumen mensual reconstruido: {filas} filas")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconstruyendo el resumen mensual: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    reconstruir()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Recalcula z-scores, clasificaciones y nivel de riesgo de las evaluaciones guardadas (por ejemplo
+después de actualizar las tablas OMS o los puntos de corte). Sólo se escriben las filas que cambian.
+
+    python scripts/reevaluar_evaluaciones.py --workers 8
+    python scripts/reevaluar_evaluaciones.py --sede 3 --dry-run
+    python scripts/reevaluar_evaluaciones.py --desde-id 120000   # retomar una corrida interrumpida
+"""
+
+import argparse
+import sys
+import os
+
+# Agregar el directorio padre al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.db.session import SessionLocal
+from src.services.reevaluation_service import ReevaluationService
+
+
+def mostrar_avance(estado):
+    total = estado["total"] or 1
+    velocidad = estado["procesadas"] / estado["segundos"] if estado["segundos"] else 0
+    print(
+        f"🔄 {estado['procesadas']}/{estado['total']} ({100 * estado['procesadas'] / total:.0f}%) · "
+        f"{estado['actualizadas']} actualizadas · {velocidad:.0f} evaluaciones/s · último id {estado['ultimo_id']}",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reevaluación masiva de evaluaciones nutricionales")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto uno por CPU)")
+    parser.add_argument("--bloque", type=int, default=None, help="Evaluaciones por bloque")
+    parser.add_argument("--sede", type=int, default=None, help="Sólo infantes de esta sede")
+    parser.add_argument("--desde-id", type=int, default=0, help="Empezar después de este id_evaluacion")
+    parser.add_argument("--dry-run", action="store_true", help="Contar cambios sin escribir")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        estado = ReevaluationService.reevaluar(
+            db,
+            workers=args.workers,
+            tamano_bloque=args.bloque,
+            sede_id=args.sede,
+            desde_id=args.desde_id,
+            dry_run=args.dry_run,
+            progreso=mostrar_avance,
+        )
+        accion = "cambiarían" if args.dry_run else "actualizadas"
+        print(f"✅ {estado['procesadas']} evaluaciones revisadas, {estado['actualizadas']} {accion} en {estado['segundos']} s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error en la reevaluación: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends, status
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field, EmailStr
 
 from src.db.session import get_db
-from src.db.models import Acudiente
+from src.db.models import Acudiente, normalizar_nombre
 
 router = APIRouter(tags=["acudientes"])
 
@@ -36,19 +36,37 @@ class AcudienteUpdate(BaseModel):
 
 @router.get("/", response_model=List[AcudienteOut])
 def list_acudientes(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
+    offset: int = Query(0, ge=0, description="Registros a saltar (obsoleto: usar cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
     search: Optional[str] = Query(None, description="Buscar por nombre"),
+    sede_id: Optional[int] = Query(None, description="Acudientes con infantes en la sede"),
+    sort: str = Query("id", description="Orden: id o nombre"),
+    order: str = Query("asc", description="asc o desc"),
+    count: Optional[str] = Query(None, description="exact o estimate"),
     db: Session = Depends(get_db)
 ):
-    """Lista todos los acudientes con búsqueda opcional"""
+    """Lista los acudientes con búsqueda opcional y paginación por cursor"""
+    from src.db.models import Infante
+    from src.api.pagination import paginate_list
+
     query = db.query(Acudiente)
     
     if search:
-        query = query.filter(Acudiente.nombre.ilike(f"%{search}%"))
+        # Nombre normalizado (sin tildes): LIKE servido por el índice trigram en PostgreSQL
+        query = query.filter(Acudiente.nombre_busqueda.contains(normalizar_nombre(search), autoescape=True))
+    if sede_id is not None:
+        query = query.filter(
+            Acudiente.infantes.any(Infante.sede_id == sede_id)
+        )
     
-    acudientes = query.offset(offset).limit(limit).all()
-    return acudientes
+    return paginate_list(
+        query, response,
+        sort_columns={"id": Acudiente.id_acudiente, "nombre": Acudiente.nombre},
+        pk=Acudiente.id_acudiente, sort=sort, order=order,
+        cursor=cursor, limit=limit, offset=offset, count=count,
+    )
 
 
 @router.post("/", response_model=AcudienteOut, status_code=status.HTTP_201_CREATED)
@@ -67,6 +85,9 @@ def create_acudiente(
     db.add(new_acudiente)
     db.commit()
     db.refresh(new_acudiente)
+
+    from src.services.search_index import acudiente_doc, index_documents
+    index_documents([acudiente_doc(new_acudiente)])
     
     return new_acudiente
 
@@ -114,6 +135,12 @@ def update_acudiente(
     db.commit()
     db.refresh(acudiente)
 
+    # La sede del acudiente es la de sus infantes (para filtrar la búsqueda global)
+    from src.db.models import Infante
+    from src.services.search_index import acudiente_doc, index_documents
+    sede = db.query(Infante.sede_id).filter(Infante.acudiente_id == acudiente_id).first()
+    index_documents([acudiente_doc(acudiente, sede[0] if sede else None)])
+
     return acudiente
 
 
@@ -132,4 +159,7 @@ def delete_acudiente(
         )
 
     db.delete(acudiente)
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+    from src.services.search_index import unindex
+    unindex(f"acudiente:{acudiente_id}")
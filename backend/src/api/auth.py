@@ -15,7 +15,7 @@ from datetime import datetime, timedelta
 import os
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
@@ -325,22 +325,43 @@ class UsuarioListResponse(BaseModel):
 
 @router.get("/users", response_model=List[UsuarioListResponse])
 def list_users(
+    response: Response,
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme),
-    skip: int = 0,
-    limit: int = 100
+    skip: int = Query(0, ge=0, description="Registros a saltar (obsoleto: usar cursor)"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    rol_id: Optional[int] = None,
+    search: Optional[str] = Query(None, description="Buscar por nombre o correo"),
+    sort: str = Query("id", description="Orden: id, nombre o correo"),
+    order: str = Query("asc", description="asc o desc"),
+    count: Optional[str] = Query(None, description="exact o estimate"),
 ):
     """
-    Lista todos los usuarios del sistema.
+    Lista los usuarios del sistema (filtros y paginación por cursor).
     Solo disponible para administradores.
     """
+    from sqlalchemy import or_
+    from src.api.pagination import paginate_list
+
     current_user = _get_current_user(db, token)
     
     # Verificar que el usuario actual sea admin
     _require_admin(current_user)
     
-    usuarios = db.query(Usuario).offset(skip).limit(limit).all()
-    return usuarios
+    query = db.query(Usuario)
+    if rol_id is not None:
+        query = query.filter(Usuario.rol_id == rol_id)
+    if search:
+        patron = f"%{search.strip()}%"
+        query = query.filter(or_(Usuario.nombre.ilike(patron), Usuario.correo.ilike(patron)))
+
+    return paginate_list(
+        query, response,
+        sort_columns={"id": Usuario.id_usuario, "nombre": Usuario.nombre, "correo": Usuario.correo},
+        pk=Usuario.id_usuario, sort=sort, order=order,
+        cursor=cursor, limit=limit, offset=skip, count=count,
+    )
 
 
 # ------------------------------------------------------------
@@ -2,13 +2,14 @@
 
 from typing import List, Optional
 from datetime import date
-from fastapi import APIRouter, HTTPException, Query, Depends, status
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
 from src.db.session import get_db
 from src.db.models import Infante, Seguimiento
 from src.db.schemas import InfanteCreate, Infante as InfanteSchema
+from src.services.cache_service import DASHBOARD, cached, invalidate_dashboard
 
 router = APIRouter(tags=["children"])
 
@@ -60,36 +61,24 @@ def ping():
 
 
 @router.get("/stats")
+@cached(DASHBOARD)
 def get_dashboard_stats(db: Session = Depends(get_db)):
     """
     Obtiene estadísticas para el dashboard:
     - Total de niños registrados
     - Alertas activas (niños con riesgo alto en su última evaluación)
     """
-    from src.db.models import EvaluacionNutricional
-    from sqlalchemy import func
+    from src.db.models import UltimaEvaluacionInfante
     
     # Total de niños
     total_children = db.query(Infante).count()
     
-    # Alertas activas: niños con riesgo alto en su última evaluación
-    # Subconsulta para obtener el seguimiento más reciente de cada infante
-    subq = (
-        db.query(
-            Seguimiento.infante_id,
-            func.max(Seguimiento.id_seguimiento).label('ultimo_seguimiento')
-        )
-        .group_by(Seguimiento.infante_id)
-        .subquery()
-    )
-    
-    # Contar evaluaciones con riesgo alto en los últimos seguimientos
+    # Alertas activas: niños con riesgo alto en su última evaluación (proyección indexada)
     active_alerts = (
-        db.query(func.count(EvaluacionNutricional.id_evaluacion))
-        .join(subq, EvaluacionNutricional.seguimiento_id == subq.c.ultimo_seguimiento)
-        .filter(EvaluacionNutricional.nivel_riesgo == 'Alto')
-        .scalar()
-    ) or 0
+        db.query(UltimaEvaluacionInfante)
+        .filter(UltimaEvaluacionInfante.nivel_riesgo == 'Alto')
+        .count()
+    )
     
     return {
         "total_children": total_children,
@@ -97,6 +86,7 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     }
 
 @router.get("/nutritional-stats")
+@cached(DASHBOARD)
 def get_nutritional_stats(db: Session = Depends(get_db)):
     """
     Obtiene estadísticas nutricionales detalladas:
@@ -105,125 +95,77 @@ def get_nutritional_stats(db: Session = Depends(get_db)):
     - Distribución por género
     - Estadísticas por sede
     """
-    from src.db.models import EvaluacionNutricional, Sede
-    from sqlalchemy import func, case, extract
-    from datetime import datetime, date
-    
-    # Función para calcular edad en años desde fecha de nacimiento
-    def calcular_edad_años(fecha_nac):
-        if not fecha_nac:
-            return None
-        hoy = date.today()
-        edad = hoy.year - fecha_nac.year - ((hoy.month, hoy.day) < (fecha_nac.month, fecha_nac.day))
-        return edad
-    
-    # Obtener todos los infantes con su última evaluación
-    subq_ultimo_seguimiento = (
-        db.query(
-            Seguimiento.infante_id,
-            func.max(Seguimiento.id_seguimiento).label('ultimo_seguimiento')
-        )
-        .group_by(Seguimiento.infante_id)
-        .subquery()
-    )
-    
-    # Query principal: infantes con su última evaluación
-    infantes_evaluaciones = (
-        db.query(
-            Infante.id_infante,
-            Infante.fecha_nacimiento,
-            Infante.genero,
-            Infante.sede_id,
-            EvaluacionNutricional.nivel_riesgo
-        )
-        .join(subq_ultimo_seguimiento, Infante.id_infante == subq_ultimo_seguimiento.c.infante_id)
-        .outerjoin(
-            EvaluacionNutricional,
-            EvaluacionNutricional.seguimiento_id == subq_ultimo_seguimiento.c.ultimo_seguimiento
-        )
+    from src.db.models import Sede, UltimaEvaluacionInfante
+    from sqlalchemy import func, case, literal
+
+    # Rangos de edad en años cumplidos. "edad >= k" equivale a "nació a más tardar hoy - k años",
+    # así el CASE compara fechas (portátil e indexable) en lugar de calcular la edad por fila
+    hoy = date.today()
+
+    def hace_años(k: int) -> date:
+        return _hace_años(hoy, k)
+
+    fecha_nac = Infante.fecha_nacimiento
+    grupo_edad = case(
+        (fecha_nac.is_(None), literal("sin_fecha")),
+        (fecha_nac > hoy, literal("fuera")),
+        (fecha_nac > hace_años(3), literal("0-2 años")),
+        (fecha_nac > hace_años(6), literal("3-5 años")),
+        (fecha_nac > hace_años(9), literal("6-8 años")),
+        (fecha_nac > hace_años(12), literal("9-11 años")),
+        else_=literal("fuera"),
+    ).label("grupo_edad")
+
+    # Nivel de riesgo de la última evaluación -> categoría del dashboard (sin evaluación cuenta como normal)
+    nivel = func.lower(UltimaEvaluacionInfante.nivel_riesgo)
+    riesgo = case(
+        (UltimaEvaluacionInfante.nivel_riesgo.is_(None), literal("normal")),
+        (nivel.in_(["normal", "bajo"]), literal("normal")),
+        (nivel == "medio", literal("bajo")),
+        (nivel == "alto", literal("medio")),
+        else_=literal("alto"),
+    ).label("riesgo")
+
+    # Una sola consulta agrupada sobre la proyección (un infante por fila, con su último seguimiento):
+    # (rango de edad, riesgo, género, sede) -> conteo
+    filas = (
+        db.query(grupo_edad, riesgo, Infante.genero, Infante.sede_id, Sede.nombre.label("sede_nombre"), func.count().label("total"))
+        .select_from(UltimaEvaluacionInfante)
+        .join(Infante, Infante.id_infante == UltimaEvaluacionInfante.infante_id)
+        .outerjoin(Sede, Sede.id_sede == Infante.sede_id)
+        .group_by(grupo_edad, riesgo, Infante.genero, Infante.sede_id, Sede.nombre)
         .all()
     )
-    
-    # Procesar datos por rangos de edad
+
     edad_ranges = {
         "0-2 años": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0},
         "3-5 años": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0},
         "6-8 años": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0},
         "9-11 años": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0},
     }
-    
-    # Distribución general
     distribucion_general = {"normal": 0, "bajo": 0, "medio": 0, "alto": 0}
-    
-    # Distribución por género
     distribucion_genero = {
         "M": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0},
         "F": {"normal": 0, "bajo": 0, "medio": 0, "alto": 0}
     }
-    
-    # Procesar cada infante
-    for infante in infantes_evaluaciones:
-        edad = calcular_edad_años(infante.fecha_nacimiento)
-        if edad is None:
+    por_sede = {}
+
+    for fila in filas:
+        if fila.sede_nombre is not None:
+            sede = por_sede.setdefault(fila.sede_id, {"sede": fila.sede_nombre, "total": 0, "normal": 0, "alertas": 0})
+            sede["total"] += fila.total
+            sede["normal" if fila.riesgo == "normal" else "alertas"] += fila.total
+
+        if fila.grupo_edad == "sin_fecha":
             continue
-        
-        # Normalizar nivel de riesgo (manejar None como "normal")
-        nivel = (infante.nivel_riesgo or "Normal").lower()
-        if nivel == "normal" or nivel == "bajo":
-            riesgo_key = "normal"
-        elif nivel == "medio":
-            riesgo_key = "bajo"
-        elif nivel == "alto":
-            riesgo_key = "medio"
-        else:
-            riesgo_key = "alto"
-        
-        # Mapeo más simple basado en el nivel real
-        if nivel in ["normal", "bajo"]:
-            riesgo_key = "normal"
-        elif nivel == "medio":
-            riesgo_key = "bajo"
-        elif nivel == "alto":
-            riesgo_key = "medio"
-        else:
-            riesgo_key = "alto"
-        
-        # Clasificar por edad
-        if 0 <= edad <= 2:
-            edad_ranges["0-2 años"][riesgo_key] += 1
-        elif 3 <= edad <= 5:
-            edad_ranges["3-5 años"][riesgo_key] += 1
-        elif 6 <= edad <= 8:
-            edad_ranges["6-8 años"][riesgo_key] += 1
-        elif 9 <= edad <= 11:
-            edad_ranges["9-11 años"][riesgo_key] += 1
-        
-        # Distribución general
-        distribucion_general[riesgo_key] += 1
-        
-        # Distribución por género
-        if infante.genero in ["M", "F"]:
-            distribucion_genero[infante.genero][riesgo_key] += 1
-    
-    # Obtener estadísticas por sede
-    sedes = db.query(Sede).all()
-    sedes_stats = []
-    
-    for sede in sedes:
-        infantes_sede = [i for i in infantes_evaluaciones if i.sede_id == sede.id_sede]
-        total = len(infantes_sede)
-        
-        if total > 0:
-            normal = sum(1 for i in infantes_sede if (i.nivel_riesgo or "Normal").lower() in ["normal", "bajo"])
-            alertas = total - normal
-            
-            sedes_stats.append({
-                "sede": sede.nombre,
-                "total": total,
-                "normal": normal,
-                "alertas": alertas
-            })
-    
+        if fila.grupo_edad in edad_ranges:
+            edad_ranges[fila.grupo_edad][fila.riesgo] += fila.total
+        distribucion_general[fila.riesgo] += fila.total
+        if fila.genero in distribucion_genero:
+            distribucion_genero[fila.genero][fila.riesgo] += fila.total
+
+    sedes_stats = [por_sede[k] for k in sorted(por_sede)]
+
     return {
         "por_edad": [
             {"ageGroup": k, **v} for k, v in edad_ranges.items()
@@ -237,17 +179,59 @@ def get_nutritional_stats(db: Session = Depends(get_db)):
     }
 
 
+def _hace_años(hoy: date, k: int) -> date:
+    """Fecha de hace k años (los nacidos ese día o antes tienen al menos k años cumplidos)"""
+    try:
+        return hoy.replace(year=hoy.year - k)
+    except ValueError:  # 29 de febrero en año no bisiesto
+        return hoy.replace(year=hoy.year - k, day=28)
+
+
 @router.get("/", response_model=List[ChildOut])
 def list_children(
+    response: Response,
     limit: int = Query(50, ge=1, le=500, description="Número máximo de registros"),
-    offset: int = Query(0, ge=0, description="Número de registros a saltar"),
+    offset: int = Query(0, ge=0, description="Registros a saltar (obsoleto: usar cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
+    sede_id: Optional[int] = Query(None, description="Filtrar por sede"),
+    genero: Optional[str] = Query(None, description="Filtrar por género (M/F)"),
+    edad_min: Optional[int] = Query(None, ge=0, description="Edad mínima en años cumplidos"),
+    edad_max: Optional[int] = Query(None, ge=0, description="Edad máxima en años cumplidos"),
+    nivel_riesgo: Optional[str] = Query(None, description="Nivel de riesgo de la última evaluación (Bajo, Medio, Alto)"),
+    sort: str = Query("id", description="Orden: id, nombre o fecha_nacimiento"),
+    order: str = Query("asc", description="asc o desc"),
+    count: Optional[str] = Query(None, description="exact o estimate: total en X-Total-Count / X-Total-Count-Estimate"),
     db: Session = Depends(get_db)
 ):
     """
-    Lista todos los infantes con paginación
+    Lista los infantes con filtros y paginación por cursor (keyset).
+    La página siguiente se pide con el cursor de la cabecera X-Next-Cursor.
     """
-    children = db.query(Infante).offset(offset).limit(limit).all()
-    return children
+    from src.db.models import UltimaEvaluacionInfante
+    from src.api.pagination import paginate_list
+
+    query = db.query(Infante)
+    if sede_id is not None:
+        query = query.filter(Infante.sede_id == sede_id)
+    if genero:
+        query = query.filter(Infante.genero == genero.strip()[:1].upper())
+    # Edad en años cumplidos -> rango de fechas de nacimiento (usa el índice de fecha_nacimiento)
+    hoy = date.today()
+    if edad_min is not None:
+        query = query.filter(Infante.fecha_nacimiento <= _hace_años(hoy, edad_min))
+    if edad_max is not None:
+        query = query.filter(Infante.fecha_nacimiento > _hace_años(hoy, edad_max + 1))
+    if nivel_riesgo:
+        query = query.join(
+            UltimaEvaluacionInfante, UltimaEvaluacionInfante.infante_id == Infante.id_infante
+        ).filter(UltimaEvaluacionInfante.nivel_riesgo == nivel_riesgo.strip().capitalize())
+
+    return paginate_list(
+        query, response,
+        sort_columns={"id": Infante.id_infante, "nombre": Infante.nombre, "fecha_nacimiento": Infante.fecha_nacimiento},
+        pk=Infante.id_infante, sort=sort, order=order,
+        cursor=cursor, limit=limit, offset=offset, count=count,
+    )
 
 
 @router.post("/", response_model=ChildOut, status_code=status.HTTP_201_CREATED)
@@ -290,6 +274,10 @@ def create_child(
     db.add(new_child)
     db.commit()
     db.refresh(new_child)
+    invalidate_dashboard()
+
+    from src.services.search_index import index_documents, infante_doc
+    index_documents([infante_doc(new_child)])
     
     # Registrar actividad
     from src.services.activity_service import ActivityService
@@ -302,50 +290,126 @@ def create_child(
     
     return new_child
 
+@router.get("/search")
+def search_children(
+    q: str = Query(..., min_length=2, description="Nombre (o parte) del infante o de su acudiente"),
+    sede_id: Optional[int] = Query(None, description="Filtrar por sede"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca infantes por nombre del infante o del acudiente, sin importar tildes ni mayúsculas
+    y tolerando errores de escritura. Ordenado por similitud; incluye sede y último nivel de riesgo.
+    """
+    from src.services.search_service import SearchService
+
+    return SearchService.buscar_infantes(db, q, sede_id=sede_id, limit=limit)
+
+
 @router.get("/recent-activity")
 def get_recent_activity(db: Session = Depends(get_db), limit: int = 4):
     """
     Obtiene las actividades más recientes del sistema con información del usuario
     """
     from src.db.models import ActividadReciente, Usuario
-    from datetime import datetime
+    from src.services.activity_service import ActivityService
+    
+    actividades = db.query(ActividadReciente, Usuario.nombre)\
+        .outerjoin(Usuario, ActividadReciente.usuario_id == Usuario.id_usuario)\
+        .order_by(ActividadReciente.fecha_creacion.desc())\
+        .limit(limit)\
+        .all()
+    
+    return [ActivityService.a_reciente(act, usuario_nombre) for act, usuario_nombre in actividades]
+
+@router.get("/alerts")
+def get_active_alerts(db: Session = Depends(get_db), limit: int = 10):
+    """
+    Obtiene notificaciones recientes (alertas, seguimientos, importaciones)
+    """
+    from src.db.models import ActividadReciente, Usuario
+    from src.services.activity_service import ActivityService
     
-    actividades = db.query(ActividadReciente, Usuario)\
+    # Obtener actividades recientes con el nombre del usuario
+    actividades = db.query(ActividadReciente, Usuario.nombre)\
         .outerjoin(Usuario, ActividadReciente.usuario_id == Usuario.id_usuario)\
         .order_by(ActividadReciente.fecha_creacion.desc())\
         .limit(limit)\
         .all()
     
-    resultado = []
-    for act, usuario in actividades:
-        # Calcular tiempo relativo
-        ahora = datetime.now(act.fecha_creacion.tzinfo)
-        diferencia = ahora - act.fecha_creacion
-        
-        if diferencia.days > 0:
-            tiempo = f"Hace {diferencia.days} día{'s' if diferencia.days > 1 else ''}"
-        elif diferencia.seconds >= 3600:
-            horas = diferencia.seconds // 3600
-            tiempo = f"Hace {horas} hora{'s' if horas > 1 else ''}"
-        else:
-            minutos = max(1, diferencia.seconds // 60)  # Mínimo 1 minuto
-            tiempo = f"Hace {minutos} minuto{'s' if minutos > 1 else ''}"
-        
-        # Construir texto con el nombre del usuario si está disponible
-        usuario_nombre = usuario.nombre if usuario else "Usuario"
-        
-        resultado.append({
-            "id": act.id_actividad,
-            "text": act.descripcion,
-            "subject": act.entidad_relacionada,
-            "time": tiempo,
-            "icon": act.icono,
-            "tipo": act.tipo_actividad,
-            "nivel": act.nivel_importancia,
-            "usuario": usuario_nombre
-        })
-    
-    return resultado
+    return [ActivityService.a_notificacion(act, usuario_nombre) for act, usuario_nombre in actividades]
+
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    tipos: Optional[str] = Query(None, description="Tipos de actividad separados por coma (alerta,seguimiento,...)"),
+):
+    """
+    Server-Sent Events con cada actividad nueva (alertas, seguimientos, importaciones) en cuanto
+    se registra. No consulta la base: el panel carga /alerts una vez y luego sólo escucha.
+    Al reconectar, el navegador envía Last-Event-ID y se reenvían los eventos perdidos; si ya no
+    están en memoria se envía un evento "resync" para que el cliente recargue la lista.
+    """
+    import asyncio
+    import json
+    from fastapi.responses import StreamingResponse
+    from src.services.broadcast_service import SSE_HEARTBEAT_S, broadcaster
+
+    filtro = {t.strip() for t in tipos.split(",") if t.strip()} if tipos else None
+    try:
+        last_event_id = int(request.headers.get("last-event-id", ""))
+    except ValueError:
+        last_event_id = None
+
+    def formato(evento) -> str:
+        return f"id: {evento['id']}\nevent: actividad\ndata: {json.dumps(evento, default=str)}\n\n"
+
+    async def eventos():
+        sub, pendientes, completo = broadcaster.subscribe(filtro, last_event_id)
+        try:
+            yield "retry: 5000\n\n"
+            if not completo:
+                yield "event: resync\ndata: {}\n\n"
+            for evento in pendientes:
+                yield formato(evento)
+            while True:
+                try:
+                    evento = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"  # mantiene viva la conexión en proxies
+                    continue
+                yield formato(evento)
+        finally:
+            broadcaster.unsubscribe(sub)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/alerts/count")
+@cached(DASHBOARD)
+def get_alerts_count(db: Session = Depends(get_db)):
+    """
+    Obtiene el conteo de alertas sin leer (últimas 24 horas)
+    """
+    from src.db.models import ActividadReciente
+    from datetime import datetime, timedelta
+    
+    hace_24h = datetime.now() - timedelta(hours=24)
+    
+    count = db.query(ActividadReciente)\
+        .filter(ActividadReciente.tipo_actividad == "alerta")\
+        .filter(ActividadReciente.fecha_creacion >= hace_24h)\
+        .count()
+    
+    return {"count": count}
+
 
 @router.get("/{child_id}", response_model=ChildOut)
 def get_child(
@@ -405,12 +469,30 @@ def update_child(
                 detail=f"Acudiente con id {update_data['acudiente_id']} no encontrado"
             )
     
+    # Sede, sexo y fecha de nacimiento son parte de la clave de resumen_mensual_sede:
+    # se quitan las evaluaciones de la clave anterior y se suman en la nueva
+    from src.services.rollup_service import RollupService
+    cambia_resumen = any(
+        campo in update_data and update_data[campo] != getattr(child, campo)
+        for campo in ("sede_id", "genero", "fecha_nacimiento")
+    )
+    if cambia_resumen:
+        RollupService.descontar_infante(db, child_id)
+    
     # Aplicar actualizaciones
     for key, value in update_data.items():
         setattr(child, key, value)
     
+    if cambia_resumen:
+        db.flush()
+        RollupService.registrar_infante(db, child_id)
+    
     db.commit()
     db.refresh(child)
+    invalidate_dashboard()
+
+    from src.services.search_index import index_documents, infante_doc
+    index_documents([infante_doc(child)])
     
     return child
 
@@ -431,58 +513,91 @@ def delete_child(
             detail=f"Infante con id {child_id} no encontrado"
         )
     
+    from src.services.projection_service import ProjectionService
+    ProjectionService.eliminar_infante(db, child_id)
+    from src.services.rollup_service import RollupService
+    RollupService.descontar_infante(db, child_id)
     db.delete(child)
     db.commit()
+    invalidate_dashboard()
+
+    from src.services.search_index import unindex
+    unindex(f"infante:{child_id}")
     
     return None
 
 
+def _float_or_none(value):
+    return float(value) if value is not None else None
+
+
 @router.get("/{child_id}/followups")
 def get_child_followups(
     child_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Seguimientos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
     db: Session = Depends(get_db)
 ):
 
     """
-    Obtiene todos los seguimientos de un infante específico con datos antropométricos
+    Obtiene los seguimientos de un infante (más recientes primero) con datos antropométricos
+    y z-scores de la evaluación, en una sola consulta.
+    Paginación por (fecha, id_seguimiento): si hay más páginas, la cabecera X-Next-Cursor trae
+    el cursor para pedir la siguiente.
     """
-    child = db.query(Infante).filter(Infante.id_infante == child_id).first()
+    from src.db.models import DatoAntropometrico, EvaluacionNutricional
+    from sqlalchemy import func
+    from src.api.pagination import decode_cursor, paginate, set_next_cursor
+
+    exists = db.query(Infante.id_infante).filter(Infante.id_infante == child_id).first()
     
-    if not child:
+    if not exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Infante con id {child_id} no encontrado"
         )
     
-    # Obtener seguimientos con datos antropométricos
-    from src.db.models import Seguimiento, DatoAntropometrico
-    from sqlalchemy.orm import joinedload
-    
-    # CAMBIO: Ordenar por ID descendente en lugar de fecha
-    seguimientos = db.query(Seguimiento).filter(
-        Seguimiento.infante_id == child_id
-    ).order_by(Seguimiento.id_seguimiento.desc()).all()
+    # Un solo registro antropométrico por seguimiento (el primero, como antes)
+    primer_dato = (
+        db.query(func.min(DatoAntropometrico.id_dato))
+        .filter(DatoAntropometrico.seguimiento_id == Seguimiento.id_seguimiento)
+        .correlate(Seguimiento)
+        .scalar_subquery()
+    )
+    query = (
+        db.query(Seguimiento, DatoAntropometrico, EvaluacionNutricional)
+        .outerjoin(DatoAntropometrico, DatoAntropometrico.id_dato == primer_dato)
+        .outerjoin(EvaluacionNutricional, EvaluacionNutricional.seguimiento_id == Seguimiento.id_seguimiento)
+        .filter(Seguimiento.infante_id == child_id)
+    )
+    keyset = [Seguimiento.fecha, Seguimiento.id_seguimiento]
+    filas, hay_mas = paginate(query, keyset, decode_cursor(cursor, [date.fromisoformat, int]), limit)
+    if hay_mas:
+        ultimo = filas[-1][0]
+        set_next_cursor(response, [ultimo.fecha, ultimo.id_seguimiento])
     
     result = []
-    for seg in seguimientos:
-        # Obtener datos antropométricos del seguimiento
-        datos_antropo = db.query(DatoAntropometrico).filter(
-            DatoAntropometrico.seguimiento_id == seg.id_seguimiento
-        ).first()
-        
+    for seg, datos_antropo, evaluacion in filas:
         seguimiento_data = {
             "id_seguimiento": seg.id_seguimiento,
             "fecha": seg.fecha.isoformat() if seg.fecha else None,
             "observacion": seg.observacion,
             "encargado_id": seg.encargado_id,
-            "peso": float(datos_antropo.peso) if datos_antropo and datos_antropo.peso else None,
-            "estatura": float(datos_antropo.estatura) if datos_antropo and datos_antropo.estatura else None,
-            "imc": float(datos_antropo.imc) if datos_antropo and datos_antropo.imc else None,
-            "circunferencia_braquial": float(datos_antropo.circunferencia_braquial) if datos_antropo and datos_antropo.circunferencia_braquial else None,
-            "perimetro_cefalico": float(datos_antropo.perimetro_cefalico) if datos_antropo and datos_antropo.perimetro_cefalico else None,
-            "pliegue_triceps": float(datos_antropo.pliegue_triceps) if datos_antropo and datos_antropo.pliegue_triceps else None,
-            "pliegue_subescapular": float(datos_antropo.pliegue_subescapular) if datos_antropo and datos_antropo.pliegue_subescapular else None,
-            "perimetro_abdominal": float(datos_antropo.perimetro_abdominal) if datos_antropo and datos_antropo.perimetro_abdominal else None,
+            "peso": _float_or_none(datos_antropo.peso) if datos_antropo else None,
+            "estatura": _float_or_none(datos_antropo.estatura) if datos_antropo else None,
+            "imc": _float_or_none(datos_antropo.imc) if datos_antropo else None,
+            "circunferencia_braquial": _float_or_none(datos_antropo.circunferencia_braquial) if datos_antropo else None,
+            "perimetro_cefalico": _float_or_none(datos_antropo.perimetro_cefalico) if datos_antropo else None,
+            "pliegue_triceps": _float_or_none(datos_antropo.pliegue_triceps) if datos_antropo else None,
+            "pliegue_subescapular": _float_or_none(datos_antropo.pliegue_subescapular) if datos_antropo else None,
+            "perimetro_abdominal": _float_or_none(datos_antropo.perimetro_abdominal) if datos_antropo else None,
+            "zscores": {
+                "peso_edad": _float_or_none(evaluacion.peso_edad_zscore) if evaluacion else None,
+                "talla_edad": _float_or_none(evaluacion.talla_edad_zscore) if evaluacion else None,
+                "imc_edad": _float_or_none(evaluacion.imc_edad_zscore) if evaluacion else None,
+            },
+            "nivel_riesgo": evaluacion.nivel_riesgo if evaluacion else None,
         }
         result.append(seguimiento_data)
     
@@ -493,101 +608,13 @@ def get_child_followups(
 @router.get("/{child_id}/seguimientos", response_model=List[dict])
 def get_child_seguimientos(
     child_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Seguimientos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene todos los seguimientos de un infante específico (endpoint de compatibilidad)
     Redirige a /followups
     """
-    return get_child_followups(child_id, db)
-
-
-@router.get("/alerts")
-def get_active_alerts(db: Session = Depends(get_db), limit: int = 10):
-    """
-    Obtiene notificaciones recientes (alertas, seguimientos, importaciones)
-    """
-    from src.db.models import ActividadReciente, Infante, Usuario
-    from datetime import datetime
-    
-    # Obtener actividades recientes con joins
-    actividades = db.query(ActividadReciente, Infante, Usuario)\
-        .outerjoin(Infante, ActividadReciente.infante_id == Infante.id_infante)\
-        .outerjoin(Usuario, ActividadReciente.usuario_id == Usuario.id_usuario)\
-        .order_by(ActividadReciente.fecha_creacion.desc())\
-        .limit(limit)\
-        .all()
-    
-    resultado = []
-    for actividad, infante, usuario in actividades:
-        # Calcular tiempo relativo
-        ahora = datetime.now(actividad.fecha_creacion.tzinfo) if actividad.fecha_creacion.tzinfo else datetime.now()
-        diferencia = ahora - actividad.fecha_creacion
-        
-        if diferencia.days > 0:
-            tiempo = f"Hace {diferencia.days} día{'s' if diferencia.days > 1 else ''}"
-        elif diferencia.seconds >= 3600:
-            horas = diferencia.seconds // 3600
-            tiempo = f"Hace {horas} hora{'s' if horas > 1 else ''}"
-        else:
-            minutos = max(1, diferencia.seconds // 60)
-            tiempo = f"Hace {minutos} minuto{'s' if minutos > 1 else ''}"
-        
-        # Determinar tipo y mensaje según el tipo de actividad
-        if actividad.tipo_actividad == "alerta":
-            tipo = "alert" if actividad.nivel_importancia == "alta" else "warning"
-            titulo = "Alerta Nutricional" if actividad.nivel_importancia == "alta" else "Advertencia Nutricional"
-            mensaje = f"{actividad.descripcion} {actividad.entidad_relacionada}"
-            mostrar_infante = actividad.entidad_relacionada
-            mostrar_usuario = None
-        elif actividad.tipo_actividad == "seguimiento":
-            tipo = "info"
-            titulo = "Seguimiento Completado"
-            mensaje = f"{actividad.descripcion} {actividad.entidad_relacionada}"
-            mostrar_infante = actividad.entidad_relacionada
-            mostrar_usuario = usuario.nombre if usuario else "Usuario"
-        elif actividad.tipo_actividad == "importacion":
-            tipo = "success"
-            titulo = "Importación de Datos"
-            mensaje = f"{actividad.descripcion}"
-            mostrar_infante = actividad.entidad_relacionada  # Nombre de la sede
-            mostrar_usuario = usuario.nombre if usuario else "Usuario"
-        else:
-            tipo = "info"
-            titulo = actividad.descripcion
-            mensaje = actividad.entidad_relacionada or ""
-            mostrar_infante = actividad.entidad_relacionada
-            mostrar_usuario = usuario.nombre if usuario else None
-        
-        resultado.append({
-            "id": actividad.id_actividad,
-            "type": tipo,
-            "title": titulo,
-            "message": mensaje,
-            "time": tiempo,
-            "read": False,
-            "childName": mostrar_infante,
-            "infanteId": actividad.infante_id,
-            "seguimientoId": actividad.seguimiento_id,
-            "userName": mostrar_usuario,
-            "tipoActividad": actividad.tipo_actividad
-        })
-    
-    return resultado
-
-@router.get("/alerts/count")
-def get_alerts_count(db: Session = Depends(get_db)):
-    """
-    Obtiene el conteo de alertas sin leer (últimas 24 horas)
-    """
-    from src.db.models import ActividadReciente
-    from datetime import datetime, timedelta
-    
-    hace_24h = datetime.now() - timedelta(hours=24)
-    
-    count = db.query(ActividadReciente)\
-        .filter(ActividadReciente.tipo_actividad == "alerta")\
-        .filter(ActividadReciente.fecha_creacion >= hace_24h)\
-        .count()
-    
-    return {"count": count}
\ No newline at end of file
+    return get_child_followups(child_id, response, limit=limit, cursor=cursor, db=db)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
@@ -8,6 +8,9 @@ from src.db.session import get_db
 from src.db.models import Seguimiento, DatoAntropometrico, Examen, EvaluacionNutricional
 from src.services.nutrition_service import NutritionService
 from src.services.activity_service import ActivityService
+from src.services.projection_service import ProjectionService
+from src.services.rollup_service import RollupService
+from src.services.cache_service import DASHBOARD, cached, invalidate_dashboard
 
 
 
@@ -59,6 +62,7 @@ def create_followup(followup_data: FollowupCreate, db: Session = Depends(get_db)
         )
         db.add(nuevo_seguimiento)
         db.flush()
+        evaluacion = None
         
         # Calcular IMC si no viene
         imc = followup_data.imc if hasattr(followup_data, 'imc') else None
@@ -132,6 +136,11 @@ def create_followup(followup_data: FollowupCreate, db: Session = Depends(get_db)
                     kcal_per_day=energy_req.get("kcal_per_day")
                 )
                 
+                # Peso esperado y su requerimiento, guardados para no recalcularlos al consultar
+                expected_weight, expected_req = NutritionService.get_expected_energy_requirement(
+                    age_days, gender, followup_data.peso
+                )
+                
                 # Generar recomendaciones
                 recommendations = NutritionService.generate_recommendations(assessment)
                 
@@ -155,14 +164,22 @@ def create_followup(followup_data: FollowupCreate, db: Session = Depends(get_db)
                     nivel_riesgo=assessment.get("risk_level", "Bajo"),
                     requerimientos_energeticos=energy_req,
                     requerimientos_nutrientes=nutrient_data,
+                    peso_esperado=expected_weight,
+                    requerimientos_energeticos_esperados=expected_req,
                     recomendaciones_nutricionales=recommendations.get("nutritional_recommendations", []),
                     recomendaciones_generales=recommendations.get("general_recommendations", []),
                     instrucciones_cuidador=recommendations.get("caregiver_instructions", [])
                 )
                 db.add(evaluacion)
         
+        # Proyección "última evaluación por infante" en la misma transacción
+        ProjectionService.actualizar(db, nuevo_seguimiento, evaluacion)
+        if evaluacion is not None:
+            RollupService.registrar(db, nuevo_seguimiento, evaluacion, infante)
+        
         db.commit()
         db.refresh(nuevo_seguimiento)
+        invalidate_dashboard()
         
         # Registrar actividad de seguimiento (DESPUÉS de db.commit())
         if infante:  # 'infante' ya existe del bloque anterior
@@ -188,6 +205,10 @@ def create_followup(followup_data: FollowupCreate, db: Session = Depends(get_db)
             except Exception as act_error:
                 print(f"Error registrando actividad: {act_error}")
         
+        # De nuevo: las alertas cuentan en /alerts/count (en modo async el escritor de actividad
+        # vuelve a invalidar cuando las inserta)
+        invalidate_dashboard()
+        
         return {
             "id_seguimiento": nuevo_seguimiento.id_seguimiento,
             "infante_id": nuevo_seguimiento.infante_id,
@@ -203,97 +224,67 @@ def create_followup(followup_data: FollowupCreate, db: Session = Depends(get_db)
 @router.get("/{seguimiento_id}/evaluacion")
 def get_evaluacion_nutricional(seguimiento_id: int, db: Session = Depends(get_db)):
     """
-    Obtiene la evaluación nutricional completa de un seguimiento
+    Obtiene la evaluación nutricional completa de un seguimiento.
+    Devuelve lo guardado al evaluar; en evaluaciones anteriores a peso_esperado el requerimiento
+    con peso esperado se calcula en la primera consulta y se guarda.
     """
+    from sqlalchemy import func, select
     from src.db.models import Infante, DatoAntropometrico
     
-    evaluacion = db.query(EvaluacionNutricional).filter(
-        EvaluacionNutricional.seguimiento_id == seguimiento_id
-    ).first()
+    # Evaluación, fechas, sexo y peso medido en una sola consulta
+    primer_dato = (
+        select(func.min(DatoAntropometrico.id_dato))
+        .where(DatoAntropometrico.seguimiento_id == Seguimiento.id_seguimiento)
+        .correlate(Seguimiento)
+        .scalar_subquery()
+    )
+    fila = (
+        db.query(EvaluacionNutricional, Seguimiento.fecha, Infante.fecha_nacimiento, Infante.genero,
+                 DatoAntropometrico.peso)
+        .join(Seguimiento, Seguimiento.id_seguimiento == EvaluacionNutricional.seguimiento_id)
+        .join(Infante, Infante.id_infante == Seguimiento.infante_id)
+        .outerjoin(DatoAntropometrico, DatoAntropometrico.id_dato == primer_dato)
+        .filter(EvaluacionNutricional.seguimiento_id == seguimiento_id)
+        .first()
+    )
     
-    if not evaluacion:
+    if not fila:
         raise HTTPException(status_code=404, detail="Evaluación no encontrada")
+    evaluacion, fecha, fecha_nacimiento, genero, peso_actual = fila
     
-    # DEBUG: Verificar qué tiene evaluacion.requerimientos_nutrientes
-    print(f"\n===== DEBUG GET EVALUACION =====")
-    print(f"Seguimiento ID: {seguimiento_id}")
-    print(f"Evaluacion ID: {evaluacion.id_evaluacion}")
-    print(f"requerimientos_nutrientes type: {type(evaluacion.requerimientos_nutrientes)}")
-    print(f"requerimientos_nutrientes value: {evaluacion.requerimientos_nutrientes}")
-    print(f"requerimientos_nutrientes is None: {evaluacion.requerimientos_nutrientes is None}")
-    print(f"requerimientos_nutrientes length: {len(evaluacion.requerimientos_nutrientes) if evaluacion.requerimientos_nutrientes else 'N/A'}")
-    print(f"================================\n")
-    
-    # Obtener el seguimiento para obtener datos del infante
-    seguimiento = db.query(Seguimiento).filter(
-        Seguimiento.id_seguimiento == seguimiento_id
-    ).first()
-    
-    # Obtener datos antropométricos
-    datos_antropo = db.query(DatoAntropometrico).filter(
-        DatoAntropometrico.seguimiento_id == seguimiento_id
-    ).first()
-    
-    # Obtener infante
-    infante = db.query(Infante).filter(
-        Infante.id_infante == seguimiento.infante_id
-    ).first()
-    
-    # Calcular edad en días
-    from datetime import datetime
-    fecha_nacimiento = infante.fecha_nacimiento
-    if isinstance(fecha_nacimiento, str):
-        fecha_nacimiento = datetime.strptime(fecha_nacimiento, "%Y-%m-%d").date()
-    
-    age_days = (seguimiento.fecha - fecha_nacimiento).days
-    gender = 'male' if infante.genero == 'M' else 'female'
-    
-    # Calcular peso esperado desde las tablas WHO
-    weight_table = NutritionService.get_table_for_indicator("weight", gender, age_days)
-    weight_lms = NutritionService.get_lms_row(weight_table, age_days)
-    expected_weight = weight_lms["M"] if weight_lms is not None else datos_antropo.peso
-    
-    # Calcular requerimientos con peso esperado
-    expected_req = NutritionService.get_energy_requirement(
-        age_days=age_days,
-        weight=expected_weight,
-        gender=gender,
-        feeding_mode='mixed',
-        activity_level='moderate'
-    )
-    
-    # Determinar si necesitamos regenerar nutrient_requirements
+    expected_weight = float(evaluacion.peso_esperado) if evaluacion.peso_esperado is not None else None
+    expected_req = evaluacion.requerimientos_energeticos_esperados
     nutrient_requirements = evaluacion.requerimientos_nutrientes
     
-    if not nutrient_requirements or len(nutrient_requirements) == 0:
-        print(f"\n===== REGENERANDO NUTRIENT REQUIREMENTS =====")
-        print(f"age_days: {age_days}")
-        print(f"gender: {gender}")
-        print(f"weight: {expected_weight}")
-        print(f"kcal_per_day: {expected_req.get('kcal_per_day') if expected_req else None}")
-        
-        nutrient_requirements = _generate_nutrient_requirements(
-            age_days=age_days,
-            gender=gender,
-            weight=expected_weight,
-            kcal_per_day=expected_req.get("kcal_per_day") if expected_req else None
-        )
-        
-        print(f"Resultado regenerado - type: {type(nutrient_requirements)}")
-        print(f"Resultado regenerado - length: {len(nutrient_requirements) if nutrient_requirements else 0}")
-        if nutrient_requirements:
-            print(f"Primer elemento: {nutrient_requirements[0] if len(nutrient_requirements) > 0 else 'N/A'}")
-        print(f"=============================================\n")
+    if expected_req is None or not nutrient_requirements:
+        age_days = (fecha - fecha_nacimiento).days
+        gender = 'male' if genero == 'M' else 'female'
+        if expected_req is None:
+            expected_weight, expected_req = NutritionService.get_expected_energy_requirement(
+                age_days, gender, peso_actual
+            )
+            evaluacion.peso_esperado = expected_weight
+            evaluacion.requerimientos_energeticos_esperados = expected_req or {}
+        if not nutrient_requirements:
+            nutrient_requirements = _generate_nutrient_requirements(
+                age_days=age_days,
+                gender=gender,
+                weight=expected_weight,
+                kcal_per_day=expected_req.get("kcal_per_day") if expected_req else None
+            )
+            if nutrient_requirements:
+                evaluacion.requerimientos_nutrientes = nutrient_requirements
+        db.commit()
     
     return {
         "assessment": {
-            "bmi": float(evaluacion.imc) if evaluacion.imc else None,
-            "weight_for_age_zscore": float(evaluacion.peso_edad_zscore) if evaluacion.peso_edad_zscore else None,
-            "height_for_age_zscore": float(evaluacion.talla_edad_zscore) if evaluacion.talla_edad_zscore else None,
-            "bmi_for_age_zscore": float(evaluacion.imc_edad_zscore) if evaluacion.imc_edad_zscore else None,
-            "head_circumference_zscore": float(evaluacion.perimetro_cefalico_zscore) if evaluacion.perimetro_cefalico_zscore else None,
-            "triceps_skinfold_zscore": float(evaluacion.pliegue_triceps_zscore) if evaluacion.pliegue_triceps_zscore else None,
-            "subscapular_skinfold_zscore": float(evaluacion.pliegue_subescapular_zscore) if evaluacion.pliegue_subescapular_zscore else None,
+            "bmi": float(evaluacion.imc) if evaluacion.imc is not None else None,
+            "weight_for_age_zscore": float(evaluacion.peso_edad_zscore) if evaluacion.peso_edad_zscore is not None else None,
+            "height_for_age_zscore": float(evaluacion.talla_edad_zscore) if evaluacion.talla_edad_zscore is not None else None,
+            "bmi_for_age_zscore": float(evaluacion.imc_edad_zscore) if evaluacion.imc_edad_zscore is not None else None,
+            "head_circumference_zscore": float(evaluacion.perimetro_cefalico_zscore) if evaluacion.perimetro_cefalico_zscore is not None else None,
+            "triceps_skinfold_zscore": float(evaluacion.pliegue_triceps_zscore) if evaluacion.pliegue_triceps_zscore is not None else None,
+            "subscapular_skinfold_zscore": float(evaluacion.pliegue_subescapular_zscore) if evaluacion.pliegue_subescapular_zscore is not None else None,
             "nutritional_status": {
                 "peso_edad": evaluacion.clasificacion_peso_edad,
                 "talla_edad": evaluacion.clasificacion_talla_edad,
@@ -313,21 +304,28 @@ def get_evaluacion_nutricional(seguimiento_id: int, db: Session = Depends(get_db
             "caregiver_instructions": evaluacion.instrucciones_cuidador
         },
         "weight_info": {
-            "current_weight": float(datos_antropo.peso) if datos_antropo and datos_antropo.peso else None,
+            "current_weight": float(peso_actual) if peso_actual else None,
             "expected_weight": float(expected_weight) if expected_weight else None
         }
     }
 
 
 @router.get("/infante/{infante_id}/historial")
-def get_historial_evaluaciones(infante_id: int, db: Session = Depends(get_db)):
+def get_historial_evaluaciones(
+    infante_id: int,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500, description="Evaluaciones por página"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
+    db: Session = Depends(get_db)
+):
     """
-    Obtiene el historial completo de evaluaciones de un infante
-    para mostrar en el perfil y generar estadísticas
+    Obtiene el historial de evaluaciones de un infante (más recientes primero)
+    para mostrar en el perfil y generar estadísticas.
+    Paginación por (fecha, id_seguimiento) con la cabecera X-Next-Cursor.
     """
-    from sqlalchemy import desc
+    from src.api.pagination import decode_cursor, paginate, set_next_cursor
     
-    evaluaciones = db.query(
+    query = db.query(
         EvaluacionNutricional,
         Seguimiento,
         DatoAntropometrico
@@ -337,9 +335,12 @@ def get_historial_evaluaciones(infante_id: int, db: Session = Depends(get_db)):
         DatoAntropometrico, Seguimiento.id_seguimiento == DatoAntropometrico.seguimiento_id
     ).filter(
         Seguimiento.infante_id == infante_id
-    ).order_by(
-        desc(Seguimiento.fecha)
-    ).all()
+    )
+    keyset = [Seguimiento.fecha, Seguimiento.id_seguimiento]
+    evaluaciones, hay_mas = paginate(query, keyset, decode_cursor(cursor, [date.fromisoformat, int]), limit)
+    if hay_mas:
+        ultimo = evaluaciones[-1][1]
+        set_next_cursor(response, [ultimo.fecha, ultimo.id_seguimiento])
     
     historial = []
     for eval, seg, datos in evaluaciones:
@@ -356,40 +357,117 @@ def get_historial_evaluaciones(infante_id: int, db: Session = Depends(get_db)):
                 "imc_edad": eval.clasificacion_imc_edad
             },
             "zscores": {
-                "peso_edad": float(eval.peso_edad_zscore) if eval.peso_edad_zscore else None,
-                "talla_edad": float(eval.talla_edad_zscore) if eval.talla_edad_zscore else None,
-                "imc_edad": float(eval.imc_edad_zscore) if eval.imc_edad_zscore else None
+                "peso_edad": float(eval.peso_edad_zscore) if eval.peso_edad_zscore is not None else None,
+                "talla_edad": float(eval.talla_edad_zscore) if eval.talla_edad_zscore is not None else None,
+                "imc_edad": float(eval.imc_edad_zscore) if eval.imc_edad_zscore is not None else None
             }
         })
     
     return historial
 
 
+@router.get("/infante/{infante_id}/trayectoria")
+def get_trayectoria_infante(
+    infante_id: int,
+    horizonte_dias: int = Query(90, ge=1, le=365, description="Días a proyectar desde la última visita"),
+    db: Session = Depends(get_db)
+):
+    """
+    Trayectoria de crecimiento del infante: por visita, velocidades de peso/talla, cambio de
+    z-score y cruces de percentil; resumen con proyección y alerta de crecimiento.
+    """
+    from src.services.trajectory_service import TrajectoryService
+
+    trayectoria = TrajectoryService.infante(db, infante_id, horizonte_dias)
+    if not trayectoria["puntos"]:
+        raise HTTPException(status_code=404, detail="El infante no tiene seguimientos")
+    return trayectoria
+
+
+@router.get("/trayectorias")
+def get_trayectorias(
+    sede_id: Optional[int] = Query(None, description="Sede a revisar (todas si se omite)"),
+    solo_alertas: bool = Query(False, description="Sólo infantes con alerta de crecimiento"),
+    horizonte_dias: int = Query(90, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """
+    Tamizaje de crecimiento de una sede: resumen de trayectoria de cada infante calculado en
+    una sola pasada sobre todos sus seguimientos.
+    """
+    from src.services.trajectory_service import TrajectoryService
+
+    return TrajectoryService.sede(db, sede_id=sede_id, solo_alertas=solo_alertas, horizonte_dias=horizonte_dias)
+
+
+def _mes(valor: Optional[str], parametro: str):
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(f"{valor}-01")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{parametro} debe tener formato AAAA-MM")
+
+
+@router.get("/estadisticas/prevalencia")
+def get_prevalencia(
+    sede_id: Optional[int] = Query(None, description="Sede (todas si se omite)"),
+    desde: Optional[str] = Query(None, description="Mes inicial AAAA-MM"),
+    hasta: Optional[str] = Query(None, description="Mes final AAAA-MM"),
+    grupo_edad: Optional[str] = Query(None, description="0-5m, 6-11m, 12-23m, 24-59m, 5-10a u otro"),
+    genero: Optional[str] = Query(None, description="M o F"),
+    por_sede: bool = Query(False, description="Una serie por sede en lugar del total"),
+    db: Session = Depends(get_db)
+):
+    """
+    Serie mensual de prevalencia de retraso en talla, emaciación, bajo peso, sobrepeso y
+    obesidad (% de evaluaciones del mes) con media y desviación estándar de z-score.
+    Se lee de resumen_mensual_sede, sin recorrer las evaluaciones.
+    """
+    if grupo_edad and grupo_edad not in RollupService.GRUPOS_EDAD + [RollupService.GRUPO_FUERA]:
+        raise HTTPException(status_code=400, detail=f"grupo_edad inválido: {grupo_edad}")
+    return {
+        "grupos_edad": RollupService.GRUPOS_EDAD + [RollupService.GRUPO_FUERA],
+        "serie": RollupService.prevalencia(
+            db,
+            sede_id=sede_id,
+            desde=_mes(desde, "desde"),
+            hasta=_mes(hasta, "hasta"),
+            grupo_edad=grupo_edad,
+            genero=genero.strip().upper()[:1] if genero else None,
+            por_sede=por_sede,
+        ),
+    }
+
+
 @router.get("/estadisticas/dashboard")
+@cached(DASHBOARD)
 def get_estadisticas_dashboard(db: Session = Depends(get_db)):
     """
     Obtiene estadísticas agregadas para el dashboard principal
     """
-    from sqlalchemy import func, distinct
+    from sqlalchemy import func
+    from src.db.models import UltimaEvaluacionInfante
     
-    # Total de infantes evaluados
-    total_infantes = db.query(func.count(distinct(Seguimiento.infante_id))).scalar()
+    # Se lee la proyección de la última evaluación: un infante por fila, sin agrupar seguimientos
+    U = UltimaEvaluacionInfante
     
-    # Distribución por nivel de riesgo
-    distribucion_riesgo = db.query(
-        EvaluacionNutricional.nivel_riesgo,
-        func.count(distinct(Seguimiento.infante_id))
-    ).join(
-        Seguimiento, EvaluacionNutricional.seguimiento_id == Seguimiento.id_seguimiento
-    ).group_by(
-        EvaluacionNutricional.nivel_riesgo
-    ).all()
+    # Total de infantes con seguimiento
+    total_infantes = db.query(func.count(U.infante_id)).scalar()
+    
+    # Distribución por nivel de riesgo actual (última evaluación de cada infante)
+    distribucion_riesgo = (
+        db.query(U.nivel_riesgo, func.count(U.infante_id))
+        .filter(U.nivel_riesgo.is_not(None))
+        .group_by(U.nivel_riesgo)
+        .all()
+    )
     
-    # Promedios de indicadores
+    # Promedios de indicadores en la última evaluación
     promedios = db.query(
-        func.avg(EvaluacionNutricional.peso_edad_zscore).label('promedio_peso_edad'),
-        func.avg(EvaluacionNutricional.talla_edad_zscore).label('promedio_talla_edad'),
-        func.avg(EvaluacionNutricional.imc_edad_zscore).label('promedio_imc_edad')
+        func.avg(U.peso_edad_zscore).label('promedio_peso_edad'),
+        func.avg(U.talla_edad_zscore).label('promedio_talla_edad'),
+        func.avg(U.imc_edad_zscore).label('promedio_imc_edad')
     ).first()
     
     return {
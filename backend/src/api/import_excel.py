@@ -1,10 +1,15 @@
 # backend/src/api/import_excel.py
 # Servicio de importación de Excel con "vector store" ligero (TF-IDF).
 # Rutas:
-#   POST /import/excel            -> subir Excel, vectorizar y persistir (devuelve import_id)
+#   POST /import/excel            -> subir Excel/CSV/Parquet, vectorizar y persistir (devuelve import_id)
 #   GET  /import/template         -> descargar plantilla Excel
+#   POST /import/validate         -> validar Excel sin importar (dry-run, no escribe en DB)
+#   POST /import/append/{id}      -> añadir filas a un import existente (sin re-vectorizar todo)
 #   GET  /import/status/{id}      -> consultar estado del import
 #   GET  /import/search           -> búsqueda por similitud (coseno) dentro de un import_id
+#   POST /import/search/batch     -> varias consultas en un solo producto disperso (p. ej. deduplicación)
+#   GET  /import/search/global    -> búsqueda en todos los imports + infantes y acudientes registrados
+#   POST /import/search/global/rebuild -> reconstruir el índice global desde la base y los imports
 
 from __future__ import annotations
 
@@ -14,18 +19,19 @@ import os
 import time
 import uuid
 from enum import Enum
-from typing import Dict, List, Optional, Tuple
+from datetime import date
+from typing import Dict, List, Literal, Optional, Tuple
 
-import numpy as np
 import pandas as pd
 from fastapi import APIRouter, File, HTTPException, Query, UploadFile, Depends
 from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sqlalchemy.orm import Session
 from src.db.session import get_db
 from src.services.activity_service import ActivityService
+from src.services.search_index import global_index, index_import_rows
+from src.services.vector_store import DATA_DIR, VectorStore, get_vector_store, payload_to_text
 
 
 # --------------------------------------------------------------------------------------
@@ -33,9 +39,7 @@ from src.services.activity_service import ActivityService
 # --------------------------------------------------------------------------------------
 router = APIRouter(tags=["Importación Excel"])  # <- aparecerá agrupado en /docs
 
-DATA_DIR = os.getenv("VECTOR_DATA_DIR", "./data/imports")  # carpeta base de persistencia
-os.makedirs(DATA_DIR, exist_ok=True)
-ALLOWED_EXTS = (".xlsx", ".xls")
+ALLOWED_EXTS = (".xlsx", ".xls", ".csv", ".parquet")
 
 
 # --------------------------------------------------------------------------------------
@@ -65,103 +69,16 @@ class SearchResult(BaseModel):
     payload: Dict[str, str]
 
 
-# --------------------------------------------------------------------------------------
-# VectorStore (persistencia simple por import_id)
-# --------------------------------------------------------------------------------------
-class VectorStore:
-    """
-    "Vector DB" simple por import_id.
-    Persiste: vocab.json, matrix.npz, payload.json, meta.json
-    """
+class BatchSearchRequest(BaseModel):
+    import_id: str
+    queries: List[str] = Field(..., min_length=1, max_length=50_000)
+    top_k: int = Field(5, ge=1, le=50)
+    include_payload: bool = True
 
-    def __init__(self, import_id: str):
-        self.import_id = import_id
-        self.base = os.path.join(DATA_DIR, import_id)
-        self.meta_path = os.path.join(self.base, "meta.json")
-        self.vocab_path = os.path.join(self.base, "vocab.json")
-        self.matrix_path = os.path.join(self.base, "matrix.npz")
-        self.payload_path = os.path.join(self.base, "payload.json")
-        os.makedirs(self.base, exist_ok=True)
-
-        self.vectorizer: Optional[TfidfVectorizer] = None
-        self.matrix = None  # scipy.sparse o ndarray
-        self.payloads: List[Dict[str, str]] = []
-
-    def save(self, vectorizer: TfidfVectorizer, matrix, payloads: List[Dict[str, str]]):
-        self.vectorizer = vectorizer
-        self.matrix = matrix
-        self.payloads = payloads
-
-        # Guardar vocabulario + idf + config
-        with open(self.vocab_path, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "vocabulary_": vectorizer.vocabulary_,
-                    "idf_": vectorizer.idf_.tolist(),
-                    "lowercase": vectorizer.lowercase,
-                    "ngram_range": vectorizer.ngram_range,
-                    "norm": vectorizer.norm,
-                },
-                f,
-                ensure_ascii=False,
-            )
-
-        # Guardar matriz
-        try:
-            from scipy import sparse  # opcional (si está instalado)
-
-            if sparse.issparse(matrix):
-                sparse.save_npz(self.matrix_path, matrix)
-            else:
-                np.savez_compressed(self.matrix_path, matrix=matrix)
-        except Exception:
-            arr = matrix.toarray() if hasattr(matrix, "toarray") else np.asarray(matrix)
-            np.savez_compressed(self.matrix_path, matrix=arr)
-
-        # Guardar payloads (filas originales)
-        with open(self.payload_path, "w", encoding="utf-8") as f:
-            json.dump(payloads, f, ensure_ascii=False)
-
-    def load(self) -> bool:
-        if not (os.path.exists(self.vocab_path) and os.path.exists(self.matrix_path) and os.path.exists(self.payload_path)):
-            return False
-
-        with open(self.vocab_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        vec = TfidfVectorizer(
-            lowercase=data.get("lowercase", True),
-            ngram_range=tuple(data.get("ngram_range", (1, 1))),
-            norm=data.get("norm", "l2"),
-        )
-        vec.vocabulary_ = {k: int(v) for k, v in data["vocabulary_"].items()}
-        vec.idf_ = np.array(data["idf_"])
-        vec._tfidf._idf_diag = None
-        self.vectorizer = vec
 
-        try:
-            from scipy import sparse
-            try:
-                self.matrix = sparse.load_npz(self.matrix_path)
-            except Exception:
-                arr = np.load(self.matrix_path)["matrix"]
-                self.matrix = sparse.csr_matrix(arr)
-        except Exception:
-            arr = np.load(self.matrix_path)["matrix"]
-            self.matrix = arr
-
-        with open(self.payload_path, "r", encoding="utf-8") as f:
-            self.payloads = json.load(f)
-
-        return True
-
-    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
-        if not self.vectorizer or self.matrix is None:
-            raise RuntimeError("Vector store no cargado")
-        q_vec = self.vectorizer.transform([query])
-        sims = cosine_similarity(q_vec, self.matrix).ravel()
-        top_idx = np.argsort(-sims)[: max(1, top_k)]
-        return [(int(i), float(sims[i])) for i in top_idx]
+class BatchSearchResult(BaseModel):
+    query: str
+    results: List[SearchResult]
 
 
 # --------------------------------------------------------------------------------------
@@ -219,9 +136,7 @@ def dataframe_to_texts(df: pd.DataFrame, text_columns: Optional[List[str]] = Non
 
     for _, row in df.iterrows():
         row_dict = {str(k): "" if pd.isna(v) else str(v) for k, v in row.to_dict().items()}
-        parts = [row_dict.get(col, "") for col in text_columns] if text_columns else [v for v in row_dict.values() if str(v).strip()]
-        text = " | ".join([p.strip() for p in parts if p and p.strip()])
-        texts.append(text if text else "(fila vacía)")
+        texts.append(payload_to_text(row_dict, text_columns))
         payloads.append(row_dict)
 
     return texts, payloads
@@ -246,16 +161,18 @@ async def import_excel_file(
 ) -> JSONResponse:
     filename = (file.filename or "").strip()
     if not filename or not filename.lower().endswith(ALLOWED_EXTS):
-        raise HTTPException(status_code=400, detail="Invalid file format. Use .xlsx o .xls")
+        raise HTTPException(status_code=400, detail="Invalid file format. Use .xlsx, .xls, .csv o .parquet")
 
     import_id = str(uuid.uuid4())
     _load_or_init_meta(import_id, filename)
     _set_status(import_id, ImportStatus.PROCESSING, "Leyendo Excel...")
 
     try:
+        from src.services.excel_service import ExcelService
+
         content = await file.read()
         try:
-            df = pd.read_excel(io.BytesIO(content))
+            df = ExcelService.read_tabular(content, filename)
         except Exception as e:
             _set_status(import_id, ImportStatus.FAILED, f"No se pudo leer el Excel: {e}")
             raise HTTPException(status_code=400, detail=f"No se pudo leer el Excel: {e}")
@@ -275,9 +192,10 @@ async def import_excel_file(
         vectorizer, matrix = fit_tfidf(texts)
 
         store = VectorStore(import_id)
-        store.save(vectorizer, matrix, payloads)
+        store.save(vectorizer, matrix, payloads, texts=texts, text_columns=cols_arg)
 
         _set_status(import_id, ImportStatus.COMPLETED, "Import finalizado", rows=len(payloads))
+        index_import_rows(import_id, payloads, text_columns=cols_arg)
         return JSONResponse(
             status_code=200,
             content={
@@ -329,7 +247,7 @@ async def upload_children_excel(
     """
     filename = (file.filename or "").strip()
     if not filename or not filename.lower().endswith(ALLOWED_EXTS):
-        raise HTTPException(status_code=400, detail="Formato de archivo inválido. Use .xlsx o .xls")
+        raise HTTPException(status_code=400, detail="Formato de archivo inválido. Use .xlsx, .xls, .csv o .parquet")
 
     # ⏱️ Iniciar contador de tiempo
     start_time = time_module.time()
@@ -348,7 +266,7 @@ async def upload_children_excel(
         print(f"⚙️ Iniciando procesamiento con ExcelService...")
         processing_start = time_module.time()
         
-        result = ExcelService.process_children_excel(content, db)
+        result = ExcelService.process_children_excel(content, db, filename=filename)
         
         processing_time = time_module.time() - processing_start
         print(f"✅ Procesamiento completado en {processing_time:.2f} segundos")
@@ -389,6 +307,7 @@ async def upload_children_excel(
                 "processed_count": result.get("processed_count", 0),
                 "error_count": result.get("error_count", 0),
                 "errors": result.get("errors", []),
+                "dedup": result.get("dedup", {"vinculados": [], "propuestas": []}),
                 "data": result.get("data", []),
                 "processing_time": round(total_time, 2)  # ⏱️ Agregar tiempo de procesamiento
             }
@@ -403,6 +322,103 @@ async def upload_children_excel(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error inesperado al procesar el archivo: {str(e)}")
 
+@router.post("/validate", summary="Validar Excel sin importar (dry-run)")
+async def validate_children_excel(
+    file: UploadFile = File(...),
+    nrows: Optional[int] = Query(
+        default=None,
+        ge=1,
+        description="Validar solo las primeras N filas. Si omites, valida el archivo completo.",
+    ),
+    preview: int = Query(10, ge=0, le=100, description="Filas a devolver como vista previa"),
+) -> JSONResponse:
+    """
+    Valida columnas, reglas por fila y claves duplicadas del archivo de importación.
+    No escribe en la base de datos ni calcula evaluaciones nutricionales.
+    """
+    filename = (file.filename or "").strip()
+    if not filename or not filename.lower().endswith(ALLOWED_EXTS):
+        raise HTTPException(status_code=400, detail="Formato de archivo inválido. Use .xlsx, .xls, .csv o .parquet")
+
+    start_time = time_module.time()
+    content = await file.read()
+
+    from src.services.excel_service import ExcelService
+
+    result = ExcelService.validate_children_excel(content, filename=filename, nrows=nrows, preview_rows=preview)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result.get("error", "Error al validar el archivo"))
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "filename": filename,
+            **result,
+            "processing_time": round(time_module.time() - start_time, 2),
+        },
+    )
+
+
+@router.post("/append/{import_id}", summary="Añadir filas a un import existente (sin re-ajustar TF-IDF)")
+async def append_to_import(
+    import_id: str,
+    file: UploadFile = File(...),
+    text_columns: Optional[str] = Query(
+        default=None,
+        description="CSV de columnas a usar como texto. Si omites, usa las del import original.",
+    ),
+) -> JSONResponse:
+    """
+    Vectoriza las filas nuevas con el vocabulario existente y las agrega al final del store.
+    Los términos que no existían entran a un vocabulario delta; la compactación en segundo
+    plano re-ajusta el IDF cuando el delta crece.
+    """
+    filename = (file.filename or "").strip()
+    if not filename or not filename.lower().endswith(ALLOWED_EXTS):
+        raise HTTPException(status_code=400, detail="Invalid file format. Use .xlsx, .xls, .csv o .parquet")
+
+    store = get_vector_store(import_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail="No existe vector store para ese import_id")
+
+    from src.services.excel_service import ExcelService
+
+    content = await file.read()
+    try:
+        df = ExcelService.read_tabular(content, filename)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"No se pudo leer el Excel: {e}")
+    if df.empty:
+        raise HTTPException(status_code=400, detail="El Excel no contiene filas")
+
+    cols = [c for c in df.columns if not str(c).startswith("Unnamed")]
+    df = df[cols] if cols else df
+
+    cols_arg = [c.strip() for c in text_columns.split(",")] if text_columns else None
+    if cols_arg is None and store.manifest:
+        cols_arg = store.manifest.get("text_columns")
+    texts, payloads = dataframe_to_texts(df, cols_arg)
+
+    try:
+        manifest = VectorStore(import_id).append(payloads, texts=texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error inesperado: {e}")
+
+    _load_or_init_meta(import_id, filename)
+    _set_status(import_id, ImportStatus.COMPLETED, f"{len(payloads)} filas añadidas", rows=manifest["n_rows"])
+    index_import_rows(import_id, payloads, start=manifest["n_rows"] - len(payloads), text_columns=cols_arg)
+    return JSONResponse(
+        status_code=200,
+        content={
+            "import_id": import_id,
+            "appended_rows": len(payloads),
+            "rows": manifest["n_rows"],
+            "delta_terms": len(manifest.get("delta_terms", [])),
+            "pending_compaction_rows": manifest.get("appended_rows", 0),
+        },
+    )
+
+
 @router.get("/status/{import_id}", summary="Consultar estado de import")
 async def get_import_status(import_id: str):
     meta = IMPORTS.get(import_id)
@@ -424,9 +440,72 @@ async def search_in_import(
     q: str = Query(..., description="Consulta de texto"),
     top_k: int = Query(5, ge=1, le=50),
 ) -> List[SearchResult]:
-    store = VectorStore(import_id)
-    if not store.load():
+    store = get_vector_store(import_id)
+    if store is None:
         raise HTTPException(status_code=404, detail="No existe vector store para ese import_id")
     results = store.search(q, top_k=top_k)
 
     return [SearchResult(row_index=i, score=s, payload=store.payloads[i]) for i, s in results]
+
+
+@router.post("/search/batch", summary="Buscar muchas consultas a la vez en un import_id")
+async def search_batch_in_import(body: BatchSearchRequest) -> List[BatchSearchResult]:
+    """
+    Todas las consultas se vectorizan juntas y se resuelven con un producto disperso
+    matriz-matriz; útil para cruzar miles de nombres (deduplicación).
+    """
+    store = get_vector_store(body.import_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail="No existe vector store para ese import_id")
+    batches = store.search_batch(body.queries, top_k=body.top_k)
+
+    return [
+        BatchSearchResult(
+            query=query,
+            results=[
+                SearchResult(row_index=i, score=s, payload=store.payloads[i] if body.include_payload else {})
+                for i, s in results
+            ],
+        )
+        for query, results in zip(body.queries, batches)
+    ]
+
+
+class GlobalSearchResult(BaseModel):
+    key: str
+    kind: str
+    title: str
+    score: float
+    sede_id: Optional[int] = None
+    fecha: Optional[str] = None
+    id: Optional[int] = None
+    import_id: Optional[str] = None
+    row_index: Optional[int] = None
+
+
+@router.get("/search/global", summary="Buscar en todos los imports, infantes y acudientes")
+async def search_global(
+    q: str = Query(..., min_length=2, description="Consulta de texto (tolera tildes y errores de tipeo)"),
+    top_k: int = Query(10, ge=1, le=100),
+    kind: Optional[List[Literal["infante", "acudiente", "import"]]] = Query(None, description="Tipos de registro"),
+    sede_id: Optional[int] = Query(None, ge=1),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de registro/seguimiento desde"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de registro/seguimiento hasta"),
+    db: Session = Depends(get_db),
+) -> List[GlobalSearchResult]:
+    """
+    Índice único sobre todas las filas importadas y las tablas de infantes y acudientes.
+    La primera consulta construye el índice si no existe en disco.
+    """
+    global_index.ensure_loaded(db)
+    results = global_index.search(
+        q, top_k=top_k, kinds=kind, sede_id=sede_id, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+    )
+    return [GlobalSearchResult(**r) for r in results]
+
+
+@router.post("/search/global/rebuild", summary="Reconstruir el índice de búsqueda global")
+async def rebuild_global_index(db: Session = Depends(get_db)) -> JSONResponse:
+    start = time.time()
+    rows = global_index.rebuild(db)
+    return JSONResponse(status_code=200, content={"rows": rows, "seconds": round(time.time() - start, 2)})
@@ -0,0 +1,145 @@
+# backend/src/api/pagination.py
+# Paginación por cursor (keyset) compartida por los routers
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+# Cabecera con el cursor de la página siguiente (ausente en la última página)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Total de filas del filtro (count=exact) o estimación del planificador (count=estimate)
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATE_HEADER = "X-Total-Count-Estimate"
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values: Sequence[Any], key: Optional[str] = None) -> str:
+    """
+    Valores de la clave de orden de la última fila -> cursor opaco (base64 url-safe).
+    key identifica el orden ("nombre:asc"): un cursor no sirve con otro orden.
+    """
+    payload: Any = [_to_json(v) for v in values]
+    if key is not None:
+        payload = {"k": key, "v": payload}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], parsers: Sequence[Callable[[Any], Any]],
+                  key: Optional[str] = None) -> Optional[List[Any]]:
+    """
+    Cursor -> valores, convertidos con un parser por columna (p. ej. [date.fromisoformat, int]).
+    None si no hay cursor; HTTP 400 si está mal formado o es de otro orden.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if key is not None:
+            if not isinstance(payload, dict) or payload.get("k") != key:
+                raise ValueError("cursor de otro orden")
+            payload = payload.get("v")
+        if not isinstance(payload, list) or len(payload) != len(parsers):
+            raise ValueError("longitud inesperada")
+        return [parse(v) if v is not None else None for parse, v in zip(parsers, payload)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any], descending: bool = True):
+    """
+    Condición "fila posterior al cursor" para ORDER BY columns (todas en la misma dirección):
+    (a, b) < (x, y) en orden descendente, (a, b) > (x, y) en ascendente.
+    """
+    left = tuple_(*columns)
+    right = tuple_(*values)
+    return left < right if descending else left > right
+
+
+def paginate(query, columns: Sequence[Any], cursor_values: Optional[Sequence[Any]], limit: int,
+             descending: bool = True, offset: int = 0):
+    """
+    Aplica orden, cursor y límite a un query de SQLAlchemy. Pide limit + 1 filas para saber
+    si hay página siguiente; devuelve (filas de la página, hay_mas).
+    """
+    if cursor_values is not None:
+        query = query.filter(keyset_after(columns, cursor_values, descending))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    query = query.order_by(*order)
+    if offset:
+        query = query.offset(offset)
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def set_next_cursor(response: Response, values: Optional[Sequence[Any]], key: Optional[str] = None) -> None:
+    """Publica el cursor de la siguiente página en la cabecera (sin cambiar el cuerpo de la respuesta)"""
+    if values is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values, key)
+
+
+def _parser(column) -> Callable[[Any], Any]:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat
+    if python_type is date:
+        return date.fromisoformat
+    return python_type
+
+
+def estimate_count(query) -> int:
+    """
+    Filas estimadas por el planificador de PostgreSQL (EXPLAIN, sin recorrer la tabla).
+    En otros motores se cuenta exacto.
+    """
+    counting = query.order_by(None)
+    bind = counting.session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return counting.count()
+    compiled = counting.statement.compile(dialect=bind.dialect)
+    plan = counting.session.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def paginate_list(query, response: Response, *, sort_columns: Dict[str, Any], pk, sort: str, order: str,
+                  cursor: Optional[str], limit: int, offset: int = 0, count: Optional[str] = None) -> List[Any]:
+    """
+    Página de un listado de entidades ordenado por sort_columns[sort] (y la PK como desempate),
+    con cursor opaco en X-Next-Cursor. offset sólo se respeta sin cursor (compatibilidad).
+    count="exact" | "estimate" agrega el total del filtro en las cabeceras.
+    """
+    if sort not in sort_columns:
+        raise HTTPException(status_code=400, detail=f"Orden no soportado: {sort}. Use uno de {sorted(sort_columns)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order debe ser 'asc' o 'desc'")
+
+    column = sort_columns[sort]
+    columns = [pk] if column is pk else [column, pk]
+    key = f"{sort}:{order}"
+
+    if count == "exact":
+        response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+    elif count == "estimate":
+        response.headers[TOTAL_ESTIMATE_HEADER] = str(estimate_count(query))
+
+    values = decode_cursor(cursor, [_parser(c) for c in columns], key=key)
+    rows, more = paginate(query, columns, values, limit, descending=(order == "desc"),
+                          offset=offset if values is None else 0)
+    if more:
+        last = rows[-1]
+        set_next_cursor(response, [getattr(last, c.key) for c in columns], key)
+    return rows
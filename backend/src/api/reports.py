@@ -3,111 +3,283 @@
 
 from __future__ import annotations
 
-import io
-import math
-from datetime import date, datetime
-from typing import Dict, Optional
+import os
+from datetime import date
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, HTTPException, Path
+from fastapi import APIRouter, HTTPException, Path, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 
-# Reutilizamos el almacenamiento del import
-from src.api.import_excel import VectorStore
+# Reutilizamos el almacenamiento del import (con caché de proceso)
+from src.services.vector_store import get_vector_store
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
 # ----------------- Utilidades -----------------
-def _to_str(v) -> str:
-    return "" if v is None or (isinstance(v, float) and math.isnan(v)) else str(v).strip()
+# Columnas esperadas en el import; las derivadas se guardan en un sidecar Parquet
+EXPECTED_COLUMNS = [
+    "document_type", "document_number", "first_name", "last_name",
+    "sex", "birth_date", "height_cm", "weight_kg", "notes"
+]
+# Nombres de la plantilla de infantes (/import/children) -> nombres esperados
+COLUMN_ALIASES = {
+    "infante_nombre": "first_name",
+    "infante_genero": "sex",
+    "infante_fecha_nacimiento": "birth_date",
+    "estatura": "height_cm",
+    "peso": "weight_kg",
+}
+MEASUREMENT_DATE_COLUMNS = ["measurement_date", "seguimiento_fecha"]
+SEX_CODES = {
+    "M": "male", "MASCULINO": "male", "MALE": "male", "H": "male", "HOMBRE": "male", "NIÑO": "male",
+    "F": "female", "FEMENINO": "female", "FEMALE": "female", "MUJER": "female", "NIÑA": "female",
+}
+# z-scores y clasificaciones OMS (NutritionService.assess_nutritional_status_batch)
+WHO_ZSCORE_COLUMNS = ["weight_for_age_zscore", "height_for_age_zscore", "bmi_for_age_zscore"]
+WHO_CLASS_COLUMNS = ["peso_edad", "talla_edad", "peso_talla", "imc_edad", "risk_level"]
+ENRICHED_FILE = "enriched.parquet"
+# Subir si cambian las columnas calculadas: invalida los sidecars existentes
+ENRICH_VERSION = "2"
+
+
+def _parse_float_column(col: pd.Series) -> pd.Series:
+    """Texto -> float por columna (admite coma decimal); lo no numérico queda NaN"""
+    text = col.astype("string").str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(text, errors="coerce").astype("float64")
+
+
+def _parse_date_column(col: pd.Series) -> pd.Series:
+    """Texto -> fecha por columna: ISO, dd/mm/aaaa, mm/dd/aaaa y por último inferencia de pandas"""
+    text = col.astype("string").str.strip()
+    parsed = pd.Series(pd.NaT, index=col.index, dtype="datetime64[ns]")
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "mixed"):
+        pending = parsed.isna() & text.notna() & (text != "")
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+    return parsed
+
+
+def _enrich(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas derivadas de todo el frame a la vez (sin apply por fila)"""
+    for alias, name in COLUMN_ALIASES.items():
+        if alias in df.columns and name not in df.columns:
+            df[name] = df[alias]
+    for c in EXPECTED_COLUMNS:
+        if c not in df.columns:
+            df[c] = np.nan
 
-def _parse_float(v) -> Optional[float]:
-    if v is None:
-        return None
-    try:
-        s = str(v).replace(",", ".").strip()
-        if s == "":
-            return None
-        return float(s)
-    except Exception:
-        return None
-
-def _parse_date(v) -> Optional[date]:
-    if v is None:
-        return None
-    if isinstance(v, date):
-        return v
-    s = str(v).strip()
-    if not s:
-        return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y"):
+    df["sex"] = df["sex"].astype("string").fillna("").str.strip().str.upper().astype(object)
+    df["sex_code"] = df["sex"].map(SEX_CODES).fillna("").astype(object)
+    df["birth_date_parsed"] = _parse_date_column(df["birth_date"])
+    measured = next((c for c in MEASUREMENT_DATE_COLUMNS if c in df.columns), None)
+    if measured is not None:
+        df["measurement_date_parsed"] = _parse_date_column(df[measured])
+    else:
+        df["measurement_date_parsed"] = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    df["height_cm_num"] = _parse_float_column(df["height_cm"])
+    df["weight_kg_num"] = _parse_float_column(df["weight_kg"])
+    return df
+
+
+def _assess(df: pd.DataFrame, today: pd.Timestamp) -> pd.DataFrame:
+    """
+    Edad a la fecha de medición (o a hoy si el import no la trae) y evaluación OMS de todo el frame.
+    """
+    from src.services.nutrition_service import NutritionService
+
+    reference = df["measurement_date_parsed"].fillna(today)
+    age_days = (reference - df["birth_date_parsed"]).dt.days.astype("float64")
+    df["age_days"] = age_days.where(age_days >= 0)
+    df["age_years"] = (df["age_days"] / 365.25).round(2)
+
+    assessed = NutritionService.assess_nutritional_status_batch(
+        df["age_days"].to_numpy(),
+        df["weight_kg_num"].to_numpy(),
+        df["height_cm_num"].to_numpy(),
+        df["sex_code"].to_numpy(),
+    )
+    for c in assessed.columns:
+        df[c] = assessed[c].to_numpy()
+    # El IMC se informa aunque no haya edad o sexo para el z-score
+    height_m = df["height_cm_num"] / 100.0
+    valid = (df["weight_kg_num"] > 0) & (height_m > 0)
+    df["bmi"] = (df["weight_kg_num"] / (height_m * height_m)).where(valid).round(2)
+    return df
+
+
+def _store_signature(store) -> str:
+    """Cambia cuando el store recibe filas nuevas o se re-ajusta"""
+    if store.manifest:
+        m = store.manifest
+        return f"{ENRICH_VERSION}:{m.get('generation', 0)}:{m['n_rows']}:{m.get('appended_rows', 0)}"
+    return f"{ENRICH_VERSION}:legacy:{len(store.payloads)}"
+
+
+def _write_sidecar(df: pd.DataFrame, path: str, signature: str, as_of: str) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"signature": signature.encode(),
+        b"as_of": as_of.encode(),
+    })
+    tmp = f"{path}.tmp"
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+
+
+def _ensure_enriched(import_id: str):
+    """
+    Garantiza que el sidecar Parquet del import esté al día y devuelve (ruta, frame o None).
+    El frame sólo se devuelve si hubo que calcularlo; si el sidecar ya servía, sólo se leen sus
+    metadatos. Como la edad de las filas sin fecha de medición depende de hoy, la evaluación OMS
+    se rehace (vectorizada) al cambiar el día.
+    """
+    import pyarrow.parquet as pq
+
+    store = get_vector_store(import_id)
+    if store is None:
+        raise HTTPException(status_code=404, detail="No existe vector store para ese import_id")
+
+    path = os.path.join(store.base, ENRICHED_FILE)
+    signature = _store_signature(store)
+    today = pd.Timestamp(date.today())
+    as_of = today.date().isoformat()
+
+    if os.path.exists(path):
         try:
-            return datetime.strptime(s, fmt).date()
+            metadata = pq.read_schema(path).metadata or {}
+            if metadata.get(b"signature", b"").decode() == signature:
+                if metadata.get(b"as_of", b"").decode() == as_of:
+                    return path, None
+                df = _assess(pq.read_table(path).to_pandas(), today)
+                _write_sidecar(df, path, signature, as_of)
+                return path, df
         except Exception:
-            continue
-    try:
-        return pd.to_datetime(v).date()
-    except Exception:
-        return None
-
-def _age_years(born: Optional[date]) -> Optional[float]:
-    if not born:
-        return None
-    today = date.today()
-    try:
-        years = (today - born).days / 365.25
-        return round(years, 2)
-    except Exception:
-        return None
-
-def _bmi(weight_kg: Optional[float], height_cm: Optional[float]) -> Optional[float]:
-    if not weight_kg or not height_cm:
-        return None
-    try:
-        h = height_cm / 100.0
-        if h <= 0:
-            return None
-        return round(weight_kg / (h * h), 2)
-    except Exception:
-        return None
-
-def _bmi_category(bmi: Optional[float]) -> str:
-    if bmi is None:
-        return "unknown"
-    if bmi < 18.5:
-        return "underweight"
-    if bmi < 25:
-        return "normal"
-    if bmi < 30:
-        return "overweight"
-    return "obesity"
+            pass
+
+    df = _assess(_enrich(store.payload_frame()), today)
+    _write_sidecar(df, path, signature, as_of)
+    return path, df
+
 
 def _load_dataframe(import_id: str) -> pd.DataFrame:
-    store = VectorStore(import_id)
-    if not store.load():
-        raise HTTPException(status_code=404, detail="No existe vector store para ese import_id")
-    df = pd.DataFrame(store.payloads).copy()
+    """
+    Frame enriquecido del import. Se calcula una vez y se persiste como Parquet junto al
+    vector store; las siguientes llamadas sólo leen el sidecar.
+    """
+    import pyarrow.parquet as pq
+
+    path, df = _ensure_enriched(import_id)
+    if df is None:
+        df = pq.read_table(path).to_pandas()
+    return df
 
-    expected = [
-        "document_type", "document_number", "first_name", "last_name",
-        "sex", "birth_date", "height_cm", "weight_kg", "notes"
+
+def _check_format(fmt: str) -> str:
+    from src.services.export_service import ExportService
+
+    fmt = (fmt or "").lower()
+    if fmt not in ExportService.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {fmt}. Use uno de {list(ExportService.FORMATS)}")
+    return fmt
+
+
+def _streaming_file(content, fmt: str, stem: str) -> StreamingResponse:
+    from src.services.export_service import ExportService
+
+    headers = {"Content-Disposition": f'attachment; filename="{stem}.{fmt}"'}
+    return StreamingResponse(content, media_type=ExportService.MEDIA_TYPES[fmt], headers=headers)
+
+
+# Columnas de la exportación de evaluaciones nutricionales
+EVALUATION_NUMERIC_COLUMNS = [
+    "peso", "estatura", "imc",
+    "peso_edad_zscore", "talla_edad_zscore", "imc_edad_zscore",
+    "perimetro_cefalico_zscore", "pliegue_triceps_zscore", "pliegue_subescapular_zscore",
+]
+EVALUATION_TEXT_COLUMNS = [
+    "clasificacion_peso_edad", "clasificacion_talla_edad", "clasificacion_peso_talla",
+    "clasificacion_imc_edad", "clasificacion_perimetro_cefalico", "clasificacion_pliegue_triceps",
+    "clasificacion_pliegue_subescapular", "nivel_riesgo",
+]
+
+
+def _evaluations_statement(sede_id: Optional[int], fecha_desde: Optional[date], fecha_hasta: Optional[date]):
+    from sqlalchemy import select
+    from src.db.models import DatoAntropometrico, EvaluacionNutricional, Infante, Seguimiento
+
+    E = EvaluacionNutricional
+    stmt = (
+        select(
+            E.id_evaluacion,
+            E.seguimiento_id,
+            Infante.id_infante.label("infante_id"),
+            Infante.nombre.label("infante_nombre"),
+            Infante.genero,
+            Infante.fecha_nacimiento,
+            Infante.sede_id,
+            Seguimiento.fecha,
+            E.fecha_evaluacion,
+            DatoAntropometrico.peso,
+            DatoAntropometrico.estatura,
+            E.imc,
+            E.peso_edad_zscore,
+            E.talla_edad_zscore,
+            E.imc_edad_zscore,
+            E.perimetro_cefalico_zscore,
+            E.pliegue_triceps_zscore,
+            E.pliegue_subescapular_zscore,
+            *[getattr(E, c) for c in EVALUATION_TEXT_COLUMNS],
+        )
+        .join(Seguimiento, E.seguimiento_id == Seguimiento.id_seguimiento)
+        .join(Infante, Seguimiento.infante_id == Infante.id_infante)
+        .outerjoin(DatoAntropometrico, DatoAntropometrico.seguimiento_id == Seguimiento.id_seguimiento)
+    )
+    if sede_id is not None:
+        stmt = stmt.where(Infante.sede_id == sede_id)
+    if fecha_desde is not None:
+        stmt = stmt.where(Seguimiento.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        stmt = stmt.where(Seguimiento.fecha <= fecha_hasta)
+    return stmt.order_by(Seguimiento.fecha, E.id_evaluacion)
+
+
+def _evaluations_schema():
+    import pyarrow as pa
+
+    fields = [
+        ("id_evaluacion", pa.int64()), ("seguimiento_id", pa.int64()), ("infante_id", pa.int64()),
+        ("infante_nombre", pa.string()), ("genero", pa.string()), ("fecha_nacimiento", pa.date32()),
+        ("sede_id", pa.int64()), ("fecha", pa.date32()), ("fecha_evaluacion", pa.timestamp("us")),
     ]
-    for c in expected:
-        if c not in df.columns:
-            df[c] = np.nan
+    fields += [(c, pa.float64()) for c in EVALUATION_NUMERIC_COLUMNS]
+    fields += [(c, pa.string()) for c in EVALUATION_TEXT_COLUMNS]
+    return pa.schema(fields)
 
-    df["sex"] = df["sex"].apply(lambda x: _to_str(x).upper())
-    df["birth_date_parsed"] = df["birth_date"].apply(_parse_date)
-    df["age_years"] = df["birth_date_parsed"].apply(_age_years)
 
-    df["height_cm_num"] = df["height_cm"].apply(_parse_float)
-    df["weight_kg_num"] = df["weight_kg"].apply(_parse_float)
-    df["bmi"] = df.apply(lambda r: _bmi(r["weight_kg_num"], r["height_cm_num"]), axis=1)
-    df["bmi_category"] = df["bmi"].apply(_bmi_category)
+def _evaluation_chunks(statement):
+    """Bloques de evaluaciones leídos con cursor del lado del servidor (sesión propia del stream)"""
+    from src.db.session import SessionLocal
+    from src.services.export_service import ExportService
 
-    return df
+    db = SessionLocal()
+    try:
+        for chunk in ExportService.iter_query(db, statement):
+            for c in EVALUATION_NUMERIC_COLUMNS:
+                chunk[c] = pd.to_numeric(chunk[c], errors="coerce").astype("float64")
+            for c in ("id_evaluacion", "seguimiento_id", "infante_id", "sede_id"):
+                chunk[c] = chunk[c].astype("Int64")
+            chunk["fecha_evaluacion"] = pd.to_datetime(chunk["fecha_evaluacion"], utc=True).dt.tz_localize(None)
+            yield chunk
+    finally:
+        db.close()
 
 
 # ----------------- Endpoints -----------------
@@ -116,14 +288,15 @@ async def reports_index():
     return {
         "endpoints": [
             "GET /api/reports/import/{import_id}/summary",
-            "GET /api/reports/import/{import_id}/export",
+            "GET /api/reports/import/{import_id}/export?format=xlsx|csv|parquet",
+            "GET /api/reports/evaluaciones/export?sede_id=&fecha_desde=&fecha_hasta=&format=",
         ]
     }
 
 
 @router.get(
     "/import/{import_id}/summary",
-    summary="Resumen del dataset importado (conteos, promedios, BMI)"
+    summary="Resumen del dataset importado (conteos, promedios, BMI y z-scores OMS)"
 )
 async def import_summary(
     import_id: str = Path(..., description="ID devuelto por /import/excel")
@@ -138,14 +311,21 @@ async def import_summary(
     weight_mean = float(np.nanmean(df["weight_kg_num"])) if df["weight_kg_num"].notna().any() else None
     bmi_mean = float(np.nanmean(df["bmi"])) if df["bmi"].notna().any() else None
 
-    bmi_categories = df["bmi_category"].value_counts(dropna=False).to_dict()
+    zscore_means = {
+        c: (float(np.nanmean(df[c])) if df[c].notna().any() else None) for c in WHO_ZSCORE_COLUMNS
+    }
+    # Conteos por clasificación OMS; "" = sin z-score (falta edad, sexo o medida)
+    classifications = {
+        c: df[c].replace("", "sin dato").value_counts().to_dict() for c in WHO_CLASS_COLUMNS
+    }
+    assessed = df["bmi_for_age_zscore"].notna() | df["weight_for_age_zscore"].notna()
+    classifications["risk_level"] = df.loc[assessed, "risk_level"].value_counts().to_dict()
 
     preview_cols = [
         "document_type", "document_number", "first_name", "last_name",
-        "sex", "birth_date", "height_cm", "weight_kg", "bmi", "bmi_category"
+        "sex", "birth_date", "height_cm", "weight_kg", "bmi", *WHO_ZSCORE_COLUMNS, "imc_edad"
     ]
-    preview_cols = [c for c in preview_cols if c in df.columns or c in ["bmi", "bmi_category"]]
-    preview = df[preview_cols].head(10).fillna("").to_dict(orient="records")
+    preview = df[preview_cols].head(10).astype(object).fillna("").to_dict(orient="records")
 
     return JSONResponse(
         content={
@@ -157,8 +337,11 @@ async def import_summary(
                 "height_cm": height_mean,
                 "weight_kg": weight_mean,
                 "bmi": bmi_mean,
+                **zscore_means,
             },
-            "bmi_categories": bmi_categories,
+            "assessed_rows": int(assessed.sum()),
+            "bmi_categories": classifications["imc_edad"],
+            "who_classifications": classifications,
             "preview_first_10": preview,
         }
     )
@@ -166,33 +349,46 @@ async def import_summary(
 
 @router.get(
     "/import/{import_id}/export",
-    summary="Exportar Excel con cálculos (edad, BMI)"
+    summary="Exportar con cálculos (edad, BMI, z-scores y clasificación OMS) en xlsx, csv o parquet"
 )
 async def export_enriched_excel(
-    import_id: str = Path(..., description="ID devuelto por /import/excel")
+    import_id: str = Path(..., description="ID devuelto por /import/excel"),
+    format: str = Query("xlsx", description="xlsx | csv | parquet"),
 ):
-    df = _load_dataframe(import_id)
+    from src.services.export_service import ExportService
+
+    fmt = _check_format(format)
+    path, _ = _ensure_enriched(import_id)
 
     out_cols = [
         "document_type", "document_number", "first_name", "last_name",
         "sex", "birth_date", "height_cm", "weight_kg",
-        "age_years", "bmi", "bmi_category", "notes"
+        "age_years", "bmi", *WHO_ZSCORE_COLUMNS, *WHO_CLASS_COLUMNS, "notes"
     ]
-    for c in out_cols:
-        if c not in df.columns:
-            df[c] = ""
+    # Se lee el sidecar por lotes: nunca se arma el frame completo para exportar
+    chunks = ExportService.iter_parquet(path, out_cols)
+    return _streaming_file(ExportService.stream(chunks, fmt, out_cols), fmt, f"reporte_{import_id}")
 
-    export_df = df[out_cols].copy()
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        export_df.to_excel(writer, index=False, sheet_name="reporte")
-    output.seek(0)
+@router.get(
+    "/evaluaciones/export",
+    summary="Exportar evaluaciones nutricionales por sede y rango de fechas (xlsx, csv o parquet)"
+)
+def export_evaluaciones(
+    sede_id: Optional[int] = Query(None, description="Sede de los infantes"),
+    fecha_desde: Optional[date] = Query(None, description="Fecha de seguimiento inicial (incluida)"),
+    fecha_hasta: Optional[date] = Query(None, description="Fecha de seguimiento final (incluida)"),
+    format: str = Query("xlsx", description="xlsx | csv | parquet"),
+):
+    from src.services.export_service import ExportService
+
+    fmt = _check_format(format)
+    if fecha_desde and fecha_hasta and fecha_desde > fecha_hasta:
+        raise HTTPException(status_code=400, detail="fecha_desde no puede ser posterior a fecha_hasta")
 
-    filename = f"reporte_{import_id}.xlsx"
-    headers = {"Content-Disposition": f'attachment; filename=\"{filename}\"'}
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers=headers,
+    schema = _evaluations_schema()
+    chunks = _evaluation_chunks(_evaluations_statement(sede_id, fecha_desde, fecha_hasta))
+    stem = f"evaluaciones_sede_{sede_id}" if sede_id is not None else "evaluaciones"
+    return _streaming_file(
+        ExportService.stream(chunks, fmt, schema.names, sheet_name="evaluaciones", schema=schema), fmt, stem
     )
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends, status
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 
@@ -23,15 +23,34 @@ class SedeOut(BaseModel):
 # ====== Endpoints ======
 @router.get("/", response_model=List[SedeOut])
 def list_sedes(
+    response: Response,
     limit: int = Query(50, ge=1, le=500, description="Número máximo de registros"),
-    offset: int = Query(0, ge=0, description="Número de registros a saltar"),
+    offset: int = Query(0, ge=0, description="Registros a saltar (obsoleto: usar cursor)"),
+    cursor: Optional[str] = Query(None, description="Cursor X-Next-Cursor de la página anterior"),
+    municipio: Optional[str] = Query(None, description="Filtrar por municipio"),
+    departamento: Optional[str] = Query(None, description="Filtrar por departamento"),
+    sort: str = Query("id", description="Orden: id o nombre"),
+    order: str = Query("asc", description="asc o desc"),
+    count: Optional[str] = Query(None, description="exact o estimate"),
     db: Session = Depends(get_db)
 ):
     """
-    Lista todas las sedes con paginación
+    Lista las sedes con filtros y paginación por cursor
     """
-    sedes = db.query(Sede).offset(offset).limit(limit).all()
-    return sedes
+    from src.api.pagination import paginate_list
+
+    query = db.query(Sede)
+    if municipio:
+        query = query.filter(Sede.municipio.ilike(municipio.strip()))
+    if departamento:
+        query = query.filter(Sede.departamento.ilike(departamento.strip()))
+
+    return paginate_list(
+        query, response,
+        sort_columns={"id": Sede.id_sede, "nombre": Sede.nombre},
+        pk=Sede.id_sede, sort=sort, order=order,
+        cursor=cursor, limit=limit, offset=offset, count=count,
+    )
 
 
 @router.get("/{sede_id}", response_model=SedeOut)
@@ -0,0 +1,122 @@
+# backend/src/db/migrations.py
+"""
+Cambios de esquema idempotentes para bases creadas antes de que existieran en los modelos
+(create_all no altera tablas existentes), y relleno inicial de tablas derivadas. Se ejecutan al
+arrancar (main.py y src/main.py) y en create_tables.py.
+"""
+import logging
+
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from src.db.models import Acudiente, EvaluacionNutricional, Infante, normalizar_nombre
+
+logger = logging.getLogger(__name__)
+
+# Tablas con columna de búsqueda por nombre (modelo, índice trigram)
+TABLAS_BUSQUEDA = (
+    (Infante, "idx_infantes_nombre_trgm"),
+    (Acudiente, "idx_acudientes_nombre_trgm"),
+)
+# Columnas nulables agregadas a tablas existentes (modelo, columna)
+COLUMNAS_NUEVAS = (
+    (EvaluacionNutricional, "peso_esperado"),
+    (EvaluacionNutricional, "requerimientos_energeticos_esperados"),
+)
+# Índices de columnas que pasaron a index=True (tabla, columna, nombre en schema.sql)
+INDICES_NUEVOS = (
+    ("infantes", "sede_id", "idx_infantes_sede"),
+    ("infantes", "fecha_nacimiento", "idx_infantes_fecha_nacimiento"),
+)
+# Filas por UPDATE al rellenar nombre_busqueda
+CHUNK = 1000
+
+
+def _agregar_columna(conn, model, nombre: str) -> None:
+    tabla = model.__table__
+    columnas = {c["name"] for c in inspect(conn).get_columns(tabla.name)}
+    if nombre not in columnas:
+        tipo = tabla.c[nombre].type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {tabla.name} ADD COLUMN {nombre} {tipo}"))
+        logger.info(f"Columna {tabla.name}.{nombre} agregada")
+
+
+def _agregar_indice(conn, tabla: str, columna: str, nombre: str) -> None:
+    """Crea el índice si ninguno cubre ya la columna (create_all lo llama ix_*, schema.sql idx_*)"""
+    if any(i["column_names"] == [columna] for i in inspect(conn).get_indexes(tabla)):
+        return
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columna})"))
+    logger.info(f"Índice {nombre} creado")
+
+
+def _rellenar_nombre_busqueda(conn, model) -> int:
+    """Normaliza en Python los nombres sin nombre_busqueda (filas previas o insertadas por SQL)"""
+    tabla = model.__table__
+    pk = tabla.primary_key.columns.values()[0]
+    pendientes = conn.execute(
+        select(pk, tabla.c.nombre).where(tabla.c.nombre_busqueda.is_(None))
+    ).all()
+    stmt = (
+        update(tabla)
+        .where(pk == bindparam("b_id"))
+        .values(nombre_busqueda=bindparam("b_nombre"))
+    )
+    for i in range(0, len(pendientes), CHUNK):
+        conn.execute(stmt, [
+            {"b_id": fila[0], "b_nombre": normalizar_nombre(fila[1])}
+            for fila in pendientes[i:i + CHUNK]
+        ])
+    return len(pendientes)
+
+
+def _indices_trigram(engine) -> bool:
+    """Extensión pg_trgm + índices GIN sobre nombre_busqueda. False si no se pudo (sin permisos)."""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for model, indice in TABLAS_BUSQUEDA:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {indice} ON {model.__tablename__} "
+                    "USING gin (nombre_busqueda gin_trgm_ops)"
+                ))
+        return True
+    except Exception as e:
+        logger.warning(f"pg_trgm no disponible, la búsqueda por nombre usará el modo sin índice: {e}")
+        return False
+
+
+def aplicar(engine) -> None:
+    with engine.begin() as conn:
+        for model, nombre in COLUMNAS_NUEVAS:
+            _agregar_columna(conn, model, nombre)
+        for tabla, columna, nombre in INDICES_NUEVOS:
+            _agregar_indice(conn, tabla, columna, nombre)
+        for model, _ in TABLAS_BUSQUEDA:
+            _agregar_columna(conn, model, "nombre_busqueda")
+            filas = _rellenar_nombre_busqueda(conn, model)
+            if filas:
+                logger.info(f"{model.__tablename__}.nombre_busqueda rellenado: {filas} filas")
+    if engine.dialect.name == "postgresql":
+        _indices_trigram(engine)
+
+
+def rellenar_derivadas(engine) -> None:
+    """
+    Tablas derivadas que se llenan en bloque la primera vez (base con datos anteriores a ellas).
+    Cada una se intenta por separado: un fallo se registra y no detiene el arranque.
+    """
+    from sqlalchemy.orm import Session
+    from src.services.projection_service import ProjectionService
+    from src.services.rollup_service import RollupService
+
+    pasos = (
+        ("ultima_evaluacion_infante", ProjectionService.backfill_si_vacia),
+        ("resumen_mensual_sede", RollupService.reconstruir_si_vacia),
+    )
+    for tabla, rellenar in pasos:
+        try:
+            with Session(bind=engine) as db:
+                filas = rellenar(db)
+            if filas is not None:
+                logger.info(f"{tabla} reconstruida: {filas} filas")
+        except Exception as e:
+            logger.error(f"Error reconstruyendo {tabla}: {e}")
@@ -4,15 +4,25 @@ Modelos SQLAlchemy adaptados al esquema SQL (schema.sql)
 Sistema de Evaluación Nutricional Infantil
 """
 
+import re
+import unicodedata
+
 from sqlalchemy import (
     Column, Integer, String, Date, DateTime, Text,
-    DECIMAL, ForeignKey, Boolean, JSON
+    DECIMAL, Float, ForeignKey, Boolean, JSON, UniqueConstraint
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from .base import Base
 
 
+def normalizar_nombre(value) -> str:
+    """Nombre para búsqueda: sin tildes, minúsculas, espacios colapsados ("Ana María  Pérez" -> "ana maria perez")"""
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9 ]+", " ", text).split())
+
+
 # ===============================
 # Tabla: roles
 # ===============================
@@ -71,11 +81,18 @@ class Acudiente(Base):
     telefono = Column(String(20))
     correo = Column(String(100))
     direccion = Column(Text)
+    # nombre normalizado (índice GIN pg_trgm en PostgreSQL); se mantiene al asignar nombre
+    nombre_busqueda = Column(String(150))
     fecha_creado = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizado = Column(DateTime(timezone=True), server_default=func.now())
 
     infantes = relationship("Infante", back_populates="acudiente")
 
+    @validates("nombre")
+    def _sync_nombre_busqueda(self, key, value):
+        self.nombre_busqueda = normalizar_nombre(value)
+        return value
+
 
 # ===============================
 # Tabla: infantes
@@ -85,10 +102,12 @@ class Infante(Base):
 
     id_infante = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
-    fecha_nacimiento = Column(Date, nullable=False)
+    fecha_nacimiento = Column(Date, nullable=False, index=True)
     genero = Column(String(10), nullable=False)
     acudiente_id = Column(Integer, ForeignKey("acudientes.id_acudiente"))
-    sede_id = Column(Integer, ForeignKey("sedes.id_sede"))
+    sede_id = Column(Integer, ForeignKey("sedes.id_sede"), index=True)
+    # nombre normalizado (índice GIN pg_trgm en PostgreSQL); se mantiene al asignar nombre
+    nombre_busqueda = Column(String(100))
     fecha_creado = Column(DateTime(timezone=True), server_default=func.now())
     fecha_actualizado = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -96,6 +115,11 @@ class Infante(Base):
     sede = relationship("Sede", back_populates="infantes")
     seguimientos = relationship("Seguimiento", back_populates="infante")
 
+    @validates("nombre")
+    def _sync_nombre_busqueda(self, key, value):
+        self.nombre_busqueda = normalizar_nombre(value)
+        return value
+
 
 # ===============================
 # Tabla: seguimientos
@@ -263,6 +287,10 @@ class EvaluacionNutricional(Base):
     # Requerimientos energéticos y nutricionales (JSON)
     requerimientos_energeticos = Column(JSON)  # {total_energy_kcal, per_kg_kcal, etc}
     requerimientos_nutrientes = Column(JSON)   # Lista de nutrientes con valores recomendados
+    # Peso esperado (mediana OMS para edad y sexo) y requerimiento energético con ese peso;
+    # se calculan al guardar (NULL en evaluaciones previas hasta su primera consulta)
+    peso_esperado = Column(DECIMAL(5, 2))
+    requerimientos_energeticos_esperados = Column(JSON)
     
     # Recomendaciones (JSON)
     recomendaciones_nutricionales = Column(JSON)  # Lista de recomendaciones
@@ -274,6 +302,76 @@ class EvaluacionNutricional(Base):
     
     seguimiento = relationship("Seguimiento", backref="evaluacion_nutricional")
 
+
+# ==================================================
+# Tabla: ultima_evaluacion_infante (proyección)
+# ==================================================
+class UltimaEvaluacionInfante(Base):
+    """
+    Último seguimiento (mayor id_seguimiento) de cada infante con su evaluación.
+    Se actualiza en la misma transacción que crea el seguimiento (ProjectionService);
+    los campos de evaluación quedan en NULL si ese seguimiento no tiene evaluación.
+    """
+    __tablename__ = "ultima_evaluacion_infante"
+
+    infante_id = Column(Integer, ForeignKey("infantes.id_infante", ondelete="CASCADE"), primary_key=True)
+    seguimiento_id = Column(Integer, ForeignKey("seguimientos.id_seguimiento"), nullable=False)
+    evaluacion_id = Column(Integer, ForeignKey("evaluaciones_nutricionales.id_evaluacion"))
+    fecha = Column(Date)
+
+    imc = Column(DECIMAL(5, 2))
+    peso_edad_zscore = Column(DECIMAL(5, 2))
+    talla_edad_zscore = Column(DECIMAL(5, 2))
+    imc_edad_zscore = Column(DECIMAL(5, 2))
+
+    clasificacion_peso_edad = Column(String(50))
+    clasificacion_talla_edad = Column(String(50))
+    clasificacion_peso_talla = Column(String(50))
+    clasificacion_imc_edad = Column(String(50))
+
+    nivel_riesgo = Column(String(20), index=True)
+    fecha_actualizado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# ==================================================
+# Tabla: resumen_mensual_sede (rollup de prevalencias)
+# ==================================================
+class ResumenMensualSede(Base):
+    """
+    Evaluaciones agregadas por (sede, mes del seguimiento, grupo de edad, sexo): conteos por
+    indicador y sumas / sumas de cuadrados de z-score para medias y desviaciones.
+    Se incrementa al insertar evaluaciones (RollupService) y se puede reconstruir en bloque.
+    sede_id = 0 agrupa a los infantes sin sede.
+    """
+    __tablename__ = "resumen_mensual_sede"
+    __table_args__ = (
+        UniqueConstraint("sede_id", "mes", "grupo_edad", "genero", name="uq_resumen_mensual_sede"),
+    )
+
+    id_resumen = Column(Integer, primary_key=True)
+    sede_id = Column(Integer, nullable=False, index=True)
+    mes = Column(Date, nullable=False, index=True)  # primer día del mes
+    grupo_edad = Column(String(10), nullable=False)
+    genero = Column(String(10), nullable=False)
+
+    evaluaciones = Column(Integer, nullable=False, default=0)
+    retraso_talla = Column(Integer, nullable=False, default=0)          # talla/edad z < -2
+    retraso_talla_severo = Column(Integer, nullable=False, default=0)   # talla/edad z < -3
+    emaciacion = Column(Integer, nullable=False, default=0)             # IMC/edad z < -2
+    emaciacion_severa = Column(Integer, nullable=False, default=0)      # IMC/edad z < -3
+    bajo_peso = Column(Integer, nullable=False, default=0)              # peso/edad z < -2
+    sobrepeso = Column(Integer, nullable=False, default=0)              # IMC/edad z > 2
+    obesidad = Column(Integer, nullable=False, default=0)               # IMC/edad z > 3
+
+    n_peso_edad = Column(Integer, nullable=False, default=0)
+    suma_z_peso_edad = Column(Float, nullable=False, default=0)
+    suma_z2_peso_edad = Column(Float, nullable=False, default=0)
+    n_talla_edad = Column(Integer, nullable=False, default=0)
+    suma_z_talla_edad = Column(Float, nullable=False, default=0)
+    suma_z2_talla_edad = Column(Float, nullable=False, default=0)
+    n_imc_edad = Column(Integer, nullable=False, default=0)
+    suma_z_imc_edad = Column(Float, nullable=False, default=0)
+    suma_z2_imc_edad = Column(Float, nullable=False, default=0)
+
 # ===============================
 # Tabla: actividad_reciente
 # ===============================
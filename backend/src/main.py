@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import importlib
@@ -63,9 +64,31 @@ def ensure_anemia_models():
 # Ejecutar descarga de modelos antes de crear la app
 ensure_anemia_models()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mismo arranque que main.py: el contenedor sólo ejecuta uvicorn src.main:app
+    try:
+        from src.db.base import Base
+        from src.db.session import engine
+        from src.db import migrations
+        importlib.import_module("src.db.models")
+        Base.metadata.create_all(bind=engine)
+        migrations.aplicar(engine)
+        migrations.rellenar_derivadas(engine)
+    except Exception as e:
+        logger.error(f"Error preparando la base de datos: {e}")
+    yield
+    # Escribir la actividad que quede en cola antes de salir
+    try:
+        from src.services.activity_service import writer as activity_writer
+        activity_writer.close()
+    except Exception as e:
+        logger.error(f"Error vaciando la cola de actividad: {e}")
+
 app = FastAPI(
     title="Nutritional Assessment API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -74,6 +97,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     allow_credentials=True,
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimate"],  # paginación
 )
 
 @app.get("/")
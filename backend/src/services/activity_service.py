@@ -1,5 +1,111 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy.orm import Session
-from src.db.models import ActividadReciente
+from src.db.models import ActividadReciente, Usuario
+
+logger = logging.getLogger(__name__)
+
+# "async": cola en memoria + escritor en segundo plano; "sync": insert y commit en la petición (pruebas)
+ACTIVITY_WRITER_MODE = os.getenv("ACTIVITY_WRITER_MODE", "async").lower()
+# Actividades pendientes como máximo; con la cola llena se escribe en la misma petición
+ACTIVITY_QUEUE_SIZE = int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000"))
+ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "200"))
+# Espera máxima antes de escribir un lote incompleto (segundos)
+ACTIVITY_FLUSH_INTERVAL_S = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_S", "0.5"))
+
+
+class ActivityWriter:
+    """
+    Escritor en segundo plano de actividad_reciente.
+
+    registrar_* encola la actividad y vuelve de inmediato: la petición no hace un commit extra
+    por cada actividad. Un hilo junta lo encolado y lo inserta por lotes (ACTIVITY_BATCH_SIZE o
+    cada ACTIVITY_FLUSH_INTERVAL_S) en su propia sesión, y luego publica los eventos SSE.
+    flush() espera a que lo encolado hasta ese momento esté escrito; close() lo hace al apagar.
+    """
+
+    def __init__(self, sincrono: bool = False):
+        self.sincrono = sincrono
+        self._queue: "queue.Queue" = queue.Queue(maxsize=ACTIVITY_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Una sola vez: close() no hace nada si el hilo no llegó a arrancar
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> "ActivityWriter":
+        return cls(sincrono=ACTIVITY_WRITER_MODE == "sync")
+
+    def put(self, actividad: ActividadReciente) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(actividad)
+        except queue.Full:
+            logger.warning("Cola de actividad llena; se escribe en la petición")
+            ActivityWriter._escribir([actividad])
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Espera a que se escriba todo lo encolado antes de la llamada. False si vence el timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        listo = threading.Event()
+        self._queue.put(listo)
+        return listo.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if not self.flush(timeout):
+            logger.warning(f"Actividad pendiente sin escribir al apagar: ~{self._queue.qsize()} registros")
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            lote: List[ActividadReciente] = []
+            marcas: List[threading.Event] = []
+            item = self._queue.get()
+            while True:
+                if isinstance(item, threading.Event):
+                    marcas.append(item)
+                    break  # flush(): escribir ya lo acumulado
+                lote.append(item)
+                if len(lote) >= ACTIVITY_BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=ACTIVITY_FLUSH_INTERVAL_S)
+                except queue.Empty:
+                    break
+            if lote:
+                ActivityWriter._escribir(lote)
+            for marca in marcas:
+                marca.set()
+
+    @staticmethod
+    def _escribir(lote: List[ActividadReciente]) -> None:
+        """Un INSERT por lote en sesión propia; después, caché del dashboard y eventos SSE"""
+        from src.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            db.add_all(lote)
+            db.commit()
+            ActivityService._publicar_lote(db, lote)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error escribiendo {len(lote)} actividades: {e}")
+        finally:
+            db.close()
+
 
 class ActivityService:
     
@@ -15,8 +121,7 @@ class ActivityService:
             nivel_importancia="normal",
             icono="user-plus"
         )
-        db.add(actividad)
-        db.commit()
+        ActivityService._registrar(db, actividad)
     
     @staticmethod
     def registrar_seguimiento(db: Session, nombre_nino: str, usuario_id: int, infante_id: int, seguimiento_id: int):
@@ -31,8 +136,7 @@ class ActivityService:
             nivel_importancia="normal",
             icono="file-text"
         )
-        db.add(actividad)
-        db.commit()
+        ActivityService._registrar(db, actividad)
     
     @staticmethod
     def registrar_alerta(db: Session, nombre_nino: str, nivel_riesgo: str, infante_id: int, seguimiento_id: int):
@@ -48,8 +152,7 @@ class ActivityService:
             nivel_importancia=nivel_importancia,
             icono="alert-triangle"
         )
-        db.add(actividad)
-        db.commit()
+        ActivityService._registrar(db, actividad)
     
     @staticmethod
     def registrar_importacion(db: Session, sede_nombre: str, cantidad: int, usuario_id: int):
@@ -62,8 +165,7 @@ class ActivityService:
             nivel_importancia="normal",
             icono="upload"
         )
-        db.add(actividad)
-        db.commit()
+        ActivityService._registrar(db, actividad)
     
     @staticmethod
     def obtener_recientes(db: Session, limit: int = 4):
@@ -71,4 +173,118 @@ class ActivityService:
         return db.query(ActividadReciente)\
             .order_by(ActividadReciente.fecha_creacion.desc())\
             .limit(limit)\
-            .all()
\ No newline at end of file
+            .all()
+
+    # ---------- Formato para el panel de notificaciones / actividad reciente ----------
+    @staticmethod
+    def tiempo_relativo(fecha: datetime) -> str:
+        ahora = datetime.now(fecha.tzinfo) if fecha.tzinfo else datetime.now()
+        diferencia = ahora - fecha
+
+        if diferencia.days > 0:
+            return f"Hace {diferencia.days} día{'s' if diferencia.days > 1 else ''}"
+        if diferencia.seconds >= 3600:
+            horas = diferencia.seconds // 3600
+            return f"Hace {horas} hora{'s' if horas > 1 else ''}"
+        minutos = max(1, diferencia.seconds // 60)  # Mínimo 1 minuto
+        return f"Hace {minutos} minuto{'s' if minutos > 1 else ''}"
+
+    @staticmethod
+    def a_notificacion(actividad: ActividadReciente, usuario_nombre: Optional[str]) -> Dict[str, Any]:
+        """Formato de /children/alerts"""
+        # Determinar tipo y mensaje según el tipo de actividad
+        if actividad.tipo_actividad == "alerta":
+            tipo = "alert" if actividad.nivel_importancia == "alta" else "warning"
+            titulo = "Alerta Nutricional" if actividad.nivel_importancia == "alta" else "Advertencia Nutricional"
+            mensaje = f"{actividad.descripcion} {actividad.entidad_relacionada}"
+            mostrar_usuario = None
+        elif actividad.tipo_actividad == "seguimiento":
+            tipo = "info"
+            titulo = "Seguimiento Completado"
+            mensaje = f"{actividad.descripcion} {actividad.entidad_relacionada}"
+            mostrar_usuario = usuario_nombre or "Usuario"
+        elif actividad.tipo_actividad == "importacion":
+            tipo = "success"
+            titulo = "Importación de Datos"
+            mensaje = f"{actividad.descripcion}"
+            mostrar_usuario = usuario_nombre or "Usuario"
+        else:
+            tipo = "info"
+            titulo = actividad.descripcion
+            mensaje = actividad.entidad_relacionada or ""
+            mostrar_usuario = usuario_nombre
+
+        return {
+            "id": actividad.id_actividad,
+            "type": tipo,
+            "title": titulo,
+            "message": mensaje,
+            "time": ActivityService.tiempo_relativo(actividad.fecha_creacion),
+            "read": False,
+            "childName": actividad.entidad_relacionada,  # en importaciones, el nombre de la sede
+            "infanteId": actividad.infante_id,
+            "seguimientoId": actividad.seguimiento_id,
+            "userName": mostrar_usuario,
+            "tipoActividad": actividad.tipo_actividad
+        }
+
+    @staticmethod
+    def a_reciente(actividad: ActividadReciente, usuario_nombre: Optional[str]) -> Dict[str, Any]:
+        """Formato de /children/recent-activity"""
+        return {
+            "id": actividad.id_actividad,
+            "text": actividad.descripcion,
+            "subject": actividad.entidad_relacionada,
+            "time": ActivityService.tiempo_relativo(actividad.fecha_creacion),
+            "icon": actividad.icono,
+            "tipo": actividad.tipo_actividad,
+            "nivel": actividad.nivel_importancia,
+            "usuario": usuario_nombre or "Usuario"
+        }
+
+    @staticmethod
+    def a_evento(actividad: ActividadReciente, usuario_nombre: Optional[str]) -> Dict[str, Any]:
+        """Evento del stream SSE: ambos formatos, para el panel y para la lista de actividad"""
+        return {
+            "id": actividad.id_actividad,
+            "tipoActividad": actividad.tipo_actividad,
+            "fecha": actividad.fecha_creacion.isoformat() if actividad.fecha_creacion else None,
+            "notificacion": ActivityService.a_notificacion(actividad, usuario_nombre),
+            "actividad": ActivityService.a_reciente(actividad, usuario_nombre),
+        }
+
+    @staticmethod
+    def _registrar(db: Session, actividad: ActividadReciente) -> None:
+        """Encola la actividad (modo async) o la guarda en la sesión de la petición (modo sync)"""
+        if writer.sincrono:
+            db.add(actividad)
+            db.commit()
+            ActivityService._publicar_lote(db, [actividad])
+            return
+        # La hora del evento, no la del lote que la escribe
+        actividad.fecha_creacion = datetime.now(timezone.utc)
+        writer.put(actividad)
+
+    @staticmethod
+    def _publicar_lote(db: Session, actividades: List[ActividadReciente]) -> None:
+        """Envía actividades ya guardadas a las conexiones SSE; un fallo aquí no afecta el registro"""
+        if any(a.tipo_actividad == "alerta" for a in actividades):
+            from src.services.cache_service import invalidate_dashboard
+
+            # Antes del evento: el cliente responde pidiendo /alerts/count, que está en caché
+            invalidate_dashboard()
+        try:
+            from src.services.broadcast_service import broadcaster
+
+            ids = {a.usuario_id for a in actividades if a.usuario_id is not None}
+            nombres = dict(
+                db.query(Usuario.id_usuario, Usuario.nombre).filter(Usuario.id_usuario.in_(ids)).all()
+            ) if ids else {}
+            broadcaster.publish_many(
+                [ActivityService.a_evento(a, nombres.get(a.usuario_id)) for a in actividades], db
+            )
+        except Exception as e:
+            logger.warning(f"No se pudieron publicar {len(actividades)} actividades: {e}")
+
+
+writer = ActivityWriter.from_env()
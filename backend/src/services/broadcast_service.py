@@ -0,0 +1,172 @@
+# backend/src/services/broadcast_service.py
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "memory" (un proceso) o "postgres" (LISTEN/NOTIFY entre workers)
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory").lower()
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "actividad_reciente")
+# Eventos recientes guardados para reenviar a clientes que se reconectan (Last-Event-ID)
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "200"))
+# Eventos pendientes por conexión; un cliente más lento pierde los más antiguos
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+# Comentario "ping" en conexiones SSE sin eventos (por debajo del proxy_read_timeout de nginx)
+SSE_HEARTBEAT_S = float(os.getenv("SSE_HEARTBEAT_S", "15"))
+
+
+class Subscription:
+    """Cola de una conexión SSE, alimentada desde cualquier hilo a través de su event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, tipos: Optional[set] = None):
+        self.loop = loop
+        self.tipos = tipos
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        if self.tipos and event.get("tipoActividad") not in self.tipos:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._offer, event)
+        except RuntimeError:  # loop cerrado: la conexión ya terminó
+            pass
+
+
+class ActivityBroadcaster:
+    """
+    Reparte cada evento de actividad a todas las conexiones abiertas del proceso.
+
+    Los endpoints SSE no consultan la base: reciben lo que ActivityService publica al registrar
+    la actividad. Con varios workers (EVENTS_BACKEND=postgres) la publicación es un pg_notify y
+    cada worker tiene un hilo con LISTEN que reparte a sus propias conexiones, así un evento
+    registrado en un worker llega a los clientes de todos.
+    """
+
+    def __init__(self, backend: str = "memory", engine=None):
+        self.backend = backend
+        self.engine = engine
+        self._subs: List[Subscription] = []
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=EVENTS_BUFFER_SIZE)
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "ActivityBroadcaster":
+        if EVENTS_BACKEND == "postgres":
+            try:
+                from src.db.session import engine
+
+                if engine.dialect.name == "postgresql":
+                    logger.info("Eventos de actividad vía LISTEN/NOTIFY (%s)", EVENTS_CHANNEL)
+                    return cls("postgres", engine)
+                logger.warning("EVENTS_BACKEND=postgres requiere PostgreSQL; se usa memoria del proceso")
+            except Exception as e:
+                logger.warning("No se pudo configurar LISTEN/NOTIFY (%s); se usa memoria del proceso", e)
+        return cls()
+
+    # ---------- Publicación ----------
+    def publish(self, event: Dict[str, Any], db=None) -> None:
+        """Publica un evento ya confirmado en la base (llamar después del commit)"""
+        self.publish_many([event], db)
+
+    def publish_many(self, events: List[Dict[str, Any]], db=None) -> None:
+        if self.backend == "postgres" and db is not None:
+            from sqlalchemy import text
+
+            for event in events:
+                db.execute(text("SELECT pg_notify(:canal, :payload)"),
+                           {"canal": EVENTS_CHANNEL, "payload": json.dumps(event, default=str)})
+            db.commit()  # las notificaciones se entregan al confirmar
+            return
+        for event in events:
+            self._fan_out(event)
+
+    def _fan_out(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._recent.append(event)
+            subs = list(self._subs)
+        for sub in subs:
+            sub.deliver(event)
+
+    # ---------- Suscripción ----------
+    def subscribe(self, tipos: Optional[set] = None,
+                  last_event_id: Optional[int] = None) -> Tuple[Subscription, List[Dict[str, Any]], bool]:
+        """
+        Registra una conexión. Devuelve (suscripción, eventos a reenviar, completo): completo es
+        False si last_event_id ya salió del búfer y el cliente debe recargar la lista.
+        """
+        if self.backend == "postgres":
+            self._ensure_listener()
+        sub = Subscription(asyncio.get_running_loop(), tipos)
+        with self._lock:
+            self._subs.append(sub)
+            recientes = list(self._recent)
+        if last_event_id is None:
+            return sub, [], True
+        pendientes = [e for e in recientes if e["id"] > last_event_id
+                      and (not tipos or e.get("tipoActividad") in tipos)]
+        completo = bool(recientes) and recientes[0]["id"] <= last_event_id + 1
+        return sub, pendientes, completo
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    @property
+    def connections(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    # ---------- LISTEN (un hilo por worker, sólo si hay conexiones) ----------
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen_forever, name="activity-listen", daemon=True)
+            self._listener.start()
+
+    def _listen_forever(self) -> None:
+        import select
+
+        while True:
+            conn = None
+            try:
+                conn = self.engine.raw_connection()
+                dbapi = conn.driver_connection
+                dbapi.autocommit = True
+                with dbapi.cursor() as cur:
+                    cur.execute(f'LISTEN "{EVENTS_CHANNEL}"')
+                while True:
+                    if select.select([dbapi], [], [], 30) == ([], [], []):
+                        continue
+                    dbapi.poll()
+                    while dbapi.notifies:
+                        notify = dbapi.notifies.pop(0)
+                        try:
+                            self._fan_out(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Evento de actividad inválido: %r", notify.payload[:200])
+            except Exception as e:
+                logger.error("LISTEN %s interrumpido (%s); reintentando", EVENTS_CHANNEL, e)
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+broadcaster = ActivityBroadcaster.from_env()
@@ -0,0 +1,179 @@
+# backend/src/services/cache_service.py
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "memory" (por proceso) o "redis" (compartido entre workers)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# TTL por defecto de las estadísticas del dashboard (segundos)
+DASHBOARD_CACHE_TTL_S = float(os.getenv("DASHBOARD_CACHE_TTL_S", "30"))
+CACHE_PREFIX = "nutricion:cache"
+
+
+class _MemoryBackend:
+    """Diccionario con expiración, protegido por lock (un proceso)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] < time.monotonic():
+                del self._data[key]
+                return None
+            return item[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            if len(self._data) >= self._max_entries:
+                now = time.monotonic()
+                self._data = {k: v for k, v in self._data.items() if v[0] >= now}
+                if len(self._data) >= self._max_entries:
+                    self._data.clear()
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data.get(key, (0, 0))[1]) + 1
+            self._data[key] = (float("inf"), value)
+            return value
+
+    def generation(self, key: str) -> int:
+        with self._lock:
+            return int(self._data.get(key, (0, 0))[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class _RedisBackend:
+    """Mismo contrato sobre Redis; los valores se guardan como JSON"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(key, json.dumps(value, default=str), px=max(1, int(ttl * 1000)))
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+    def generation(self, key: str) -> int:
+        raw = self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{CACHE_PREFIX}:*"):
+            self.client.delete(key)
+
+
+class CacheService:
+    """
+    Caché con TTL e invalidación explícita por espacio de nombres.
+
+    Cada espacio ("dashboard", ...) tiene un contador de generación que forma parte de la clave;
+    invalidate() lo incrementa y todas las entradas anteriores dejan de leerse (y expiran solas).
+    Con Redis el contador es compartido, así que invalidar en un worker vale para todos.
+    Si el backend falla se calcula el valor sin caché: nunca rompe el endpoint.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or _MemoryBackend()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "CacheService":
+        if CACHE_BACKEND == "redis":
+            try:
+                import redis
+
+                client = redis.Redis.from_url(CACHE_REDIS_URL)
+                client.ping()
+                logger.info("Caché de estadísticas en Redis")
+                return cls(_RedisBackend(client))
+            except Exception as e:
+                logger.warning("Redis no disponible para la caché (%s); se usa memoria del proceso", e)
+        return cls()
+
+    def use_redis(self, client) -> None:
+        """Cambia a Redis con un cliente ya creado (p. ej. fakeredis en pruebas)"""
+        self.backend = _RedisBackend(client)
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{CACHE_PREFIX}:{namespace}:gen"
+
+    def get_or_set(self, namespace: str, name: str, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        ttl = DASHBOARD_CACHE_TTL_S if ttl is None else ttl
+        try:
+            generation = self.backend.generation(self._generation_key(namespace))
+            key = f"{CACHE_PREFIX}:{namespace}:{generation}:{name}"
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Error leyendo caché %s: %s", namespace, e)
+            return loader()
+
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = loader()
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning("Error escribiendo caché %s: %s", namespace, e)
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            try:
+                self.backend.incr(self._generation_key(namespace))
+            except Exception as e:
+                logger.warning("Error invalidando caché %s: %s", namespace, e)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+cache = CacheService.from_env()
+
+# Espacio de las estadísticas del dashboard (conteos, distribución de riesgo, alertas)
+DASHBOARD = "dashboard"
+
+
+def cached(namespace: str, ttl: Optional[float] = None):
+    """
+    Decorador para endpoints: la clave es el nombre de la función más sus parámetros
+    (excepto la sesión 'db'). Conserva la firma para que FastAPI resuelva las dependencias.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            params = {k: v for k, v in kwargs.items() if k != "db"}
+            name = f"{fn.__module__}.{fn.__qualname__}:{json.dumps(params, sort_keys=True, default=str)}"
+            return cache.get_or_set(namespace, name, lambda: fn(*args, **kwargs), ttl)
+        return wrapper
+    return decorator
+
+
+def invalidate_dashboard() -> None:
+    """Hook para escrituras que cambian las estadísticas (seguimientos, infantes, importaciones)"""
+    cache.invalidate(DASHBOARD)
@@ -0,0 +1,254 @@
+# backend/src/services/dedup_service.py
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from src.db.models import normalizar_nombre
+
+
+class DedupService:
+    """
+    Emparejamiento difuso de acudientes e infantes para una carga completa.
+
+    1. Normalización: sin tildes, minúsculas, espacios colapsados ("Ana María  Pérez" -> "ana maria perez").
+    2. Bloqueo: MinHash/LSH sobre los n-gramas de caracteres (más mismo teléfono / fecha de
+       nacimiento); todo vectorizado, sin comparar todos contra todos.
+    3. Puntaje: coseno TF-IDF de n-gramas de caracteres, calculado sólo para los pares candidatos.
+    """
+
+    # Desde este puntaje (con teléfono/acudiente coincidente) se reutiliza el registro existente
+    AUTO_LINK_THRESHOLD = 0.9
+    # Desde este puntaje se informa como posible duplicado para revisión manual
+    PROPOSE_THRESHOLD = 0.75
+    # LSH: BANDS bandas de ROWS_PER_BAND hashes
+    # (Jaccard 0.8 -> ~95% de probabilidad de ser candidato; Jaccard 0.5 -> ~15%)
+    BANDS = 10
+    ROWS_PER_BAND = 6
+    # Cubetas más grandes se ignoran (nombres idénticos muy frecuentes; el teléfono los cubre)
+    MAX_BUCKET = 200
+    # Pares puntuados por bloque
+    SCORE_CHUNK = 200_000
+    # Candidatos evaluados por nombre
+    CANDIDATES_PER_NAME = 5
+
+    @staticmethod
+    def normalize_name(value: Any) -> str:
+        return normalizar_nombre(value)
+
+    @staticmethod
+    def normalize_phone(value: Any) -> str:
+        digits = re.sub(r"\D", "", str(value or ""))
+        return digits[-10:]
+
+    @staticmethod
+    def _minhash(mat: sparse.csr_matrix, seed: int = 13) -> np.ndarray:
+        """Firmas MinHash (filas x BANDS*ROWS_PER_BAND) del conjunto de n-gramas de cada fila"""
+        n_hashes = DedupService.BANDS * DedupService.ROWS_PER_BAND
+        rng = np.random.default_rng(seed)
+        # (a*x + b) mod p con p primo de Mersenne 2^31-1: a*x cabe en uint64
+        prime = np.uint64((1 << 31) - 1)
+        a = rng.integers(1, (1 << 31) - 1, size=n_hashes, dtype=np.uint64)
+        b = rng.integers(0, (1 << 31) - 1, size=n_hashes, dtype=np.uint64)
+        cols = mat.indices
+        vocab = np.arange(mat.shape[1], dtype=np.uint64)
+        starts = mat.indptr[:-1]
+        nonempty = np.diff(mat.indptr) > 0
+        signatures = np.full((mat.shape[0], n_hashes), np.iinfo(np.uint64).max, dtype=np.uint64)
+        if not len(cols):
+            return signatures
+        for k in range(n_hashes):
+            hashed = ((a[k] * vocab + b[k]) % prime)[cols]
+            signatures[nonempty, k] = np.minimum.reduceat(hashed, starts[nonempty])
+        return signatures
+
+    @staticmethod
+    def _band_keys(signatures: np.ndarray) -> np.ndarray:
+        """Una clave int64 por banda (filas x BANDS), combinando sus ROWS_PER_BAND hashes"""
+        r = DedupService.ROWS_PER_BAND
+        keys = np.zeros((signatures.shape[0], DedupService.BANDS), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for band in range(DedupService.BANDS):
+                for k in range(band * r, (band + 1) * r):
+                    keys[:, band] = keys[:, band] * np.uint64(1_000_003) ^ signatures[:, k]
+        return keys.view(np.int64)
+
+    @staticmethod
+    def _lsh_pairs(q_sig: np.ndarray, p_sig: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Pares (query, pool) que coinciden en alguna banda; se ignoran cubetas gigantes"""
+        q_keys, p_keys = DedupService._band_keys(q_sig), DedupService._band_keys(p_sig)
+        qi_parts, pj_parts = [], []
+        for band in range(DedupService.BANDS):
+            order = np.argsort(p_keys[:, band], kind="stable")
+            sorted_keys = p_keys[order, band]
+            lo = np.searchsorted(sorted_keys, q_keys[:, band], side="left")
+            hi = np.searchsorted(sorted_keys, q_keys[:, band], side="right")
+            counts = hi - lo
+            counts[counts > DedupService.MAX_BUCKET] = 0
+            total = int(counts.sum())
+            if not total:
+                continue
+            qi = np.repeat(np.arange(len(counts)), counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            qi_parts.append(qi)
+            pj_parts.append(order[np.repeat(lo, counts) + offsets])
+        if not qi_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(qi_parts).astype(np.int64), np.concatenate(pj_parts).astype(np.int64)
+
+    @staticmethod
+    def match_names(
+        queries: Sequence[str],
+        pool: Sequence[str],
+        query_blocks: Optional[Sequence[Any]] = None,
+        pool_blocks: Optional[Sequence[Any]] = None,
+        extra_pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Mejores candidatos del pool para cada nombre de queries.
+        Si se dan bloques, sólo se comparan nombres del mismo bloque.
+        extra_pairs: pares (query, pool) que se evalúan siempre (p. ej. mismo teléfono).
+        Devuelve (índice query, índice pool, puntaje) ordenado por query y puntaje descendente.
+        """
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        if not len(queries) or not len(pool):
+            return empty
+
+        vectorizer = TfidfVectorizer(
+            analyzer="char_wb", ngram_range=(2, 3), preprocessor=DedupService.normalize_name, dtype=np.float32,
+        )
+        matrix = vectorizer.fit_transform(list(pool) + list(queries)).tocsr()
+        p_mat, q_mat = matrix[:len(pool)], matrix[len(pool):]
+
+        # Candidatos por LSH: nombres con n-gramas muy parecidos (Jaccard alto) comparten alguna banda
+        qi, pj = DedupService._lsh_pairs(DedupService._minhash(q_mat), DedupService._minhash(p_mat))
+        if extra_pairs is not None and len(extra_pairs[0]):
+            qi = np.concatenate([qi, extra_pairs[0]])
+            pj = np.concatenate([pj, extra_pairs[1]])
+        if query_blocks is not None and pool_blocks is not None and len(qi):
+            same = np.asarray(query_blocks, dtype=object)[qi] == np.asarray(pool_blocks, dtype=object)[pj]
+            qi, pj = qi[same], pj[same]
+        if not len(qi):
+            return empty
+        pairs = np.sort(qi * len(pool) + pj)
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+        qi, pj = pairs // len(pool), pairs % len(pool)
+
+        # Coseno exacto sólo de los pares candidatos (filas ya normalizadas L2)
+        scores = np.empty(len(qi), dtype=np.float32)
+        for start in range(0, len(qi), DedupService.SCORE_CHUNK):
+            end = start + DedupService.SCORE_CHUNK
+            scores[start:end] = np.asarray(q_mat[qi[start:end]].multiply(p_mat[pj[start:end]]).sum(axis=1)).ravel()
+
+        order = np.lexsort((-scores, qi))
+        qi, pj, scores = qi[order], pj[order], scores[order]
+        first = np.searchsorted(qi, qi)
+        top = (np.arange(len(qi)) - first) < DedupService.CANDIDATES_PER_NAME
+        return qi[top], pj[top], scores[top]
+
+    @staticmethod
+    def match_acudientes(db_session, keys: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        keys: (nombre, teléfono) de la carga sin coincidencia exacta.
+        Devuelve {"links": {key: id_acudiente}, "vinculados": [...], "propuestas": [...]}.
+        Se vincula automáticamente si el nombre es casi igual y el teléfono coincide.
+        """
+        from src.db.models import Acudiente
+
+        result: Dict[str, Any] = {"links": {}, "vinculados": [], "propuestas": []}
+        keys = list(keys)
+        if not keys:
+            return result
+
+        existing = db_session.query(Acudiente.id_acudiente, Acudiente.nombre, Acudiente.telefono).all()
+        if not existing:
+            return result
+        pool_ids = np.array([e[0] for e in existing], dtype=np.int64)
+        pool_names = [e[1] for e in existing]
+        pool_phones = np.array([DedupService.normalize_phone(e[2]) for e in existing], dtype=object)
+        query_phones = np.array([DedupService.normalize_phone(k[1]) for k in keys], dtype=object)
+
+        # Mismo teléfono: siempre se evalúa, aunque el nombre tenga errores de tipeo
+        phone_pos: Dict[str, List[int]] = {}
+        for j, phone in enumerate(pool_phones):
+            if phone:
+                phone_pos.setdefault(phone, []).append(j)
+        extra = [(i, j) for i, phone in enumerate(query_phones) for j in phone_pos.get(phone, [])]
+        extra_pairs = (
+            np.array([p[0] for p in extra], dtype=np.int64),
+            np.array([p[1] for p in extra], dtype=np.int64),
+        )
+
+        qi, pj, scores = DedupService.match_names([k[0] for k in keys], pool_names, extra_pairs=extra_pairs)
+        same_phone = query_phones[qi] == pool_phones[pj]
+
+        for i, j, score, phone_ok in zip(qi.tolist(), pj.tolist(), scores.tolist(), same_phone.tolist()):
+            key = keys[i]
+            item = {
+                "tipo": "acudiente",
+                "importado": key[0],
+                "telefono": key[1],
+                "existente_id": int(pool_ids[j]),
+                "existente": pool_names[j],
+                "mismo_telefono": bool(phone_ok),
+                "score": round(float(score), 3),
+            }
+            if phone_ok and score >= DedupService.AUTO_LINK_THRESHOLD and key not in result["links"]:
+                result["links"][key] = int(pool_ids[j])
+                result["vinculados"].append(item)
+            elif score >= DedupService.PROPOSE_THRESHOLD and key not in result["links"]:
+                result["propuestas"].append(item)
+        return result
+
+    @staticmethod
+    def match_infantes(db_session, keys: Sequence[Tuple[str, date, int]], chunk: int = 500) -> Dict[str, Any]:
+        """
+        keys: (nombre, fecha de nacimiento, id_acudiente) sin coincidencia exacta.
+        Bloqueo por fecha de nacimiento. Vínculo automático sólo con el mismo acudiente;
+        un nombre casi igual con otro acudiente se informa como propuesta.
+        """
+        from src.db.models import Infante
+
+        result: Dict[str, Any] = {"links": {}, "vinculados": [], "propuestas": []}
+        keys = list(keys)
+        if not keys:
+            return result
+
+        fechas = sorted({k[1] for k in keys})
+        existing = []
+        for start in range(0, len(fechas), chunk):
+            existing.extend(
+                db_session.query(Infante.id_infante, Infante.nombre, Infante.fecha_nacimiento, Infante.acudiente_id)
+                .filter(Infante.fecha_nacimiento.in_(fechas[start:start + chunk]))
+                .all()
+            )
+        if not existing:
+            return result
+
+        qi, pj, scores = DedupService.match_names(
+            [k[0] for k in keys],
+            [e[1] for e in existing],
+            query_blocks=[k[1] for k in keys],
+            pool_blocks=[e[2] for e in existing],
+        )
+        for i, j, score in zip(qi.tolist(), pj.tolist(), scores.tolist()):
+            key, match = keys[i], existing[j]
+            same_guardian = match[3] == key[2]
+            item = {
+                "tipo": "infante",
+                "importado": key[0],
+                "fecha_nacimiento": key[1].isoformat(),
+                "existente_id": match[0],
+                "existente": match[1],
+                "mismo_acudiente": same_guardian,
+                "score": round(float(score), 3),
+            }
+            if same_guardian and score >= DedupService.AUTO_LINK_THRESHOLD and key not in result["links"]:
+                result["links"][key] = match[0]
+                result["vinculados"].append(item)
+            elif score >= DedupService.PROPOSE_THRESHOLD and key not in result["links"]:
+                result["propuestas"].append(item)
+        return result
@@ -1,7 +1,8 @@
 # backend/src/services/excel_service.py
+import csv
 import pandas as pd
 import re
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Set
 from io import BytesIO
 from datetime import datetime, date
 from openpyxl.worksheet.datavalidation import DataValidation
@@ -11,6 +12,51 @@ class ExcelService:
     
     # Cache a nivel de clase para tablas WHO/RIEN
     _nutrition_cache = None
+
+    # Mapeos de español a inglés para procesamiento
+    GENERO_MAP = {
+        'Masculino': 'male',
+        'Femenino': 'female',
+        'M': 'male',
+        'F': 'female'
+    }
+
+    ACTIVIDAD_MAP = {
+        'Ligera': 'light',
+        'Moderada': 'moderate',
+        'Intensa': 'vigorous',
+        'Sedentaria': 'light'
+    }
+
+    ALIMENTACION_MAP = {
+        'Lactancia materna': 'breast',
+        'Fórmula': 'formula',
+        'Mixta': 'mixed'
+    }
+
+    # Columnas requeridas mínimas
+    REQUIRED_COLUMNS = [
+        'acudiente_documento', 'acudiente_nombre', 'acudiente_telefono',
+        'infante_nombre', 'infante_fecha_nacimiento', 'infante_genero', 'sede_id',
+        'seguimiento_fecha', 'peso', 'estatura'
+    ]
+
+    # Edad máxima admitida por NutritionService.assess_nutritional_status
+    MAX_AGE_YEARS = 11
+
+    # Formatos de importación admitidos
+    SUPPORTED_EXTS = (".xlsx", ".xls", ".csv", ".parquet")
+
+    # Columnas que se leen como texto en CSV (documentos y teléfonos)
+    TEXT_COLUMNS = [
+        'infante_documento', 'acudiente_documento', 'acudiente_telefono'
+    ]
+
+    # Filas por bloque al leer CSV / lotes de Parquet
+    CSV_CHUNK_ROWS = 50_000
+
+    # Condiciones por consulta al buscar acudientes/infantes existentes
+    LOOKUP_CHUNK = 300
     
     @staticmethod
     def _ensure_nutrition_cache():
@@ -32,41 +78,21 @@ class ExcelService:
         return ExcelService._nutrition_cache
     
     @staticmethod
-    def process_children_excel(file_content: bytes, db_session) -> Dict[str, Any]:
-        """Process Excel file with children data - FASE 2 OPTIMIZED with BATCH PROCESSING"""
+    def process_children_excel(file_content: bytes, db_session, filename: str = "") -> Dict[str, Any]:
+        """Process Excel/CSV/Parquet file with children data - FASE 2 OPTIMIZED with BATCH PROCESSING"""
         try:
             # ⚡ FASE 1: Cargar cache nutricional al inicio
             ExcelService._ensure_nutrition_cache()
             
-            df = pd.read_excel(BytesIO(file_content))
+            df = ExcelService.read_tabular(file_content, filename)
             
             # Mapeos de español a inglés para procesamiento
-            genero_map = {
-                'Masculino': 'male',
-                'Femenino': 'female',
-                'M': 'male',
-                'F': 'female'
-            }
-            
-            actividad_map = {
-                'Ligera': 'light',
-                'Moderada': 'moderate',
-                'Intensa': 'vigorous',
-                'Sedentaria': 'light'
-            }
-            
-            alimentacion_map = {
-                'Lactancia materna': 'breast',
-                'Fórmula': 'formula',
-                'Mixta': 'mixed'
-            }
+            genero_map = ExcelService.GENERO_MAP
+            actividad_map = ExcelService.ACTIVIDAD_MAP
+            alimentacion_map = ExcelService.ALIMENTACION_MAP
             
             # Columnas requeridas mínimas
-            required_columns = [
-                'acudiente_documento', 'acudiente_nombre', 'acudiente_telefono',
-                'infante_nombre', 'infante_fecha_nacimiento', 'infante_genero', 'sede_id',
-                'seguimiento_fecha', 'peso', 'estatura'
-            ]
+            required_columns = ExcelService.REQUIRED_COLUMNS
             
             # Validar columnas requeridas
             missing_columns = [col for col in required_columns if col not in df.columns]
@@ -78,6 +104,11 @@ class ExcelService:
             
             from src.db.models import Acudiente, Infante, Seguimiento, DatoAntropometrico, Examen, EvaluacionNutricional
             from src.services.nutrition_service import NutritionService
+            from src.services.search_index import acudiente_doc, index_documents, infante_doc
+            from src.services.dedup_service import DedupService
+            from src.services.projection_service import ProjectionService
+            from src.services.rollup_service import RollupService
+            from src.services.cache_service import invalidate_dashboard
             
             total_rows = len(df)
             print(f"📊 Procesando {total_rows} filas con BATCH PROCESSING...")
@@ -172,9 +203,12 @@ class ExcelService:
                     for nombre, telefono in acudientes_keys
                 ]
                 
-                existing_acudientes = db_session.query(Acudiente).filter(
-                    or_(*acudiente_conditions)
-                ).all()
+                # Por bloques: un OR con miles de condiciones excede el límite de SQLite
+                existing_acudientes = []
+                for start in range(0, len(acudiente_conditions), ExcelService.LOOKUP_CHUNK):
+                    existing_acudientes.extend(db_session.query(Acudiente).filter(
+                        or_(*acudiente_conditions[start:start + ExcelService.LOOKUP_CHUNK])
+                    ).all())
                 
                 acudientes_map = {
                     (a.nombre, a.telefono): a 
@@ -182,17 +216,30 @@ class ExcelService:
                 }
                 print(f"✅ Encontrados {len(acudientes_map)} acudientes existentes")
             
+            # Deduplicación difusa: "Ana Maria Perez" encuentra a "Ana María Pérez" con el mismo teléfono
+            faltantes = [k for k in acudientes_keys if k not in acudientes_map]
+            dedup_acudientes = DedupService.match_acudientes(db_session, faltantes)
+            ExcelService._load_links(db_session, Acudiente, Acudiente.id_acudiente, dedup_acudientes["links"], acudientes_map)
+            if dedup_acudientes["links"]:
+                print(f"🔗 {len(dedup_acudientes['links'])} acudientes vinculados por similitud")
+            
             # ⚡ FASE 2 - PASO 3: Crear acudientes faltantes en BATCH
+            # Dentro del mismo archivo, variantes de tildes/mayúsculas crean un solo acudiente
             nuevos_acudientes = []
+            nuevos_por_normalizado: Dict[Tuple[str, str], Acudiente] = {}
             for acudiente_key in acudientes_keys:
                 if acudiente_key not in acudientes_map:
-                    nuevo = Acudiente(
-                        nombre=acudiente_key[0],
-                        telefono=acudiente_key[1],
-                        correo=None,  # Se actualizará después si es necesario
-                        direccion=None
-                    )
-                    nuevos_acudientes.append(nuevo)
+                    normalizado = (DedupService.normalize_name(acudiente_key[0]), DedupService.normalize_phone(acudiente_key[1]))
+                    nuevo = nuevos_por_normalizado.get(normalizado)
+                    if nuevo is None:
+                        nuevo = Acudiente(
+                            nombre=acudiente_key[0],
+                            telefono=acudiente_key[1],
+                            correo=None,  # Se actualizará después si es necesario
+                            direccion=None
+                        )
+                        nuevos_acudientes.append(nuevo)
+                        nuevos_por_normalizado[normalizado] = nuevo
                     acudientes_map[acudiente_key] = nuevo
             
             if nuevos_acudientes:
@@ -204,6 +251,9 @@ class ExcelService:
             # ⚡ FASE 2 - PASO 4: Batch query para TODOS los infantes
             print(f"🔍 Buscando infantes únicos en DB...")
             infantes_map: Dict[Tuple[str, date, int], Infante] = {}
+            nuevos_infantes: List[Infante] = []
+            
+            dedup_infantes: Dict[str, Any] = {"vinculados": [], "propuestas": []}
             
             # Agrupar infantes por acudiente para query más eficiente
             if infantes_keys:
@@ -221,9 +271,11 @@ class ExcelService:
                         )
                 
                 if infante_conditions:
-                    existing_infantes = db_session.query(Infante).filter(
-                        or_(*infante_conditions)
-                    ).all()
+                    existing_infantes = []
+                    for start in range(0, len(infante_conditions), ExcelService.LOOKUP_CHUNK):
+                        existing_infantes.extend(db_session.query(Infante).filter(
+                            or_(*infante_conditions[start:start + ExcelService.LOOKUP_CHUNK])
+                        ).all())
                     
                     for i in existing_infantes:
                         # Recuperar acudiente para crear key
@@ -233,11 +285,26 @@ class ExcelService:
                             infantes_map[key] = i
                     
                     print(f"✅ Encontrados {len(infantes_map)} infantes existentes")
+                
+                # Deduplicación difusa de infantes (bloqueo por fecha de nacimiento)
+                # Un acudiente recién creado todavía no tiene infantes en la base
+                nuevos_ids = {id(a) for a in nuevos_acudientes}
+                faltantes = list({
+                    (nombre, fecha_nac, acudientes_map[acudiente_key].id_acudiente)
+                    for nombre, fecha_nac, acudiente_key in infantes_keys
+                    if id(acudientes_map[acudiente_key]) not in nuevos_ids
+                } - set(infantes_map))
+                dedup_infantes = DedupService.match_infantes(db_session, faltantes)
+                ExcelService._load_links(db_session, Infante, Infante.id_infante, dedup_infantes["links"], infantes_map)
+                if dedup_infantes["links"]:
+                    print(f"🔗 {len(dedup_infantes['links'])} infantes vinculados por similitud")
             
             # Ahora procesamos cada fila con los datos pre-cargados
             print(f"⚙️ Procesando {len(validated_rows)} filas...")
             
             processed_data = []
+            proyeccion = []  # (seguimiento, evaluación) para ultima_evaluacion_infante
+            resumen_mensual = []  # (seguimiento, evaluación, infante) para resumen_mensual_sede
             success_count = 0
             
             for validated_row in validated_rows:
@@ -303,9 +370,10 @@ class ExcelService:
                         })
                         continue
                     
-                    # Buscar o crear infante
+                    # Buscar o crear infante (variantes de tildes del mismo archivo -> un solo infante)
                     infante_map_key = (infante_nombre, infante_fecha_nacimiento, acudiente.id_acudiente)
-                    infante = infantes_map.get(infante_map_key)
+                    infante_normalizado = (DedupService.normalize_name(infante_nombre), infante_fecha_nacimiento, acudiente.id_acudiente)
+                    infante = infantes_map.get(infante_map_key) or infantes_map.get(infante_normalizado)
                     
                     if not infante:
                         infante = Infante(
@@ -318,6 +386,8 @@ class ExcelService:
                         db_session.add(infante)
                         db_session.flush()
                         infantes_map[infante_map_key] = infante
+                        infantes_map[infante_normalizado] = infante
+                        nuevos_infantes.append(infante)
                     
                     # Validar seguimiento
                     seguimiento_fecha = row.get('seguimiento_fecha')
@@ -430,6 +500,7 @@ class ExcelService:
                     )
                     db_session.add(seguimiento)
                     db_session.flush()
+                    proyeccion.append((seguimiento, None))
                     
                     # Calcular IMC
                     imc = None
@@ -460,6 +531,7 @@ class ExcelService:
                         db_session.add(examen)
                     
                     # Evaluación nutricional con cache
+                    evaluacion = None
                     if peso and estatura:
                         age_days = (seguimiento_fecha - infante_fecha_nacimiento).days
                         gender = 'male' if infante.genero == 'M' else 'female'
@@ -494,6 +566,10 @@ class ExcelService:
                             print(f"WARNING: nutrient_data error: {str(e)}")
                             nutrient_data = []
                         
+                        expected_weight, expected_req = NutritionService.get_expected_energy_requirement(
+                            age_days, gender, peso
+                        )
+                        
                         recommendations = NutritionService.generate_recommendations(assessment)
                         
                         evaluacion = EvaluacionNutricional(
@@ -515,12 +591,16 @@ class ExcelService:
                             nivel_riesgo=assessment.get("risk_level", "Bajo"),
                             requerimientos_energeticos=energy_req if energy_req else {},
                             requerimientos_nutrientes=nutrient_data if nutrient_data else [],
+                            peso_esperado=expected_weight,
+                            requerimientos_energeticos_esperados=expected_req,
                             recomendaciones_nutricionales=recommendations.get("nutritional_recommendations", []),
                             recomendaciones_generales=recommendations.get("general_recommendations", []),
                             instrucciones_cuidador=recommendations.get("caregiver_instructions", [])
                         )
                         db_session.add(evaluacion)
                     
+                    proyeccion[-1] = (seguimiento, evaluacion)
+                    resumen_mensual.append((seguimiento, evaluacion, infante))
                     success_count += 1
                     processed_data.append({
                         "fila": row_num,
@@ -538,8 +618,24 @@ class ExcelService:
             
             # ⚡ UN SOLO COMMIT AL FINAL
             if success_count > 0:
+                # Documentos para el índice global (antes del commit, que expira los objetos)
+                hoy = date.today()
+                sede_por_acudiente = {i.acudiente_id: i.sede_id for i in reversed(nuevos_infantes)}
+                index_docs = [infante_doc(i, fecha=hoy) for i in nuevos_infantes]
+                index_docs += [
+                    acudiente_doc(a, sede_por_acudiente.get(a.id_acudiente), fecha=hoy)
+                    for a in nuevos_acudientes
+                ]
+
+                # Proyección "última evaluación por infante" dentro de la misma transacción
+                ProjectionService.actualizar_lote(db_session, proyeccion)
+                # Conteos mensuales de prevalencia por sede, también en la misma transacción
+                RollupService.registrar_lote(db_session, resumen_mensual)
+
                 print(f"💾 Guardando {success_count} seguimientos en la base de datos...")
                 db_session.commit()
+                invalidate_dashboard()
+                index_documents(index_docs)
                 print(f"✅ Importación completada: {success_count} éxitos, {len(errors)} errores")
             
             return {
@@ -548,7 +644,11 @@ class ExcelService:
                 "error_count": len(errors),
                 "total_rows": len(df),
                 "data": processed_data,
-                "errors": errors
+                "errors": errors,
+                "dedup": {
+                    "vinculados": dedup_acudientes["vinculados"] + dedup_infantes["vinculados"],
+                    "propuestas": dedup_acudientes["propuestas"] + dedup_infantes["propuestas"],
+                },
             }
             
         except Exception as e:
@@ -558,7 +658,340 @@ class ExcelService:
                 "error": f"Error al procesar el archivo: {str(e)}"
             }
 
-    
+    @staticmethod
+    def _load_links(db_session, model, id_column, links: Dict[Any, int], target: Dict[Any, Any], chunk: int = 500):
+        """Carga los registros vinculados por DedupService y los agrega al mapa de la importación"""
+        ids = sorted(set(links.values()))
+        by_id = {}
+        for start in range(0, len(ids), chunk):
+            for obj in db_session.query(model).filter(id_column.in_(ids[start:start + chunk])).all():
+                by_id[getattr(obj, id_column.key)] = obj
+        for key, obj_id in links.items():
+            if obj_id in by_id:
+                target[key] = by_id[obj_id]
+
+    @staticmethod
+    def _is_blank(value: Any) -> bool:
+        """True si la celda está vacía (None, NaN o texto en blanco)"""
+        if value is None:
+            return True
+        try:
+            if pd.isna(value):
+                return True
+        except (TypeError, ValueError):
+            pass
+        return isinstance(value, str) and not value.strip()
+
+    @staticmethod
+    def _parse_date(value: Any) -> date:
+        """Convierte el valor de una celda en date con las mismas reglas que la importación"""
+        if isinstance(value, str):
+            return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+        if isinstance(value, pd.Timestamp):
+            return value.date()
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return pd.to_datetime(value).date()
+
+    @staticmethod
+    def _file_kind(filename: str) -> str:
+        """Tipo de archivo según la extensión: 'xlsx', 'xls', 'csv' o 'parquet'"""
+        name = (filename or "").lower()
+        for ext in ExcelService.SUPPORTED_EXTS:
+            if name.endswith(ext):
+                return ext.lstrip(".")
+        # Sin nombre/extensión conocida se asume el formato histórico
+        return "xlsx"
+
+    @staticmethod
+    def _csv_options(file_content: bytes) -> Dict[str, Any]:
+        """Detecta separador y codificación a partir de las primeras líneas del CSV"""
+        head = file_content[:64 * 1024]
+        try:
+            sample = head.decode("utf-8-sig")
+            encoding = "utf-8-sig"
+        except UnicodeDecodeError:
+            sample = head.decode("latin-1")
+            encoding = "latin-1"
+        try:
+            sep = csv.Sniffer().sniff(sample.splitlines()[0] if sample else "", delimiters=",;\t|").delimiter
+        except csv.Error:
+            sep = ","
+        return {
+            "sep": sep,
+            "encoding": encoding,
+            # Documentos y teléfonos como texto para no perder ceros a la izquierda
+            "dtype": {col: str for col in ExcelService.TEXT_COLUMNS},
+        }
+
+    @staticmethod
+    def _iter_csv_chunks(file_content: bytes, chunksize: Optional[int] = None, nrows: Optional[int] = None,
+                         skip_blank_lines: bool = True) -> Iterator[pd.DataFrame]:
+        """Lee el CSV por bloques de CSV_CHUNK_ROWS filas (parser C de pandas)"""
+        reader = pd.read_csv(
+            BytesIO(file_content),
+            chunksize=chunksize or ExcelService.CSV_CHUNK_ROWS,
+            nrows=nrows,
+            skipinitialspace=True,
+            skip_blank_lines=skip_blank_lines,
+            **ExcelService._csv_options(file_content)
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk
+
+    @staticmethod
+    def _parquet_file(file_content: bytes):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # BufferReader expone los bytes subidos a Arrow sin copiarlos
+        return pq.ParquetFile(pa.BufferReader(file_content))
+
+    @staticmethod
+    def read_tabular(file_content: bytes, filename: str = "") -> pd.DataFrame:
+        """
+        Lee un archivo de importación (.xlsx, .xls, .csv o .parquet) en un DataFrame
+        con el mismo contrato de columnas que generate_template.
+        - CSV: parser C de pandas por bloques, sin pasar por openpyxl
+        - Parquet: lectura columnar con pyarrow y conversión directa a pandas
+        """
+        kind = ExcelService._file_kind(filename)
+        if kind == "csv":
+            chunks = list(ExcelService._iter_csv_chunks(file_content))
+            if not chunks:
+                return pd.DataFrame()
+            return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        if kind == "parquet":
+            table = ExcelService._parquet_file(file_content).read()
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+        return pd.read_excel(BytesIO(file_content))
+
+    @staticmethod
+    def _iter_rows(file_content: bytes, filename: str = "", nrows: Optional[int] = None) -> Iterator[Tuple[List[str], int, Dict[str, Any]]]:
+        """
+        Recorre el archivo fila por fila sin construir un DataFrame completo.
+        - .xlsx: openpyxl en modo read_only (streaming, no carga el libro completo)
+        - .xls: openpyxl no lo soporta, se delega en pandas con nrows
+        - .csv: bloques de pandas.read_csv
+        - .parquet: lotes (record batches) de pyarrow
+        Devuelve tuplas (columnas, número de fila en el archivo, fila) donde fila es un dict
+        columna -> valor. El número cuenta el encabezado como fila 1 e incluye las filas en
+        blanco que se saltan, así coincide con la hoja (y con el idx + 2 de la importación).
+        """
+        kind = ExcelService._file_kind(filename)
+
+        if kind == "xls":
+            df = pd.read_excel(BytesIO(file_content), nrows=nrows)
+            columns = [str(c) for c in df.columns]
+            for i, record in enumerate(df.to_dict(orient="records")):
+                yield columns, i + 2, {str(k): v for k, v in record.items()}
+            return
+
+        if kind == "csv":
+            row_num = 1
+            for chunk in ExcelService._iter_csv_chunks(file_content, nrows=nrows, skip_blank_lines=False):
+                columns = [str(c).strip() for c in chunk.columns]
+                chunk.columns = columns
+                for record in chunk.to_dict(orient="records"):
+                    row_num += 1
+                    if all(ExcelService._is_blank(v) for v in record.values()):
+                        continue
+                    yield columns, row_num, record
+            return
+
+        if kind == "parquet":
+            parquet_file = ExcelService._parquet_file(file_content)
+            columns = list(parquet_file.schema_arrow.names)
+            count = 0
+            for batch in parquet_file.iter_batches(batch_size=ExcelService.CSV_CHUNK_ROWS):
+                for record in batch.to_pylist():
+                    if nrows is not None and count >= nrows:
+                        return
+                    count += 1
+                    yield columns, count + 1, record
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(BytesIO(file_content), read_only=True, data_only=True)
+        try:
+            worksheet = workbook.worksheets[0]
+            rows = worksheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(c).strip() if c is not None else "" for c in header]
+            count = 0
+            # read_only rellena los huecos con filas vacías: el índice es la fila de la hoja
+            for row_num, values in enumerate(rows, start=2):
+                if values is None or all(ExcelService._is_blank(v) for v in values):
+                    continue
+                if nrows is not None and count >= nrows:
+                    break
+                count += 1
+                yield columns, row_num, {col: val for col, val in zip(columns, values) if col}
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def validate_children_excel(file_content: bytes, filename: str = "", nrows: Optional[int] = None,
+                                preview_rows: int = 10) -> Dict[str, Any]:
+        """
+        Validación en seco (dry-run) de un archivo de importación.
+        Aplica las mismas reglas de columnas y filas que process_children_excel y detecta
+        seguimientos duplicados dentro del archivo, sin acceder a la base de datos ni
+        calcular evaluaciones o tablas de nutrientes.
+        """
+        errors: List[Dict[str, Any]] = []
+        duplicates: List[Dict[str, Any]] = []
+        preview: List[Dict[str, Any]] = []
+        seen_keys: Dict[Tuple, int] = {}
+        columns: List[str] = []
+        total_rows = 0
+        valid_count = 0
+
+        def _preview_value(v: Any) -> Any:
+            if ExcelService._is_blank(v):
+                return None
+            if isinstance(v, (datetime, date)):
+                return v.isoformat()
+            if isinstance(v, (int, float, str, bool)):
+                return v
+            return str(v)
+
+        try:
+            for columns, row_num, row in ExcelService._iter_rows(file_content, filename, nrows):
+                if total_rows == 0:
+                    missing_columns = [col for col in ExcelService.REQUIRED_COLUMNS if col not in columns]
+                    if missing_columns:
+                        return {
+                            "success": False,
+                            "valid": False,
+                            "error": f"Faltan columnas requeridas: {', '.join(missing_columns)}",
+                            "missing_columns": missing_columns,
+                            "columns": columns
+                        }
+
+                total_rows += 1
+                row_errors = []
+
+                if len(preview) < preview_rows:
+                    preview.append({"fila": row_num, **{k: _preview_value(v) for k, v in row.items()}})
+
+                acudiente_nombre = "" if ExcelService._is_blank(row.get('acudiente_nombre')) else str(row.get('acudiente_nombre')).strip()
+                acudiente_telefono = "" if ExcelService._is_blank(row.get('acudiente_telefono')) else str(row.get('acudiente_telefono')).strip()
+                infante_nombre = "" if ExcelService._is_blank(row.get('infante_nombre')) else str(row.get('infante_nombre')).strip()
+
+                if not acudiente_nombre:
+                    row_errors.append("Nombre de acudiente es requerido")
+                if not acudiente_telefono:
+                    row_errors.append("Teléfono de acudiente es requerido")
+                elif not re.match(r'^\d{10}$', acudiente_telefono):
+                    row_errors.append(f"Teléfono inválido: {acudiente_telefono}")
+                if not infante_nombre:
+                    row_errors.append("Nombre de infante es requerido")
+
+                fecha_nacimiento = None
+                if ExcelService._is_blank(row.get('infante_fecha_nacimiento')):
+                    row_errors.append("Fecha de nacimiento del infante es requerida")
+                else:
+                    try:
+                        fecha_nacimiento = ExcelService._parse_date(row.get('infante_fecha_nacimiento'))
+                    except Exception:
+                        row_errors.append(f"Fecha de nacimiento inválida: {row.get('infante_fecha_nacimiento')}")
+
+                genero = "" if ExcelService._is_blank(row.get('infante_genero')) else str(row.get('infante_genero')).strip()
+                if genero not in ExcelService.GENERO_MAP:
+                    row_errors.append(f"Género inválido: {genero}")
+
+                try:
+                    int(row.get('sede_id'))
+                except Exception:
+                    row_errors.append(f"ID de sede inválido: {row.get('sede_id')}")
+
+                seguimiento_fecha = None
+                if ExcelService._is_blank(row.get('seguimiento_fecha')):
+                    row_errors.append("Fecha de seguimiento es requerida")
+                else:
+                    try:
+                        seguimiento_fecha = ExcelService._parse_date(row.get('seguimiento_fecha'))
+                    except Exception:
+                        row_errors.append(f"Fecha de seguimiento inválida: {row.get('seguimiento_fecha')}")
+
+                if fecha_nacimiento and seguimiento_fecha:
+                    age_days = (seguimiento_fecha - fecha_nacimiento).days
+                    if age_days < 0:
+                        row_errors.append("La fecha de seguimiento es anterior a la fecha de nacimiento")
+                    elif age_days / 365 > ExcelService.MAX_AGE_YEARS:
+                        row_errors.append(f"La edad no puede ser mayor a {ExcelService.MAX_AGE_YEARS} años")
+
+                try:
+                    peso = float(row.get('peso'))
+                    if peso <= 0 or peso > 200:
+                        raise ValueError
+                except Exception:
+                    row_errors.append(f"Peso inválido: {row.get('peso')}")
+
+                try:
+                    estatura = float(row.get('estatura'))
+                    if estatura <= 0 or estatura > 250:
+                        raise ValueError
+                except Exception:
+                    row_errors.append(f"Estatura inválida: {row.get('estatura')}")
+
+                if row_errors:
+                    errors.append({
+                        "fila": row_num,
+                        "infante": infante_nombre or "N/A",
+                        "errores": row_errors
+                    })
+                    continue
+
+                # Un mismo infante no debería tener dos seguimientos en la misma fecha
+                key = (acudiente_nombre, acudiente_telefono, infante_nombre, fecha_nacimiento, seguimiento_fecha)
+                if key in seen_keys:
+                    duplicates.append({
+                        "fila": row_num,
+                        "duplicada_de": seen_keys[key],
+                        "infante": infante_nombre,
+                        "seguimiento_fecha": seguimiento_fecha.isoformat()
+                    })
+                    continue
+                seen_keys[key] = row_num
+                valid_count += 1
+
+        except Exception as e:
+            return {
+                "success": False,
+                "valid": False,
+                "error": f"Error al leer el archivo: {str(e)}"
+            }
+
+        if total_rows == 0:
+            return {
+                "success": False,
+                "valid": False,
+                "error": "El archivo no contiene filas",
+                "columns": columns
+            }
+
+        return {
+            "success": True,
+            "valid": not errors and not duplicates,
+            "columns": columns,
+            "total_rows": total_rows,
+            "truncated": nrows is not None and total_rows >= nrows,
+            "valid_count": valid_count,
+            "error_count": len(errors),
+            "duplicate_count": len(duplicates),
+            "errors": errors,
+            "duplicates": duplicates,
+            "preview": preview
+        }
+
     @staticmethod
     def generate_template() -> bytes:
         """Generate Excel template for data import with all required fields"""
@@ -0,0 +1,205 @@
+# backend/src/services/export_service.py
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escritura que acumula bytes hasta que el generador los entrega"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._parts.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class ExportService:
+    """
+    Exportación en streaming (xlsx / csv / parquet) a partir de bloques de DataFrame.
+    Cada bloque se escribe y se descarta: la memoria depende del tamaño del bloque, no del total.
+    """
+
+    FORMATS = ("xlsx", "csv", "parquet")
+    MEDIA_TYPES = {
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "csv": "text/csv; charset=utf-8",
+        "parquet": "application/vnd.apache.parquet",
+    }
+    # Filas por bloque al leer de la base o del sidecar Parquet
+    CHUNK_ROWS = 5000
+    # Tamaño de lectura al enviar el xlsx temporal
+    READ_BLOCK = 1 << 16
+    # Límite de filas de una hoja de Excel (se continúa en otra hoja)
+    XLSX_MAX_ROWS = 1_048_575
+
+    @staticmethod
+    def stream(
+        chunks: Iterable[pd.DataFrame], fmt: str, columns: List[str], sheet_name: str = "reporte", schema=None
+    ) -> Iterator[bytes]:
+        """
+        Generador de bytes del archivo completo. schema (pyarrow) fija los tipos del Parquet;
+        sin él se toman del primer bloque.
+        """
+        if fmt == "csv":
+            return ExportService._stream_csv(chunks, columns)
+        if fmt == "parquet":
+            return ExportService._stream_parquet(chunks, columns, schema)
+        if fmt == "xlsx":
+            return ExportService._stream_xlsx(chunks, columns, sheet_name)
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    @staticmethod
+    def _stream_csv(chunks: Iterable[pd.DataFrame], columns: List[str]) -> Iterator[bytes]:
+        # BOM para que Excel abra bien las tildes
+        yield ("\ufeff" + ",".join(columns) + "\n").encode("utf-8")
+        for chunk in chunks:
+            yield chunk.reindex(columns=columns).to_csv(index=False, header=False).encode("utf-8")
+
+    @staticmethod
+    def _stream_parquet(chunks: Iterable[pd.DataFrame], columns: List[str], schema=None) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        sink = _ChunkSink()
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk.reindex(columns=columns), schema=schema, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, table.schema)
+                else:
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                data = sink.drain()
+                if data:
+                    yield data
+            if writer is None:
+                # Sin filas: archivo válido con sólo el esquema
+                empty = schema.empty_table() if schema is not None else pa.Table.from_pandas(
+                    pd.DataFrame(columns=columns).astype(object), preserve_index=False
+                )
+                writer = pq.ParquetWriter(sink, empty.schema)
+                writer.write_table(empty)
+        finally:
+            if writer is not None:
+                writer.close()
+        data = sink.drain()
+        if data:
+            yield data
+
+    @staticmethod
+    def _cell(value):
+        """Valor escribible por xlsxwriter (None para faltantes)"""
+        if value is None:
+            return None
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        if value is pd.NaT or value is pd.NA:
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, (str, int, float, bool, date, datetime)):
+            return value
+        return str(value)
+
+    @staticmethod
+    def _stream_xlsx(chunks: Iterable[pd.DataFrame], columns: List[str], sheet_name: str) -> Iterator[bytes]:
+        """
+        xlsxwriter en modo constant_memory: cada fila se vuelca a disco al escribirse.
+        El zip del xlsx sólo se arma al cerrar, así que se genera en un archivo temporal
+        y luego se envía por bloques.
+        """
+        import xlsxwriter
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": "yyyy-mm-dd"})
+            header_fmt = workbook.add_format({"bold": True})
+            sheets = 0
+            sheet = None
+            row = ExportService.XLSX_MAX_ROWS
+
+            for chunk in chunks:
+                chunk = chunk.reindex(columns=columns)
+                # Escritura por tipo de columna: write() genérico revisa cada texto (fórmulas, URLs)
+                numeric = [
+                    pd.api.types.is_numeric_dtype(chunk[c]) and not pd.api.types.is_bool_dtype(chunk[c])
+                    for c in columns
+                ]
+                values = chunk.astype(object).to_numpy()
+                for record in values:
+                    if row >= ExportService.XLSX_MAX_ROWS:
+                        sheets += 1
+                        sheet = workbook.add_worksheet(sheet_name if sheets == 1 else f"{sheet_name}_{sheets}")
+                        sheet.write_row(0, 0, columns, header_fmt)
+                        row = 0
+                    row += 1
+                    for col, value in enumerate(record):
+                        if numeric[col]:
+                            if value is not None and value is not pd.NA and value == value:
+                                sheet.write_number(row, col, value)
+                        elif isinstance(value, str):
+                            sheet.write_string(row, col, value)
+                        else:
+                            value = ExportService._cell(value)
+                            if value is not None:
+                                sheet.write(row, col, value)
+            if sheet is None:
+                workbook.add_worksheet(sheet_name).write_row(0, 0, columns, header_fmt)
+            workbook.close()
+
+            with open(path, "rb") as fh:
+                while True:
+                    block = fh.read(ExportService.READ_BLOCK)
+                    if not block:
+                        break
+                    yield block
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def iter_parquet(path: str, columns: Optional[List[str]] = None, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Lee un Parquet por lotes de filas (sin cargarlo completo)"""
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        available = set(parquet.schema_arrow.names)
+        cols = [c for c in columns if c in available] if columns else None
+        for batch in parquet.iter_batches(batch_size=chunk_rows or ExportService.CHUNK_ROWS, columns=cols):
+            yield batch.to_pandas()
+
+    @staticmethod
+    def iter_query(db, statement, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Ejecuta un select con cursor del lado del servidor (yield_per / stream_results en
+        PostgreSQL) y entrega bloques de DataFrame.
+        """
+        size = chunk_rows or ExportService.CHUNK_ROWS
+        result = db.execute(statement.execution_options(yield_per=size))
+        keys = list(result.keys())
+        for rows in result.partitions(size):
+            yield pd.DataFrame.from_records(rows, columns=keys)
@@ -46,13 +46,51 @@ class MLService:
             }
     
     @staticmethod
-    def predict_growth_trend(historical_data: List[Dict]) -> Dict[str, Any]:
-        """Predict growth trends based on historical data"""
-        # TODO: Implement growth prediction model
-        
+    def predict_growth_trend(historical_data: List[Dict], horizon_days: int = 90) -> Dict[str, Any]:
+        """
+        Predict growth trends based on historical data (fecha, peso, talla/estatura and, for
+        z-scores, fecha_nacimiento and genero). Uses TrajectoryService's linear projection.
+        """
+        import pandas as pd
+        from src.services.trajectory_service import TrajectoryService
+
+        visits = pd.DataFrame([
+            {
+                "infante_id": 0,
+                "id_seguimiento": i,
+                "fecha": item.get("fecha"),
+                "fecha_nacimiento": item.get("fecha_nacimiento"),
+                "genero": item.get("genero"),
+                "peso": item.get("peso"),
+                "talla": item.get("talla", item.get("estatura")),
+            }
+            for i, item in enumerate(historical_data or [])
+            if item.get("fecha") is not None
+        ], columns=TrajectoryService.COLUMNAS_VISITA)
+        summary = TrajectoryService.resumir(TrajectoryService.calcular(visits), horizon_days)
+        if summary.empty or summary.iloc[0]["visitas"] < 2:
+            return {
+                "predicted_weight": None,
+                "predicted_height": None,
+                "trend": "insufficient_data",
+                "confidence": 0.0
+            }
+
+        row = summary.iloc[0]
+        velocity = row["velocidad_peso_kg_mes"]
+        if row["alerta_crecimiento"]:
+            trend = "faltering"
+        elif pd.notna(velocity) and velocity < 0:
+            trend = "decreasing"
+        elif pd.notna(velocity) and velocity > 0:
+            trend = "increasing"
+        else:
+            trend = "stable"
+        visits_used = min(int(row["visitas"]), TrajectoryService.PUNTOS_PROYECCION)
         return {
-            "predicted_weight": 0.0,
-            "predicted_height": 0.0,
-            "trend": "stable",
-            "confidence": 0.75
+            "predicted_weight": TrajectoryService._valor(row["peso_proyectado"]),
+            "predicted_height": TrajectoryService._valor(row["talla_proyectada"]),
+            "trend": trend,
+            # More points in the fitted line -> more confidence (2 points: 0.5, 3+: 0.75)
+            "confidence": 0.5 if visits_used < 3 else 0.75
         }
@@ -6,6 +6,7 @@ import re
 import tempfile
 import shutil
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from typing import Any, Dict, List, Optional, Tuple
 from reportlab.lib.pagesizes import letter
@@ -85,7 +86,7 @@ class NutritionService:
                 },
                 "female": {
                     "0-5": "Peso-Niñas- de 0 a 5 años.xlsx", 
-                    "5-10": "Peso-niñas- de 0 a 5 años.xlsx"
+                    "5-10": "Peso-niñas- de 5 a 10 años.xlsx"
                 }
             },
             "height": {
@@ -162,6 +163,10 @@ class NutritionService:
             # asumir primera columna como etiqueta de edad/día si no existe 'Day'
             day_col = table.columns[0]
 
+        # Las tablas OMS de 5 a 19 años están indexadas por mes cumplido, no por día
+        if str(day_col).strip().lower() == "month":
+            day = int(day // NutritionService.DAYS_PER_MONTH)
+
         # preparar vector numérico intentando extraer número desde texto
         raw_days = table[day_col].astype(str).fillna("").astype(str)
 
@@ -198,6 +203,169 @@ class NutritionService:
             return (measurement - M) / S
         else:
             return ((measurement / M) ** L - 1) / (L * S)
+
+    # ------------------------------------------------------------------
+    # Versión vectorizada (reportes de imports completos)
+    # ------------------------------------------------------------------
+    _lms_reference_cache: Dict[Tuple[str, str], List[Tuple[str, np.ndarray, np.ndarray]]] = {}
+
+    @staticmethod
+    def _lms_reference(variable: str, gender: str) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """
+        Bandas de la referencia OMS: [(unidad 'day'|'month', claves, matriz LMS n x 3)], en el mismo
+        orden en que assess_nutritional_status elige tabla (0-5 años, luego > 5 años).
+        """
+        key = (variable, gender)
+        cached = NutritionService._lms_reference_cache.get(key)
+        if cached is not None:
+            return cached
+        bands = []
+        ages = [0, 6 * NutritionService.DAYS_PER_YEAR] if variable in ("weight", "height", "bmi") else [0]
+        for age in ages:
+            table = NutritionService.get_table_for_indicator(variable, gender, age)
+            key_col = "Day" if "Day" in table.columns else table.columns[0]
+            unit = "month" if str(key_col).strip().lower() == "month" else "day"
+            keys = pd.to_numeric(table[key_col], errors="coerce").to_numpy(dtype=float)
+            lms = table[["L", "M", "S"]].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+            order = np.argsort(keys)
+            bands.append((unit, keys[order], lms[order]))
+        NutritionService._lms_reference_cache[key] = bands
+        return bands
+
+    @staticmethod
+    def lms_lookup(variable: str, gender: np.ndarray, age_days: np.ndarray) -> np.ndarray:
+        """
+        L, M, S (n x 3) para cada (sexo, edad en días): fila exacta o la más cercana, como get_lms_row.
+        NaN donde el sexo no es 'male'/'female', falta la edad o el indicador no aplica.
+        """
+        age_days = np.asarray(age_days, dtype=float)
+        gender = np.asarray(gender, dtype=object)
+        out = np.full((len(age_days), 3), np.nan)
+        five_years = 5 * NutritionService.DAYS_PER_YEAR
+        for g in ("male", "female"):
+            bands = NutritionService._lms_reference(variable, g)
+            for b, (unit, keys, lms) in enumerate(bands):
+                if len(bands) == 1:
+                    mask = (gender == g) & (age_days <= five_years)
+                else:
+                    mask = (gender == g) & ((age_days <= five_years) if b == 0 else (age_days > five_years))
+                mask &= ~np.isnan(age_days)
+                if not mask.any():
+                    continue
+                # Mismo criterio que get_lms_row: día exacto o mes cumplido
+                target = age_days[mask] if unit == "day" else np.floor(age_days[mask] / NutritionService.DAYS_PER_MONTH)
+                pos = np.clip(np.searchsorted(keys, target), 1, len(keys) - 1)
+                nearest = np.where(np.abs(keys[pos - 1] - target) <= np.abs(keys[pos] - target), pos - 1, pos)
+                out[mask] = lms[nearest]
+        return out
+
+    @staticmethod
+    def calculate_zscore_array(measurement: np.ndarray, lms: np.ndarray) -> np.ndarray:
+        """calculate_zscore sobre arreglos (NaN si falta la medida o el LMS)"""
+        x = np.asarray(measurement, dtype=float)
+        L, M, S = lms[:, 0], lms[:, 1], lms[:, 2]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            box_cox = (np.power(x / M, L) - 1) / (L * S)
+            return np.where(L == 0, (x - M) / S, box_cox)
+
+    # Mismos cortes que las clasificaciones de assess_nutritional_status ("" si no hay z-score)
+    @staticmethod
+    def classify_peso_talla_array(z: np.ndarray) -> np.ndarray:
+        return np.select(
+            [np.isnan(z), z > 3, z > 2, z > 1, z >= -1, z >= -2, z >= -3],
+            ["", "Obesidad", "Sobrepeso", "Riesgo de Sobrepeso", "Peso Adecuado para la Talla",
+             "Riesgo de Desnutrición Aguda", "Desnutrición Aguda Moderada"],
+            default="Desnutrición Aguda Severa",
+        )
+
+    @staticmethod
+    def classify_talla_edad_array(z: np.ndarray) -> np.ndarray:
+        return np.select(
+            [np.isnan(z), z >= -1, z >= -2],
+            ["", "Talla Adecuada para la Edad", "Riesgo de Talla Baja"],
+            default="Talla Baja para la Edad o Retraso en Talla",
+        )
+
+    @staticmethod
+    def classify_peso_edad_array(z: np.ndarray) -> np.ndarray:
+        return np.select(
+            [np.isnan(z), z > 1, z >= -1, z >= -2],
+            ["", "", "Peso Adecuado para la Edad", "Riesgo de Desnutrición Global"],
+            default="Desnutrición Global",
+        )
+
+    @staticmethod
+    def classify_default_array(z: np.ndarray) -> np.ndarray:
+        return np.select(
+            [np.isnan(z), z < -3, z < -2, z < -1, z <= 1, z <= 2, z <= 3],
+            ["", "Muy bajo", "Bajo", "Riesgo bajo", "Normal", "Riesgo alto", "Alto"],
+            default="Muy alto",
+        )
+
+    @staticmethod
+    def assess_nutritional_status_batch(
+        age_days: np.ndarray, weight: np.ndarray, height: np.ndarray, gender: np.ndarray,
+        head_circumference: Optional[np.ndarray] = None,
+        triceps_skinfold: Optional[np.ndarray] = None,
+        subscapular_skinfold: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        assess_nutritional_status para muchas filas a la vez (peso, talla e IMC).
+        gender: 'male'/'female'; edades > 11 años o faltantes quedan sin z-score.
+        Perímetro cefálico y pliegues son opcionales y, como en la versión escalar, sólo se
+        evalúan hasta los 5 años y entran en el nivel de riesgo.
+        Devuelve un DataFrame con bmi, los z-scores, las clasificaciones y risk_level.
+        """
+        age_days = np.asarray(age_days, dtype=float)
+        weight = np.asarray(weight, dtype=float)
+        height = np.asarray(height, dtype=float)
+        gender = np.asarray(gender, dtype=object)
+
+        age_days = np.where(age_days / NutritionService.DAYS_PER_YEAR > 11, np.nan, age_days)
+        height_m = height / 100.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            bmi = np.where(height_m > 0, np.round(weight / (height_m * height_m), 2), np.nan)
+
+        weight_z = NutritionService.calculate_zscore_array(weight, NutritionService.lms_lookup("weight", gender, age_days))
+        height_z = NutritionService.calculate_zscore_array(height, NutritionService.lms_lookup("height", gender, age_days))
+        bmi_z = NutritionService.calculate_zscore_array(bmi, NutritionService.lms_lookup("bmi", gender, age_days))
+
+        # Medidas adicionales (menores de 5 años); lms_lookup deja NaN por encima de esa edad
+        extra = {}
+        for variable, measure in (
+            ("head_circumference", head_circumference),
+            ("triceps_skinfold", triceps_skinfold),
+            ("subscapular_skinfold", subscapular_skinfold),
+        ):
+            if measure is None:
+                extra[variable] = np.full(len(age_days), np.nan)
+            else:
+                extra[variable] = NutritionService.calculate_zscore_array(
+                    np.asarray(measure, dtype=float), NutritionService.lms_lookup(variable, gender, age_days)
+                )
+
+        z = np.stack([weight_z, height_z, bmi_z] + list(extra.values()), axis=1)
+        with np.errstate(invalid="ignore"):
+            high = np.any((z < -2) | (z > 2), axis=1)
+            medium = np.any(((z >= -2) & (z < -1.5)) | ((z > 1.5) & (z <= 2)), axis=1)
+
+        return pd.DataFrame({
+            "bmi": bmi,
+            "weight_for_age_zscore": weight_z,
+            "height_for_age_zscore": height_z,
+            "bmi_for_age_zscore": bmi_z,
+            "head_circumference_zscore": extra["head_circumference"],
+            "triceps_skinfold_zscore": extra["triceps_skinfold"],
+            "subscapular_skinfold_zscore": extra["subscapular_skinfold"],
+            "peso_edad": NutritionService.classify_peso_edad_array(weight_z),
+            "talla_edad": NutritionService.classify_talla_edad_array(height_z),
+            "peso_talla": NutritionService.classify_peso_talla_array(bmi_z),
+            "imc_edad": NutritionService.classify_default_array(bmi_z),
+            "perimetro_cefalico_edad": NutritionService.classify_default_array(extra["head_circumference"]),
+            "pliegue_triceps": NutritionService.classify_default_array(extra["triceps_skinfold"]),
+            "pliegue_subescapular": NutritionService.classify_default_array(extra["subscapular_skinfold"]),
+            "risk_level": np.select([high, medium], ["Alto", "Medio"], default="Bajo"),
+        })
     
     @staticmethod
     def assess_nutritional_status(
@@ -1903,6 +2071,36 @@ class NutritionService:
             NutritionService._excel_cache[key] = df
         return df
 
+    @staticmethod
+    def get_expected_weight(age_days: int, gender: str) -> Optional[float]:
+        """Peso esperado: mediana (M) OMS de peso para la edad, desde la referencia en memoria"""
+        lms = NutritionService.lms_lookup(
+            "weight", np.array([gender], dtype=object), np.array([age_days], dtype=float)
+        )[0]
+        return None if np.isnan(lms[1]) else round(float(lms[1]), 2)
+
+    @staticmethod
+    def get_expected_energy_requirement(
+        age_days: int, gender: str, current_weight: Optional[float] = None
+    ) -> Tuple[Optional[float], Optional[Dict[str, Any]]]:
+        """
+        (peso esperado, requerimiento energético con ese peso) con alimentación mixta y actividad
+        moderada. Sin referencia OMS para la edad se usa el peso actual.
+        """
+        expected_weight = NutritionService.get_expected_weight(age_days, gender)
+        if expected_weight is None:
+            expected_weight = float(current_weight) if current_weight is not None else None
+        if expected_weight is None:
+            return None, None
+        requirement = NutritionService.get_energy_requirement(
+            age_days=age_days,
+            weight=expected_weight,
+            gender=gender,
+            feeding_mode='mixed',
+            activity_level='moderate'
+        )
+        return expected_weight, requirement
+
     @staticmethod
     def get_energy_requirement(age_days: int, weight: float, gender: str, 
                             feeding_mode: str = "breast", 
@@ -1922,7 +2120,7 @@ class NutritionService:
             try:
                 ruta_lact = NutritionService.CONFIG_DATA_DIR / "food_composition" / "REQUERIMIENTO DIARIO DE ENERGÍA-LACTANTES.xlsx"
                 if ruta_lact.exists():
-                    df_l = pd.read_excel(str(ruta_lact))
+                    df_l = NutritionService._safe_read_excel(str(ruta_lact))
                     # Mapeo de columnas según tipo de alimentación
                     col_indices = {
                         'breast': {'male': 3, 'female': 4},
@@ -1935,40 +2133,28 @@ class NutritionService:
                         last_valid_row = None
                         last_start = None
                         last_end = None
-                        print(f"Buscando para months={months}")
                         for idx, row in df.iterrows():
                             try:
                                 rango = str(row[col0]).replace(" ", "")
-                                print(f"Fila {idx}: rango={rango}")
                                 if "-" not in rango:
                                     continue
                                 start, end = map(float, rango.split("-"))
                                 last_valid_row = row
                                 last_start = start
                                 last_end = end
-                                print(f"Comparando: {start} <= {months} < {end}")
                                 if start <= months < end:
-                                    print(f"Seleccionada fila {idx} para rango {rango}")
                                     return row
-                            except Exception as e:
-                                print(f"Fila ignorada: {e}")
+                            except Exception:
                                 continue
                         # Último rango
-                        print(f"Chequeando último rango: {last_start} <= {months} <= {last_end}")
                         if last_valid_row is not None and last_start is not None and last_end is not None:
                             if last_start <= months <= last_end:
-                                print(f"Seleccionada última fila para rango {last_start}-{last_end}")
                                 return last_valid_row
-                        print("No se encontró fila para la edad en meses.")
                         return None
                     row = find_row_by_months(df_l, age_months)
                     if row is not None:
                         try:
                             col_idx = col_indices[feeding_mode][gender]
-                            if col_idx is not None:
-                                print(f"RIEN: df_l.columns = {df_l.columns.tolist()}")
-                                print(f"RIEN: Extrayendo valor de columna '{df_l.columns[col_idx]}' para género '{gender}'")
-                                value = row.iloc[col_idx]
                             value = float(row.iloc[col_idx])
                             return {
                                 "kcal_per_kg": value,
@@ -1995,7 +2181,7 @@ class NutritionService:
             try:
                 ruta_years = NutritionService.CONFIG_DATA_DIR / "food_composition" / "Requerimiento diario de energía.xlsx"
                 if ruta_years.exists():
-                    df_y = pd.read_excel(str(ruta_years))
+                    df_y = NutritionService._safe_read_excel(str(ruta_years))
                     col0 = df_y.columns[0]
                     row = None
                     last_row = None
@@ -0,0 +1,129 @@
+# backend/src/services/projection_service.py
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.db.models import EvaluacionNutricional, Seguimiento, UltimaEvaluacionInfante
+
+
+class ProjectionService:
+    """
+    Mantiene la proyección ultima_evaluacion_infante (último seguimiento de cada infante y su
+    evaluación). Los métodos no hacen commit: se ejecutan dentro de la transacción que escribe el
+    seguimiento, así la proyección nunca queda desfasada de los datos.
+    """
+
+    # Campos copiados de EvaluacionNutricional
+    CAMPOS_EVALUACION = (
+        "imc",
+        "peso_edad_zscore", "talla_edad_zscore", "imc_edad_zscore",
+        "clasificacion_peso_edad", "clasificacion_talla_edad",
+        "clasificacion_peso_talla", "clasificacion_imc_edad",
+        "nivel_riesgo",
+    )
+    # Tamaño de los IN (...) al cargar filas existentes
+    CHUNK = 500
+
+    @staticmethod
+    def _aplicar(fila: UltimaEvaluacionInfante, seguimiento: Seguimiento,
+                 evaluacion: Optional[EvaluacionNutricional]) -> None:
+        fila.seguimiento_id = seguimiento.id_seguimiento
+        fila.fecha = seguimiento.fecha
+        fila.evaluacion_id = evaluacion.id_evaluacion if evaluacion is not None else None
+        for campo in ProjectionService.CAMPOS_EVALUACION:
+            setattr(fila, campo, getattr(evaluacion, campo) if evaluacion is not None else None)
+
+    @staticmethod
+    def actualizar(db: Session, seguimiento: Seguimiento,
+                   evaluacion: Optional[EvaluacionNutricional] = None) -> None:
+        """Registra un seguimiento nuevo (y su evaluación) si es el último del infante"""
+        ProjectionService.actualizar_lote(db, [(seguimiento, evaluacion)])
+
+    @staticmethod
+    def actualizar_lote(db: Session,
+                        pares: Iterable[Tuple[Seguimiento, Optional[EvaluacionNutricional]]]) -> int:
+        """
+        Versión por lote (importaciones): se queda con el mayor id_seguimiento por infante, carga
+        las filas existentes con IN (...) por bloques y actualiza o inserta. Devuelve filas tocadas.
+        """
+        pares = list(pares)
+        if pares:
+            db.flush()  # ids de seguimientos/evaluaciones recién agregados
+
+        ultimos: Dict[int, Tuple[Seguimiento, Optional[EvaluacionNutricional]]] = {}
+        for seguimiento, evaluacion in pares:
+            actual = ultimos.get(seguimiento.infante_id)
+            if actual is None or seguimiento.id_seguimiento > actual[0].id_seguimiento:
+                ultimos[seguimiento.infante_id] = (seguimiento, evaluacion)
+        ultimos.pop(None, None)
+        if not ultimos:
+            return 0
+
+        ids = list(ultimos)
+        existentes: Dict[int, UltimaEvaluacionInfante] = {}
+        for i in range(0, len(ids), ProjectionService.CHUNK):
+            bloque = ids[i:i + ProjectionService.CHUNK]
+            for fila in db.query(UltimaEvaluacionInfante).filter(UltimaEvaluacionInfante.infante_id.in_(bloque)):
+                existentes[fila.infante_id] = fila
+
+        tocadas = 0
+        for infante_id, (seguimiento, evaluacion) in ultimos.items():
+            fila = existentes.get(infante_id)
+            if fila is None:
+                fila = UltimaEvaluacionInfante(infante_id=infante_id)
+                db.add(fila)
+            elif fila.seguimiento_id is not None and fila.seguimiento_id > seguimiento.id_seguimiento:
+                continue
+            ProjectionService._aplicar(fila, seguimiento, evaluacion)
+            tocadas += 1
+        return tocadas
+
+    @staticmethod
+    def eliminar_infante(db: Session, infante_id: int) -> None:
+        db.execute(delete(UltimaEvaluacionInfante).where(UltimaEvaluacionInfante.infante_id == infante_id))
+
+    @staticmethod
+    def backfill(db: Session) -> int:
+        """
+        Reconstruye la proyección completa con un solo INSERT ... SELECT (último seguimiento por
+        infante + su evaluación). Hace commit y devuelve el número de filas.
+        """
+        ultimo = (
+            select(
+                Seguimiento.infante_id.label("infante_id"),
+                func.max(Seguimiento.id_seguimiento).label("seguimiento_id"),
+            )
+            .where(Seguimiento.infante_id.is_not(None))
+            .group_by(Seguimiento.infante_id)
+            .subquery()
+        )
+        E = EvaluacionNutricional
+        origen = (
+            select(
+                ultimo.c.infante_id,
+                ultimo.c.seguimiento_id,
+                E.id_evaluacion,
+                Seguimiento.fecha,
+                *[getattr(E, campo) for campo in ProjectionService.CAMPOS_EVALUACION],
+            )
+            .select_from(ultimo)
+            .join(Seguimiento, Seguimiento.id_seguimiento == ultimo.c.seguimiento_id)
+            .outerjoin(E, E.seguimiento_id == ultimo.c.seguimiento_id)
+        )
+        columnas = ["infante_id", "seguimiento_id", "evaluacion_id", "fecha", *ProjectionService.CAMPOS_EVALUACION]
+
+        db.execute(delete(UltimaEvaluacionInfante))
+        db.execute(insert(UltimaEvaluacionInfante).from_select(columnas, origen))
+        db.commit()
+        return db.query(func.count(UltimaEvaluacionInfante.infante_id)).scalar() or 0
+
+    @staticmethod
+    def backfill_si_vacia(db: Session) -> Optional[int]:
+        """Backfill al arrancar cuando la tabla es nueva y ya hay seguimientos; None si no hizo falta"""
+        UltimaEvaluacionInfante.__table__.create(bind=db.get_bind(), checkfirst=True)
+        if db.query(UltimaEvaluacionInfante.infante_id).first() is not None:
+            return None
+        if db.query(Seguimiento.id_seguimiento).first() is None:
+            return None
+        return ProjectionService.backfill(db)
@@ -0,0 +1,289 @@
+# backend/src/services/reevaluation_service.py
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from src.db.models import DatoAntropometrico, EvaluacionNutricional, Infante, Seguimiento
+from src.services.nutrition_service import NutritionService
+
+logger = logging.getLogger(__name__)
+
+# Procesos para puntuar (0 = uno por CPU) y evaluaciones por bloque
+REEVALUACION_WORKERS = int(os.getenv("REEVALUACION_WORKERS", "0"))
+REEVALUACION_BLOQUE = int(os.getenv("REEVALUACION_BLOQUE", "5000"))
+# Tareas Celery en que se reparte una reevaluación completa
+REEVALUACION_PARTICIONES = int(os.getenv("REEVALUACION_PARTICIONES", "4"))
+
+# Columna de EvaluacionNutricional -> columna de assess_nutritional_status_batch
+SALIDAS = {
+    "imc": "bmi",
+    "peso_edad_zscore": "weight_for_age_zscore",
+    "talla_edad_zscore": "height_for_age_zscore",
+    "imc_edad_zscore": "bmi_for_age_zscore",
+    "perimetro_cefalico_zscore": "head_circumference_zscore",
+    "pliegue_triceps_zscore": "triceps_skinfold_zscore",
+    "pliegue_subescapular_zscore": "subscapular_skinfold_zscore",
+    "clasificacion_peso_edad": "peso_edad",
+    "clasificacion_talla_edad": "talla_edad",
+    "clasificacion_peso_talla": "peso_talla",
+    "clasificacion_imc_edad": "imc_edad",
+    "clasificacion_perimetro_cefalico": "perimetro_cefalico_edad",
+    "clasificacion_pliegue_triceps": "pliegue_triceps",
+    "clasificacion_pliegue_subescapular": "pliegue_subescapular",
+    "nivel_riesgo": "risk_level",
+}
+NUMERICAS = [c for c in SALIDAS if c == "imc" or c.endswith("_zscore")]
+# La evaluación escalar guarda None (no "") cuando no hay medida adicional
+OPCIONALES = ["clasificacion_perimetro_cefalico", "clasificacion_pliegue_triceps", "clasificacion_pliegue_subescapular"]
+MEDIDAS = ["fecha", "fecha_nacimiento", "genero", "peso", "estatura",
+           "perimetro_cefalico", "pliegue_triceps", "pliegue_subescapular"]
+
+
+def precargar() -> None:
+    """Carga las referencias OMS una vez por proceso (initializer del pool)"""
+    for variable in ("weight", "height", "bmi", "head_circumference", "triceps_skinfold", "subscapular_skinfold"):
+        for genero in ("male", "female"):
+            NutritionService._lms_reference(variable, genero)
+
+
+def puntuar_bloque(bloque: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Reevalúa un bloque (columnas id_evaluacion, MEDIDAS y las SALIDAS guardadas) y devuelve
+    los valores nuevos sólo de las filas que cambian. Función de módulo para poder enviarla
+    a otros procesos.
+    """
+    if bloque.empty:
+        return []
+    edad = (pd.to_datetime(bloque["fecha"]) - pd.to_datetime(bloque["fecha_nacimiento"])).dt.days.astype(float)
+    # Igual que assess_nutritional_status: mayores de 11 años no se evalúan (se dejan como están)
+    valido = (edad.notna() & (edad / NutritionService.DAYS_PER_YEAR <= 11)).to_numpy()
+    bloque, edad = bloque[valido], edad[valido]
+    if bloque.empty:
+        return []
+
+    medida = lambda c: pd.to_numeric(bloque[c], errors="coerce").astype(float).to_numpy()
+    nuevos = NutritionService.assess_nutritional_status_batch(
+        edad.to_numpy(), medida("peso"), medida("estatura"),
+        bloque["genero"].map({"M": "male", "F": "female"}).to_numpy(dtype=object),
+        head_circumference=medida("perimetro_cefalico"),
+        triceps_skinfold=medida("pliegue_triceps"),
+        subscapular_skinfold=medida("pliegue_subescapular"),
+    )
+
+    cambia = np.zeros(len(bloque), dtype=bool)
+    valores = {}
+    for columna in NUMERICAS:
+        # Se guardan como DECIMAL(5, 2)
+        nuevo = np.round(nuevos[SALIDAS[columna]].to_numpy(dtype=float), 2)
+        actual = pd.to_numeric(bloque[columna], errors="coerce").astype(float).to_numpy()
+        cambia |= ~np.isclose(nuevo, actual, rtol=0, atol=1e-6, equal_nan=True)
+        valores[columna] = nuevo
+    for columna in SALIDAS:
+        if columna in NUMERICAS:
+            continue
+        nuevo = nuevos[SALIDAS[columna]].to_numpy(dtype=object)
+        actual = bloque[columna].fillna("").astype(str).to_numpy(dtype=object)
+        cambia |= nuevo != actual
+        valores[columna] = nuevo
+
+    ids = bloque["id_evaluacion"].to_numpy()
+    cambios = []
+    for i in np.flatnonzero(cambia):
+        registro = {"id_evaluacion": int(ids[i])}
+        for columna, arreglo in valores.items():
+            valor = arreglo[i]
+            if columna in NUMERICAS:
+                registro[columna] = None if np.isnan(valor) else float(valor)
+            elif columna in OPCIONALES:
+                registro[columna] = valor or None
+            else:
+                registro[columna] = str(valor)
+        # El peso esperado también sale de las tablas OMS: se recalcula en la próxima consulta
+        registro["peso_esperado"] = None
+        registro["requerimientos_energeticos_esperados"] = None
+        cambios.append(registro)
+    return cambios
+
+
+class ReevaluationService:
+    """
+    Recalcula z-scores, clasificaciones y nivel de riesgo de las evaluaciones guardadas cuando
+    cambian las tablas OMS o los puntos de corte.
+
+    Lee por bloques ordenados por id_evaluacion (keyset: se puede retomar con desde_id), puntúa
+    cada bloque con la versión vectorizada en varios procesos y actualiza en bloque sólo las
+    filas cuyo resultado cambió. Al terminar reconstruye las tablas derivadas (última evaluación
+    por infante y resumen mensual).
+    """
+
+    @staticmethod
+    def _consulta(sede_id: Optional[int] = None, desde_id: int = 0, hasta_id: Optional[int] = None):
+        E = EvaluacionNutricional
+        primer_dato = (
+            select(func.min(DatoAntropometrico.id_dato))
+            .where(DatoAntropometrico.seguimiento_id == Seguimiento.id_seguimiento)
+            .correlate(Seguimiento)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                E.id_evaluacion,
+                Seguimiento.fecha,
+                Infante.fecha_nacimiento,
+                Infante.genero,
+                DatoAntropometrico.peso,
+                DatoAntropometrico.estatura,
+                DatoAntropometrico.perimetro_cefalico,
+                DatoAntropometrico.pliegue_triceps,
+                DatoAntropometrico.pliegue_subescapular,
+                *[getattr(E, columna) for columna in SALIDAS],
+            )
+            .join(Seguimiento, Seguimiento.id_seguimiento == E.seguimiento_id)
+            .join(Infante, Infante.id_infante == Seguimiento.infante_id)
+            .join(DatoAntropometrico, DatoAntropometrico.id_dato == primer_dato)
+            .where(E.id_evaluacion > desde_id)
+        )
+        if hasta_id is not None:
+            stmt = stmt.where(E.id_evaluacion <= hasta_id)
+        if sede_id is not None:
+            stmt = stmt.where(Infante.sede_id == sede_id)
+        return stmt
+
+    @staticmethod
+    def _filtro_sede(stmt, sede_id: Optional[int]):
+        if sede_id is None:
+            return stmt
+        return (
+            stmt.join(Seguimiento, Seguimiento.id_seguimiento == EvaluacionNutricional.seguimiento_id)
+            .join(Infante, Infante.id_infante == Seguimiento.infante_id)
+            .where(Infante.sede_id == sede_id)
+        )
+
+    @staticmethod
+    def contar(db: Session, sede_id: Optional[int] = None, desde_id: int = 0, hasta_id: Optional[int] = None) -> int:
+        E = EvaluacionNutricional
+        stmt = ReevaluationService._filtro_sede(select(func.count(E.id_evaluacion)), sede_id).where(E.id_evaluacion > desde_id)
+        if hasta_id is not None:
+            stmt = stmt.where(E.id_evaluacion <= hasta_id)
+        return db.execute(stmt).scalar() or 0
+
+    @staticmethod
+    def rangos(db: Session, particiones: int = REEVALUACION_PARTICIONES,
+               sede_id: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Divide los id_evaluacion en rangos (desde_id exclusivo, hasta_id inclusivo)"""
+        E = EvaluacionNutricional
+        minimo, maximo = db.execute(
+            ReevaluationService._filtro_sede(select(func.min(E.id_evaluacion), func.max(E.id_evaluacion)), sede_id)
+        ).one()
+        if minimo is None:
+            return []
+        cortes = np.unique(np.linspace(minimo - 1, maximo, max(1, particiones) + 1).astype(int))
+        return [(int(a), int(b)) for a, b in zip(cortes[:-1], cortes[1:])]
+
+    @staticmethod
+    def _bloques(db: Session, tamano: int, sede_id: Optional[int], desde_id: int,
+                 hasta_id: Optional[int]) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """(último id, bloque) recorriendo por keyset; cada bloque es una consulta corta"""
+        columnas = ["id_evaluacion"] + MEDIDAS + list(SALIDAS)
+        ultimo = desde_id
+        while True:
+            stmt = (
+                ReevaluationService._consulta(sede_id, ultimo, hasta_id)
+                .order_by(EvaluacionNutricional.id_evaluacion)
+                .limit(tamano)
+            )
+            filas = db.execute(stmt).all()
+            if not filas:
+                return
+            ultimo = filas[-1][0]
+            yield ultimo, pd.DataFrame.from_records(filas, columns=columnas)
+            if len(filas) < tamano:
+                return
+
+    @staticmethod
+    def reevaluar(db: Session, workers: Optional[int] = None, tamano_bloque: Optional[int] = None,
+                  sede_id: Optional[int] = None, desde_id: int = 0, hasta_id: Optional[int] = None,
+                  dry_run: bool = False, derivados: bool = True,
+                  progreso: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Reevalúa las evaluaciones con id en (desde_id, hasta_id]. Hace commit por bloque, así
+        una corrida interrumpida se retoma con desde_id = estado["ultimo_id"].
+        progreso recibe el estado después de cada bloque.
+        """
+        workers = workers or REEVALUACION_WORKERS or os.cpu_count() or 1
+        tamano = tamano_bloque or REEVALUACION_BLOQUE
+        inicio = time.perf_counter()
+        estado = {
+            "total": ReevaluationService.contar(db, sede_id, desde_id, hasta_id),
+            "procesadas": 0,
+            "actualizadas": 0,
+            "ultimo_id": desde_id,
+            "segundos": 0.0,
+            "dry_run": dry_run,
+        }
+
+        def aplicar(ultimo_id: int, filas: int, cambios: List[Dict[str, Any]]) -> None:
+            if cambios and not dry_run:
+                db.execute(update(EvaluacionNutricional), cambios)
+                db.commit()
+            estado["procesadas"] += filas
+            estado["actualizadas"] += len(cambios)
+            estado["ultimo_id"] = ultimo_id
+            estado["segundos"] = round(time.perf_counter() - inicio, 2)
+            if progreso:
+                progreso(dict(estado))
+
+        precargar()
+        bloques = ReevaluationService._bloques(db, tamano, sede_id, desde_id, hasta_id)
+        if workers <= 1:
+            for ultimo_id, bloque in bloques:
+                aplicar(ultimo_id, len(bloque), puntuar_bloque(bloque))
+        else:
+            # Ventana acotada de bloques en vuelo: se lee mientras otros procesos puntúan, y los
+            # resultados se aplican en orden para que ultimo_id sea un punto de reanudación válido
+            with ProcessPoolExecutor(max_workers=workers, initializer=precargar) as pool:
+                pendientes = deque()
+                for ultimo_id, bloque in bloques:
+                    pendientes.append((ultimo_id, len(bloque), pool.submit(puntuar_bloque, bloque)))
+                    if len(pendientes) >= 2 * workers:
+                        ultimo, filas, futuro = pendientes.popleft()
+                        aplicar(ultimo, filas, futuro.result())
+                while pendientes:
+                    ultimo, filas, futuro = pendientes.popleft()
+                    aplicar(ultimo, filas, futuro.result())
+
+        if derivados and estado["actualizadas"] and not dry_run:
+            ReevaluationService.actualizar_derivados(db)
+        estado["segundos"] = round(time.perf_counter() - inicio, 2)
+        logger.info("Reevaluación: %s", estado)
+        return estado
+
+    @staticmethod
+    def actualizar_derivados(db: Session) -> None:
+        """Tablas que copian z-scores y riesgo de las evaluaciones"""
+        from src.services.cache_service import invalidate_dashboard
+        from src.services.projection_service import ProjectionService
+        from src.services.rollup_service import RollupService
+
+        ProjectionService.backfill(db)
+        RollupService.reconstruir(db)
+        invalidate_dashboard()
+
+    @staticmethod
+    def combinar(resultados: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Suma los estados de varias particiones"""
+        return {
+            "total": sum(r.get("total", 0) for r in resultados),
+            "procesadas": sum(r.get("procesadas", 0) for r in resultados),
+            "actualizadas": sum(r.get("actualizadas", 0) for r in resultados),
+            "segundos": max((r.get("segundos", 0.0) for r in resultados), default=0.0),
+            "particiones": len(resultados),
+        }
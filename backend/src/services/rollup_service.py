@@ -0,0 +1,282 @@
+# backend/src/services/rollup_service.py
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from src.db.models import EvaluacionNutricional, Infante, ResumenMensualSede, Seguimiento
+from src.services.nutrition_service import NutritionService
+
+
+class RollupService:
+    """
+    Mantiene resumen_mensual_sede: conteos de retraso en talla, emaciación, bajo peso y sobrepeso
+    y sumas de z-score por (sede, mes, grupo de edad, sexo).
+
+    Las escrituras suman la contribución de las evaluaciones nuevas con un upsert incremental
+    (INSERT ... ON CONFLICT DO UPDATE con x = x + excluded.x), dentro de la transacción que crea
+    la evaluación y sin commit. reconstruir() recalcula la tabla completa por bloques. La misma
+    función de contribución sirve a ambos caminos, así no pueden diferir.
+    """
+
+    CLAVE = ("sede_id", "mes", "grupo_edad", "genero")
+    # Cortes de edad en meses cumplidos al momento del seguimiento
+    CORTES_EDAD_MESES = [0, 6, 12, 24, 60, 132]
+    GRUPOS_EDAD = ["0-5m", "6-11m", "12-23m", "24-59m", "5-10a"]
+    GRUPO_FUERA = "otro"
+    INDICADORES = ("peso_edad", "talla_edad", "imc_edad")
+    CONTADORES = (
+        "evaluaciones", "retraso_talla", "retraso_talla_severo", "emaciacion", "emaciacion_severa",
+        "bajo_peso", "sobrepeso", "obesidad",
+    )
+    SUMAS = tuple(
+        f"{prefijo}_{indicador}" for indicador in INDICADORES for prefijo in ("n", "suma_z", "suma_z2")
+    )
+    # Los z-score se guardan como DECIMAL(5, 2): se redondean igual para que la suma incremental
+    # (valores recién calculados) y la reconstrucción (valores leídos) coincidan
+    DECIMALES_Z = 2
+    COLUMNAS_ENTRADA = ["sede_id", "fecha", "fecha_nacimiento", "genero", "z_peso_edad", "z_talla_edad", "z_imc_edad"]
+
+    # ---------- Contribuciones ----------
+    @staticmethod
+    def contribuciones(evaluaciones: pd.DataFrame) -> pd.DataFrame:
+        """Evaluaciones (COLUMNAS_ENTRADA) -> filas de resumen agrupadas por CLAVE"""
+        columnas = list(RollupService.CLAVE) + list(RollupService.CONTADORES) + list(RollupService.SUMAS)
+        if evaluaciones.empty:
+            return pd.DataFrame(columns=columnas)
+        df = evaluaciones
+        fecha = pd.to_datetime(df["fecha"])
+        edad_meses = (fecha - pd.to_datetime(df["fecha_nacimiento"])).dt.days / NutritionService.DAYS_PER_MONTH
+        cortes = RollupService.CORTES_EDAD_MESES
+        posicion = np.searchsorted(cortes, edad_meses.to_numpy(dtype=float), side="right") - 1
+        fuera = np.isnan(edad_meses.to_numpy(dtype=float)) | (posicion < 0) | (posicion >= len(RollupService.GRUPOS_EDAD))
+        grupos = np.array(RollupService.GRUPOS_EDAD, dtype=object)[np.clip(posicion, 0, len(RollupService.GRUPOS_EDAD) - 1)]
+        grupos[fuera] = RollupService.GRUPO_FUERA
+
+        z = {
+            i: np.round(pd.to_numeric(df[f"z_{i}"], errors="coerce").astype(float).to_numpy(), RollupService.DECIMALES_Z)
+            for i in RollupService.INDICADORES
+        }
+        with np.errstate(invalid="ignore"):
+            partes = {
+                "sede_id": pd.to_numeric(df["sede_id"], errors="coerce").fillna(0).astype(int).to_numpy(),
+                "mes": fecha.dt.to_period("M").dt.start_time.dt.date.to_numpy(),
+                "grupo_edad": grupos,
+                "genero": df["genero"].fillna("").astype(str).to_numpy(),
+                "evaluaciones": np.ones(len(df), dtype=int),
+                "retraso_talla": (z["talla_edad"] < -2).astype(int),
+                "retraso_talla_severo": (z["talla_edad"] < -3).astype(int),
+                "emaciacion": (z["imc_edad"] < -2).astype(int),
+                "emaciacion_severa": (z["imc_edad"] < -3).astype(int),
+                "bajo_peso": (z["peso_edad"] < -2).astype(int),
+                "sobrepeso": (z["imc_edad"] > 2).astype(int),
+                "obesidad": (z["imc_edad"] > 3).astype(int),
+            }
+        for indicador, valores in z.items():
+            valido = ~np.isnan(valores)
+            partes[f"n_{indicador}"] = valido.astype(int)
+            partes[f"suma_z_{indicador}"] = np.where(valido, valores, 0.0)
+            partes[f"suma_z2_{indicador}"] = np.where(valido, valores * valores, 0.0)
+        return (
+            pd.DataFrame(partes)
+            .groupby(list(RollupService.CLAVE), as_index=False, sort=False)
+            .sum()[columnas]
+        )
+
+    @staticmethod
+    def _registros(contribuciones: pd.DataFrame, signo: int = 1) -> List[Dict[str, Any]]:
+        registros = []
+        for fila in contribuciones.to_dict("records"):
+            registro = {k: fila[k] for k in RollupService.CLAVE}
+            registro["sede_id"] = int(registro["sede_id"])
+            for c in RollupService.CONTADORES:
+                registro[c] = signo * int(fila[c])
+            for c in RollupService.SUMAS:
+                registro[c] = signo * (int(fila[c]) if c.startswith("n_") else float(fila[c]))
+            registros.append(registro)
+        return registros
+
+    @staticmethod
+    def _acumular(db: Session, contribuciones: pd.DataFrame, signo: int = 1) -> int:
+        """Suma (o resta) contribuciones a la tabla con un upsert por lote"""
+        registros = RollupService._registros(contribuciones, signo)
+        if not registros:
+            return 0
+        tabla = ResumenMensualSede.__table__
+        valores = list(RollupService.CONTADORES) + list(RollupService.SUMAS)
+        dialecto = db.get_bind().dialect.name
+        if dialecto in ("postgresql", "sqlite"):
+            if dialecto == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            stmt = upsert(tabla)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(RollupService.CLAVE),
+                set_={c: tabla.c[c] + stmt.excluded[c] for c in valores},
+            )
+            db.execute(stmt, registros)
+            return len(registros)
+
+        # Otros motores: leer y actualizar fila por fila
+        for registro in registros:
+            fila = db.query(ResumenMensualSede).filter_by(**{k: registro[k] for k in RollupService.CLAVE}).first()
+            if fila is None:
+                db.add(ResumenMensualSede(**registro))
+            else:
+                for c in valores:
+                    setattr(fila, c, getattr(fila, c) + registro[c])
+        return len(registros)
+
+    # ---------- Escrituras incrementales ----------
+    @staticmethod
+    def registrar_lote(db: Session,
+                       ternas: Iterable[Tuple[Seguimiento, Optional[EvaluacionNutricional], Infante]]) -> int:
+        """Agrega evaluaciones recién creadas (seguimiento, evaluación, infante). No hace commit."""
+        filas = [
+            {
+                "sede_id": infante.sede_id,
+                "fecha": seguimiento.fecha,
+                "fecha_nacimiento": infante.fecha_nacimiento,
+                "genero": infante.genero,
+                "z_peso_edad": evaluacion.peso_edad_zscore,
+                "z_talla_edad": evaluacion.talla_edad_zscore,
+                "z_imc_edad": evaluacion.imc_edad_zscore,
+            }
+            for seguimiento, evaluacion, infante in ternas
+            if evaluacion is not None and infante is not None and seguimiento.fecha is not None
+        ]
+        if not filas:
+            return 0
+        evaluaciones = pd.DataFrame(filas, columns=RollupService.COLUMNAS_ENTRADA)
+        return RollupService._acumular(db, RollupService.contribuciones(evaluaciones))
+
+    @staticmethod
+    def registrar(db: Session, seguimiento: Seguimiento, evaluacion: Optional[EvaluacionNutricional],
+                  infante: Infante) -> int:
+        return RollupService.registrar_lote(db, [(seguimiento, evaluacion, infante)])
+
+    @staticmethod
+    def _consulta(infante_id: Optional[int] = None):
+        E = EvaluacionNutricional
+        stmt = (
+            select(
+                Infante.sede_id,
+                Seguimiento.fecha,
+                Infante.fecha_nacimiento,
+                Infante.genero,
+                E.peso_edad_zscore.label("z_peso_edad"),
+                E.talla_edad_zscore.label("z_talla_edad"),
+                E.imc_edad_zscore.label("z_imc_edad"),
+            )
+            .join(Seguimiento, Seguimiento.id_seguimiento == E.seguimiento_id)
+            .join(Infante, Infante.id_infante == Seguimiento.infante_id)
+            .where(Seguimiento.fecha.is_not(None))
+        )
+        if infante_id is not None:
+            stmt = stmt.where(Infante.id_infante == infante_id)
+        return stmt
+
+    @staticmethod
+    def _infante(db: Session, infante_id: int, signo: int) -> int:
+        filas = db.execute(RollupService._consulta(infante_id)).all()
+        evaluaciones = pd.DataFrame.from_records(filas, columns=RollupService.COLUMNAS_ENTRADA)
+        return RollupService._acumular(db, RollupService.contribuciones(evaluaciones), signo=signo)
+
+    @staticmethod
+    def descontar_infante(db: Session, infante_id: int) -> int:
+        """Resta las evaluaciones de un infante (antes de eliminarlo o de cambiar su clave). No hace commit."""
+        return RollupService._infante(db, infante_id, -1)
+
+    @staticmethod
+    def registrar_infante(db: Session, infante_id: int) -> int:
+        """Vuelve a sumar las evaluaciones de un infante con sus datos actuales. No hace commit."""
+        return RollupService._infante(db, infante_id, 1)
+
+    # ---------- Reconstrucción ----------
+    @staticmethod
+    def reconstruir(db: Session) -> int:
+        """
+        Recalcula toda la tabla leyendo las evaluaciones por bloques (cursor del servidor) y
+        agregando en pandas. Hace commit y devuelve el número de filas del resumen.
+        """
+        from src.services.export_service import ExportService
+
+        parciales = [
+            RollupService.contribuciones(bloque)
+            for bloque in ExportService.iter_query(db, RollupService._consulta())
+        ]
+        total = (
+            pd.concat(parciales, ignore_index=True)
+            .groupby(list(RollupService.CLAVE), as_index=False, sort=False)
+            .sum()
+            if parciales else RollupService.contribuciones(pd.DataFrame())
+        )
+        db.execute(delete(ResumenMensualSede))
+        registros = RollupService._registros(total)
+        if registros:
+            db.execute(insert(ResumenMensualSede), registros)
+        db.commit()
+        return len(registros)
+
+    @staticmethod
+    def reconstruir_si_vacia(db: Session) -> Optional[int]:
+        """Reconstrucción al arrancar cuando la tabla es nueva y ya hay evaluaciones; None si no hizo falta"""
+        ResumenMensualSede.__table__.create(bind=db.get_bind(), checkfirst=True)
+        if db.query(ResumenMensualSede.id_resumen).first() is not None:
+            return None
+        if db.query(EvaluacionNutricional.id_evaluacion).first() is None:
+            return None
+        return RollupService.reconstruir(db)
+
+    # ---------- Lectura ----------
+    @staticmethod
+    def prevalencia(db: Session, sede_id: Optional[int] = None, desde: Optional[date] = None,
+                    hasta: Optional[date] = None, grupo_edad: Optional[str] = None,
+                    genero: Optional[str] = None, por_sede: bool = False) -> List[Dict[str, Any]]:
+        """Serie mensual de prevalencias (%) y media / DE de z-score, sumando los grupos filtrados"""
+        R = ResumenMensualSede
+        claves = [R.mes] + ([R.sede_id] if por_sede else [])
+        columnas = list(RollupService.CONTADORES) + list(RollupService.SUMAS)
+        stmt = select(*claves, *[func.sum(getattr(R, c)).label(c) for c in columnas])
+        if sede_id is not None:
+            stmt = stmt.where(R.sede_id == sede_id)
+        if desde is not None:
+            stmt = stmt.where(R.mes >= desde)
+        if hasta is not None:
+            stmt = stmt.where(R.mes <= hasta)
+        if grupo_edad:
+            stmt = stmt.where(R.grupo_edad == grupo_edad)
+        if genero:
+            stmt = stmt.where(R.genero == genero)
+        stmt = stmt.group_by(*claves).order_by(*claves)
+
+        serie = []
+        for fila in db.execute(stmt):
+            total = int(fila.evaluaciones or 0)
+            if total <= 0:
+                continue
+            punto: Dict[str, Any] = {"mes": fila.mes.strftime("%Y-%m"), "evaluaciones": total}
+            if por_sede:
+                punto["sede_id"] = fila.sede_id or None
+            punto["conteos"] = {c: int(getattr(fila, c) or 0) for c in RollupService.CONTADORES[1:]}
+            punto["prevalencia"] = {c: round(100.0 * n / total, 2) for c, n in punto["conteos"].items()}
+            zscores = {}
+            for indicador in RollupService.INDICADORES:
+                n = int(getattr(fila, f"n_{indicador}") or 0)
+                suma = float(getattr(fila, f"suma_z_{indicador}") or 0)
+                suma2 = float(getattr(fila, f"suma_z2_{indicador}") or 0)
+                media = suma / n if n else None
+                varianza = (suma2 - n * media * media) / (n - 1) if n > 1 else None
+                zscores[indicador] = {
+                    "n": n,
+                    "media": round(media, 3) if media is not None else None,
+                    "de": round(math.sqrt(max(varianza, 0.0)), 3) if varianza is not None else None,
+                }
+            punto["zscores"] = zscores
+            serie.append(punto)
+        return serie
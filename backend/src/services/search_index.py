@@ -0,0 +1,462 @@
+# backend/src/services/search_index.py
+# Índice de búsqueda global: todas las filas de todos los imports + tablas infantes y acudientes.
+#
+# - Vectorización sin estado (HashingVectorizer de n-gramas de caracteres, sin tildes):
+#   un documento nuevo no obliga a re-ajustar nada.
+# - df (frecuencia documental) incremental para ponderar la consulta con IDF.
+# - Matriz principal CSC (índice invertido): la consulta sólo lee las columnas de sus n-gramas.
+# - Upsert por clave ("infante:12", "acudiente:3", "import:<id>:<fila>"): la versión anterior
+#   queda marcada como borrada (tombstone) y se descarta en la siguiente consolidación.
+# - top-k con producto disperso + argpartition, filtrando por tipo, sede y fecha.
+# - Persistencia en DATA_DIR/_global (npz + json); si no existe se reconstruye desde la base.
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from src.services.vector_store import DATA_DIR, VectorStore, _store_lock, payload_to_text
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.path.join(DATA_DIR, "_global")
+N_FEATURES = 2 ** 20
+KINDS = ("infante", "acudiente", "import")
+# Filas pendientes antes de consolidar en la matriz principal (y persistir)
+CONSOLIDATE_EVERY = int(os.getenv("GLOBAL_INDEX_CONSOLIDATE_EVERY", "500"))
+JOURNAL = "journal.jsonl"
+JOURNAL_ROTATED = "journal.rotated.jsonl"
+
+
+def _to_ordinal(value: Any) -> int:
+    """Fecha -> ordinal (0 si no hay fecha)"""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).date().toordinal()
+    try:
+        return date.fromisoformat(str(value)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+def _to_int(value: Any, default: int = -1) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class GlobalSearchIndex:
+    """
+    Índice invertido en memoria con altas incrementales y persistencia en disco.
+
+    La matriz principal es CSC (columna = n-grama -> filas que lo contienen), así una consulta
+    sólo toca las columnas de sus n-gramas. Las altas recientes quedan en bloques CSR pendientes
+    hasta la siguiente consolidación.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        self.vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(3, 4),
+            n_features=N_FEATURES,
+            strip_accents="unicode",
+            lowercase=True,
+            alternate_sign=False,
+            norm=None,
+        )
+        self._lock = threading.RLock()
+        self._reset()
+        self.loaded = False
+
+    def _reset(self):
+        self.matrix = sparse.csc_matrix((0, N_FEATURES), dtype=np.float32)
+        self.keys: List[str] = []
+        self.titles: List[str] = []
+        self.kind = np.zeros(0, dtype=np.int8)
+        self.sede = np.zeros(0, dtype=np.int32)
+        self.fecha = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        # df incluye filas borradas hasta la siguiente compactación (sólo afecta levemente al IDF)
+        self.df = np.zeros(N_FEATURES, dtype=np.int32)
+        self.n_alive = 0
+        self._row_of: Dict[str, int] = {}
+        self._pending: List[sparse.csr_matrix] = []
+        self._pending_matrix: Optional[sparse.csr_matrix] = None
+
+    # ------------------------------------------------------------------ vectorización
+    def _vectorize(self, texts: List[str]) -> sparse.csr_matrix:
+        """tf sublineal normalizado L2 (la IDF se aplica a la consulta, así el df puede cambiar)"""
+        m = self.vectorizer.transform(texts).astype(np.float32)
+        m.data = 1.0 + np.log(m.data)
+        norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ m, dtype=np.float32)
+
+    # ------------------------------------------------------------------ altas / bajas
+    def upsert_many(self, docs: Iterable[Dict[str, Any]], journal: bool = True):
+        """
+        docs: dicts con key, kind, text, title, sede_id, fecha.
+        Las claves existentes se reemplazan (la fila anterior queda como tombstone).
+        Si una clave se repite dentro del lote, gana la última aparición.
+        """
+        por_clave: Dict[str, Dict[str, Any]] = {}
+        for d in map(_normalize_doc, docs):
+            por_clave.pop(d["key"], None)
+            por_clave[d["key"]] = d
+        docs = list(por_clave.values())
+        if not docs:
+            return
+        vectors = self._vectorize([d["text"] for d in docs])
+        with self._lock:
+            if journal:
+                self._journal([{"op": "upsert", "doc": d} for d in docs])
+            for d in docs:
+                self._tombstone(d["key"])
+            start = len(self.keys)
+            for i, d in enumerate(docs):
+                self._row_of[d["key"]] = start + i
+                self.keys.append(d["key"])
+                self.titles.append(d["title"])
+            self.kind = np.concatenate([self.kind, np.fromiter((KINDS.index(d["kind"]) for d in docs), np.int8, len(docs))])
+            self.sede = np.concatenate([self.sede, np.fromiter((d["sede_id"] for d in docs), np.int32, len(docs))])
+            self.fecha = np.concatenate([self.fecha, np.fromiter((_to_ordinal(d["fecha"]) for d in docs), np.int32, len(docs))])
+            self.alive = np.concatenate([self.alive, np.ones(len(docs), dtype=bool)])
+            self._pending.append(vectors)
+            self._pending_matrix = None
+            np.add.at(self.df, vectors.indices, 1)
+            self.n_alive += len(docs)
+            if journal and len(self.keys) - self.matrix.shape[0] >= CONSOLIDATE_EVERY:
+                self.save()
+
+    def upsert(self, key: str, kind: str, text: str, title: Optional[str] = None,
+               sede_id: Optional[int] = None, fecha: Any = None):
+        self.upsert_many([{"key": key, "kind": kind, "text": text, "title": title, "sede_id": sede_id, "fecha": fecha}])
+
+    def delete(self, key: str, journal: bool = True):
+        with self._lock:
+            if journal:
+                self._journal([{"op": "delete", "key": key}])
+            self._tombstone(key)
+
+    def _tombstone(self, key: str):
+        row = self._row_of.pop(key, None)
+        if row is not None and self.alive[row]:
+            self.alive[row] = False
+            self.n_alive -= 1
+
+    def _consolidate(self):
+        """Mueve las filas pendientes a la matriz CSC (y compacta si hay muchos tombstones)"""
+        if self._pending:
+            self.matrix = sparse.vstack([self.matrix.tocsr()] + self._pending, format="csc", dtype=np.float32)
+            self._pending, self._pending_matrix = [], None
+        dead = len(self.alive) - self.n_alive
+        if dead > 1000 and dead > 0.25 * len(self.alive):
+            keep = np.flatnonzero(self.alive)
+            self.matrix = self.matrix.tocsr()[keep].tocsc()
+            self.keys = [self.keys[i] for i in keep]
+            self.titles = [self.titles[i] for i in keep]
+            self.kind, self.sede, self.fecha = self.kind[keep], self.sede[keep], self.fecha[keep]
+            self.alive = np.ones(len(keep), dtype=bool)
+            self._row_of = {k: i for i, k in enumerate(self.keys)}
+            self.df = np.diff(self.matrix.indptr).astype(np.int32)
+
+    # ------------------------------------------------------------------ búsqueda
+    def search(self, query: str, top_k: int = 10, kinds: Optional[List[str]] = None,
+               sede_id: Optional[int] = None, fecha_desde: Optional[date] = None,
+               fecha_hasta: Optional[date] = None) -> List[Dict[str, Any]]:
+        q = self.vectorizer.transform([query])
+        if q.nnz == 0:
+            return []
+        with self._lock:
+            if self._pending and self._pending_matrix is None:
+                self._pending_matrix = sparse.vstack(self._pending, format="csr", dtype=np.float32)
+            matrix, pending = self.matrix, self._pending_matrix if self._pending else None
+            kind, sede, fecha, alive = self.kind, self.sede, self.fecha, self.alive.copy()
+            keys, titles = self.keys, self.titles
+            # Consulta ponderada con el IDF suavizado actual
+            n = len(alive)
+            weights = (1.0 + np.log(q.data)) * (np.log((1.0 + n) / (1.0 + self.df[q.indices])) + 1.0)
+        if not len(alive):
+            return []
+        weights = (weights / (np.linalg.norm(weights) or 1.0)).astype(np.float32)
+
+        mask = alive
+        if kinds:
+            mask &= np.isin(kind, [KINDS.index(k) for k in kinds if k in KINDS])
+        if sede_id is not None:
+            mask &= sede == sede_id
+        if fecha_desde is not None:
+            mask &= fecha >= fecha_desde.toordinal()
+        if fecha_hasta is not None:
+            mask &= (fecha > 0) & (fecha <= fecha_hasta.toordinal())
+
+        # Sólo las columnas de los n-gramas de la consulta
+        scores = matrix[:, q.indices] @ weights
+        if pending is not None:
+            scores = np.concatenate([scores, pending[:, q.indices] @ weights])
+        scores = np.where(mask, scores, -1.0)
+        return top_k_rows(scores, top_k, keys=keys, titles=titles, kind=kind, sede=sede, fecha=fecha)
+
+    # ------------------------------------------------------------------ persistencia
+    def _journal(self, entries: List[Dict[str, Any]]):
+        """Bitácora append-only: los cambios sobreviven a un reinicio sin reescribir la matriz"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with _store_lock(self.index_dir):
+            with open(os.path.join(self.index_dir, JOURNAL), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+
+    def _replay_journal(self, name: str = JOURNAL):
+        path = os.path.join(self.index_dir, name)
+        if not os.path.exists(path):
+            return
+        batch: List[Dict[str, Any]] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # última línea incompleta tras una caída
+                if entry["op"] == "upsert":
+                    batch.append(entry["doc"])
+                    continue
+                self.upsert_many(batch, journal=False)
+                batch = []
+                self.delete(entry["key"], journal=False)
+        self.upsert_many(batch, journal=False)
+
+    def _rotate_journal(self):
+        """
+        Aparta la bitácora actual (bajo el flock) para que las altas de otros procesos durante
+        el snapshot vayan a una bitácora nueva. Si quedó una rotada de un snapshot interrumpido,
+        la actual se le añade al final para conservar el orden.
+        """
+        journal = os.path.join(self.index_dir, JOURNAL)
+        rotated = os.path.join(self.index_dir, JOURNAL_ROTATED)
+        if not os.path.exists(journal):
+            return
+        if not os.path.exists(rotated):
+            os.replace(journal, rotated)
+            return
+        with open(journal, "r", encoding="utf-8") as src, open(rotated, "a", encoding="utf-8") as dst:
+            dst.write(src.read())
+        os.remove(journal)
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            with _store_lock(self.index_dir):
+                # Lo rotado puede incluir cambios de otros procesos: se aplican antes del snapshot
+                # (re-aplicar los propios es idempotente) y sólo entonces se borra lo rotado.
+                self._rotate_journal()
+                self._replay_journal(JOURNAL_ROTATED)
+                self._consolidate()
+                tmp = os.path.join(self.index_dir, "index.tmp.npz")
+                np.savez(
+                    tmp,
+                    data=self.matrix.data, indices=self.matrix.indices, indptr=self.matrix.indptr, n_rows=self.matrix.shape[0],
+                    kind=self.kind, sede=self.sede, fecha=self.fecha, alive=self.alive,
+                )
+                os.replace(tmp, os.path.join(self.index_dir, "index.npz"))
+                tmp = os.path.join(self.index_dir, "keys.tmp.json")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"keys": self.keys, "titles": self.titles}, f, ensure_ascii=False)
+                os.replace(tmp, os.path.join(self.index_dir, "keys.json"))
+                rotated = os.path.join(self.index_dir, JOURNAL_ROTATED)
+                if os.path.exists(rotated):
+                    os.remove(rotated)
+
+    def load(self) -> bool:
+        npz_path = os.path.join(self.index_dir, "index.npz")
+        keys_path = os.path.join(self.index_dir, "keys.json")
+        if not (os.path.exists(npz_path) and os.path.exists(keys_path)):
+            return False
+        with self._lock, _store_lock(self.index_dir):
+            self._reset()
+            arrays = np.load(npz_path)
+            with open(keys_path, "r", encoding="utf-8") as f:
+                names = json.load(f)
+            n_rows = int(arrays["n_rows"])
+            if len(names["keys"]) != n_rows:
+                logger.warning("Índice global inconsistente (%s filas vs %s claves); se reconstruirá", n_rows, len(names["keys"]))
+                return False
+            self.matrix = sparse.csc_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(n_rows, N_FEATURES))
+            self.kind, self.sede, self.fecha = arrays["kind"], arrays["sede"], arrays["fecha"]
+            self.alive = arrays["alive"].copy()
+            self.keys, self.titles = names["keys"], names["titles"]
+            self._row_of = {k: i for i, k in enumerate(self.keys) if self.alive[i]}
+            self.n_alive = int(self.alive.sum())
+            self.df = np.diff(self.matrix.indptr).astype(np.int32)
+            # Una bitácora rotada sólo sobrevive si un snapshot se interrumpió: va antes que la actual
+            self._replay_journal(JOURNAL_ROTATED)
+            self._replay_journal()
+            self.loaded = True
+        return True
+
+    def rebuild(self, db) -> int:
+        """Reconstruye el índice completo desde infantes, acudientes y todos los imports"""
+        from src.db.models import Acudiente, Infante
+
+        with self._lock:
+            self._reset()
+            docs = [infante_doc(i) for i in db.query(Infante).all()]
+            sede_by_acudiente = dict(
+                db.query(Infante.acudiente_id, Infante.sede_id).filter(Infante.acudiente_id.isnot(None)).all()
+            )
+            docs += [acudiente_doc(a, sede_by_acudiente.get(a.id_acudiente)) for a in db.query(Acudiente).all()]
+            self.upsert_many(docs, journal=False)
+            if os.path.isdir(DATA_DIR):
+                for import_id in os.listdir(DATA_DIR):
+                    if import_id.startswith("_"):
+                        continue
+                    store = VectorStore(import_id)
+                    if store.load():
+                        text_columns = (store.manifest or {}).get("text_columns")
+                        self.upsert_many(import_docs(import_id, store.payloads, created_at=_import_created_at(import_id),
+                                                     text_columns=text_columns), journal=False)
+            self.save()
+            self.loaded = True
+            return self.n_alive
+
+    def ensure_loaded(self, db=None) -> bool:
+        """Carga el índice de disco; si no existe y hay sesión, lo construye desde la base"""
+        if self.loaded:
+            return True
+        with self._lock:
+            if not self.loaded and not self.load() and db is not None:
+                self.rebuild(db)
+            return self.loaded
+
+
+def _normalize_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Documento serializable (para la bitácora) con tipos ya normalizados"""
+    text = doc.get("text") or ""
+    fecha = _to_ordinal(doc.get("fecha"))
+    return {
+        "key": doc["key"],
+        "kind": doc["kind"],
+        "text": text,
+        "title": doc.get("title") or text[:80],
+        "sede_id": _to_int(doc.get("sede_id")),
+        "fecha": date.fromordinal(fecha).isoformat() if fecha else None,
+    }
+
+
+def top_k_rows(scores: np.ndarray, top_k: int, **columns) -> List[Dict[str, Any]]:
+    """Las top_k filas con score > 0 (argpartition + orden sólo de los candidatos)"""
+    k = min(max(1, top_k), len(scores))
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    results = []
+    for i in candidates:
+        if scores[i] <= 0:
+            break
+        kind = KINDS[int(columns["kind"][i])]
+        key = columns["keys"][i]
+        fecha = int(columns["fecha"][i])
+        result = {
+            "key": key,
+            "kind": kind,
+            "title": columns["titles"][i],
+            "sede_id": int(columns["sede"][i]) if columns["sede"][i] >= 0 else None,
+            "fecha": date.fromordinal(fecha).isoformat() if fecha else None,
+            "score": round(float(scores[i]), 4),
+        }
+        if kind == "import":
+            _, import_id, row_index = key.split(":")
+            result.update(import_id=import_id, row_index=int(row_index))
+        else:
+            result["id"] = int(key.split(":")[1])
+        results.append(result)
+    return results
+
+
+# ------------------------------------------------------------------ documentos
+def infante_doc(infante, fecha: Any = None) -> Dict[str, Any]:
+    return {
+        "key": f"infante:{infante.id_infante}",
+        "kind": "infante",
+        "text": infante.nombre,
+        "title": infante.nombre,
+        "sede_id": infante.sede_id,
+        "fecha": fecha or infante.fecha_creado or infante.fecha_nacimiento,
+    }
+
+
+def acudiente_doc(acudiente, sede_id: Optional[int] = None, fecha: Any = None) -> Dict[str, Any]:
+    parts = [acudiente.nombre, acudiente.telefono, acudiente.correo]
+    return {
+        "key": f"acudiente:{acudiente.id_acudiente}",
+        "kind": "acudiente",
+        "text": " ".join(p for p in parts if p),
+        "title": acudiente.nombre,
+        "sede_id": sede_id,
+        "fecha": fecha or acudiente.fecha_creado,
+    }
+
+
+def import_docs(import_id: str, payloads, start: int = 0, created_at: Any = None,
+                text_columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """payloads son las filas del import a partir de la fila `start`"""
+    docs = []
+    for offset, row in enumerate(payloads):
+        text = payload_to_text(row, text_columns)
+        docs.append({
+            "key": f"import:{import_id}:{start + offset}",
+            "kind": "import",
+            "text": text,
+            "title": row.get("infante_nombre") or row.get("nombre") or text[:80],
+            "sede_id": row.get("sede_id"),
+            "fecha": row.get("seguimiento_fecha") or created_at,
+        })
+    return docs
+
+
+def _import_created_at(import_id: str) -> Optional[float]:
+    meta_path = os.path.join(DATA_DIR, import_id, "meta.json")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("created_at")
+    except (OSError, ValueError):
+        return None
+
+
+global_index = GlobalSearchIndex()
+
+
+# ------------------------------------------------------------------ hooks
+# Se llaman tras el commit; un fallo del índice nunca debe romper la operación principal.
+# Si el índice todavía no existe no hace falta nada: la reconstrucción leerá la base.
+def index_documents(docs: Iterable[Dict[str, Any]]) -> None:
+    try:
+        if global_index.ensure_loaded():
+            global_index.upsert_many(docs)
+    except Exception as e:
+        logger.warning("No se pudo actualizar el índice global: %s", e)
+
+
+def index_import_rows(import_id: str, payloads, start: int = 0, text_columns: Optional[List[str]] = None) -> None:
+    index_documents(import_docs(import_id, payloads, start=start,
+                                created_at=_import_created_at(import_id), text_columns=text_columns))
+
+
+def unindex(key: str) -> None:
+    try:
+        if global_index.ensure_loaded():
+            global_index.delete(key)
+    except Exception as e:
+        logger.warning("No se pudo quitar %s del índice global: %s", key, e)
@@ -0,0 +1,160 @@
+# backend/src/services/search_service.py
+import heapq
+from typing import Any, Dict, List, Optional, Set
+
+from sqlalchemy import func, or_, select, text, union
+from sqlalchemy.orm import Session
+
+from src.db.models import Acudiente, Infante, Sede, UltimaEvaluacionInfante, normalizar_nombre
+
+
+class SearchService:
+    """
+    Búsqueda de infantes por nombre propio o del acudiente, con ranking por similitud de trigramas.
+
+    En PostgreSQL con pg_trgm se filtra con el operador % (y LIKE para subcadenas), ambos
+    servidos por los índices GIN sobre nombre_busqueda; el resultado trae sede y último nivel
+    de riesgo en la misma consulta. Sin pg_trgm (SQLite en pruebas) se calcula la misma
+    similitud en Python sobre los candidatos.
+    """
+
+    # Umbral por defecto de pg_trgm.similarity_threshold (operador %)
+    UMBRAL_SIMILITUD = 0.3
+    # Caché por URL de la base: ¿está instalada la extensión?
+    _trgm_disponible: Dict[str, bool] = {}
+
+    @staticmethod
+    def trigramas(texto: str) -> Set[str]:
+        """Trigramas como pg_trgm: cada palabra con dos espacios al inicio y uno al final"""
+        resultado: Set[str] = set()
+        for palabra in texto.split():
+            relleno = f"  {palabra} "
+            resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+        return resultado
+
+    @staticmethod
+    def similitud(a: Optional[str], b: str) -> float:
+        """Equivalente a similarity() de pg_trgm: trigramas comunes / trigramas de ambos"""
+        ta, tb = SearchService.trigramas(a or ""), SearchService.trigramas(b)
+        if not ta or not tb:
+            return 0.0
+        return len(ta & tb) / len(ta | tb)
+
+    @staticmethod
+    def usa_trigram(db: Session) -> bool:
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return False
+        url = str(bind.url)
+        if url not in SearchService._trgm_disponible:
+            existe = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            SearchService._trgm_disponible[url] = existe is not None
+        return SearchService._trgm_disponible[url]
+
+    @staticmethod
+    def _columnas():
+        return (
+            Infante.id_infante,
+            Infante.nombre,
+            Infante.fecha_nacimiento,
+            Infante.genero,
+            Infante.sede_id,
+            Sede.nombre.label("sede_nombre"),
+            Acudiente.id_acudiente.label("acudiente_id"),
+            Acudiente.nombre.label("acudiente_nombre"),
+            UltimaEvaluacionInfante.nivel_riesgo,
+            UltimaEvaluacionInfante.fecha.label("fecha_ultima_evaluacion"),
+        )
+
+    @staticmethod
+    def _con_relaciones(stmt):
+        return (
+            stmt.select_from(Infante)
+            .outerjoin(Acudiente, Acudiente.id_acudiente == Infante.acudiente_id)
+            .outerjoin(Sede, Sede.id_sede == Infante.sede_id)
+            .outerjoin(UltimaEvaluacionInfante, UltimaEvaluacionInfante.infante_id == Infante.id_infante)
+        )
+
+    @staticmethod
+    def _resultado(fila, score_infante: float, score_acudiente: float) -> Dict[str, Any]:
+        return {
+            "id_infante": fila.id_infante,
+            "nombre": fila.nombre,
+            "fecha_nacimiento": fila.fecha_nacimiento.isoformat() if fila.fecha_nacimiento else None,
+            "genero": fila.genero,
+            "sede_id": fila.sede_id,
+            "sede_nombre": fila.sede_nombre,
+            "acudiente_id": fila.acudiente_id,
+            "acudiente_nombre": fila.acudiente_nombre,
+            "nivel_riesgo": fila.nivel_riesgo,
+            "fecha_ultima_evaluacion": fila.fecha_ultima_evaluacion.isoformat() if fila.fecha_ultima_evaluacion else None,
+            "coincidencia": "acudiente" if score_acudiente > score_infante else "infante",
+            "score": round(max(score_infante, score_acudiente), 4),
+        }
+
+    @staticmethod
+    def buscar_infantes(db: Session, q: str, sede_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        consulta = normalizar_nombre(q)
+        if not consulta:
+            return []
+        if SearchService.usa_trigram(db):
+            return SearchService._buscar_trigram(db, consulta, sede_id, limit)
+        return SearchService._buscar_python(db, consulta, sede_id, limit)
+
+    @staticmethod
+    def _buscar_trigram(db: Session, consulta: str, sede_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        def coincide(columna):
+            # % usa el índice GIN por similitud; LIKE cubre subcadenas cortas ("mar" en "maria")
+            return or_(columna.op("%")(consulta), columna.contains(consulta, autoescape=True))
+
+        # Cada rama filtra una sola tabla, así cada una usa su índice trigram
+        candidatos = union(
+            select(Infante.id_infante).where(coincide(Infante.nombre_busqueda)),
+            select(Infante.id_infante)
+            .join(Acudiente, Acudiente.id_acudiente == Infante.acudiente_id)
+            .where(coincide(Acudiente.nombre_busqueda)),
+        ).subquery()
+
+        score_infante = func.similarity(Infante.nombre_busqueda, consulta)
+        score_acudiente = func.coalesce(func.similarity(Acudiente.nombre_busqueda, consulta), 0.0)
+        stmt = SearchService._con_relaciones(
+            select(
+                *SearchService._columnas(),
+                score_infante.label("score_infante"),
+                score_acudiente.label("score_acudiente"),
+            )
+        ).where(Infante.id_infante.in_(select(candidatos.c.id_infante)))
+        if sede_id is not None:
+            stmt = stmt.where(Infante.sede_id == sede_id)
+        stmt = stmt.order_by(func.greatest(score_infante, score_acudiente).desc(), Infante.id_infante).limit(limit)
+
+        return [
+            SearchService._resultado(fila, float(fila.score_infante or 0), float(fila.score_acudiente or 0))
+            for fila in db.execute(stmt)
+        ]
+
+    @staticmethod
+    def _buscar_python(db: Session, consulta: str, sede_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        """Modo sin pg_trgm: recorre los infantes (con sus relaciones) y calcula la similitud en Python"""
+        stmt = SearchService._con_relaciones(
+            select(
+                *SearchService._columnas(),
+                Infante.nombre_busqueda.label("busqueda_infante"),
+                Acudiente.nombre_busqueda.label("busqueda_acudiente"),
+            )
+        )
+        if sede_id is not None:
+            stmt = stmt.where(Infante.sede_id == sede_id)
+
+        def coincide(valor: Optional[str], score: float) -> bool:
+            return bool(valor) and (score >= SearchService.UMBRAL_SIMILITUD or consulta in valor)
+
+        encontrados = []
+        for fila in db.execute(stmt.execution_options(yield_per=2000)):
+            s_inf = SearchService.similitud(fila.busqueda_infante, consulta)
+            s_acu = SearchService.similitud(fila.busqueda_acudiente, consulta)
+            if coincide(fila.busqueda_infante, s_inf) or coincide(fila.busqueda_acudiente, s_acu):
+                encontrados.append((max(s_inf, s_acu), -fila.id_infante, fila, s_inf, s_acu))
+
+        mejores = heapq.nlargest(limit, encontrados, key=lambda t: (t[0], t[1]))
+        return [SearchService._resultado(fila, s_inf, s_acu) for _, _, fila, s_inf, s_acu in mejores]
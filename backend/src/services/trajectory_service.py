@@ -0,0 +1,217 @@
+# backend/src/services/trajectory_service.py
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.db.models import DatoAntropometrico, Infante, Seguimiento
+from src.services.nutrition_service import NutritionService
+
+
+class TrajectoryService:
+    """
+    Trayectorias de crecimiento a partir del historial de seguimientos.
+
+    Todo se calcula sobre un DataFrame de visitas (una fila por seguimiento) con operaciones por
+    grupo vectorizadas, así el mismo código sirve para un infante o para toda una sede:
+    velocidades de peso y talla, cambio de z-score entre visitas, cruces de líneas de percentil
+    y una proyección lineal del siguiente valor.
+    """
+
+    # Líneas de percentil de las curvas OMS (P3, P15, P50, P85, P97) expresadas en z-score
+    LINEAS_PERCENTIL = np.array([-1.881, -1.036, 0.0, 1.036, 1.881])
+    # Caída de z-score entre visitas que se considera desaceleración (cruzar una banda de percentil)
+    UMBRAL_CAIDA_Z = -0.67
+    # Visitas más recientes usadas en la recta de proyección
+    PUNTOS_PROYECCION = 3
+    HORIZONTE_DIAS = 90
+
+    COLUMNAS_VISITA = ["infante_id", "id_seguimiento", "fecha", "fecha_nacimiento", "genero", "peso", "talla"]
+
+    @staticmethod
+    def cargar_visitas(db: Session, infante_id: Optional[int] = None, sede_id: Optional[int] = None) -> pd.DataFrame:
+        """Visitas con su primera medición antropométrica, en una sola consulta"""
+        primer_dato = (
+            select(func.min(DatoAntropometrico.id_dato))
+            .where(DatoAntropometrico.seguimiento_id == Seguimiento.id_seguimiento)
+            .correlate(Seguimiento)
+            .scalar_subquery()
+        )
+        stmt = (
+            select(
+                Seguimiento.infante_id,
+                Seguimiento.id_seguimiento,
+                Seguimiento.fecha,
+                Infante.fecha_nacimiento,
+                Infante.genero,
+                DatoAntropometrico.peso,
+                DatoAntropometrico.estatura.label("talla"),
+            )
+            .join(Infante, Infante.id_infante == Seguimiento.infante_id)
+            .outerjoin(DatoAntropometrico, DatoAntropometrico.id_dato == primer_dato)
+        )
+        if infante_id is not None:
+            stmt = stmt.where(Seguimiento.infante_id == infante_id)
+        if sede_id is not None:
+            stmt = stmt.where(Infante.sede_id == sede_id)
+        filas = db.execute(stmt).all()
+        return pd.DataFrame.from_records(filas, columns=TrajectoryService.COLUMNAS_VISITA)
+
+    @staticmethod
+    def calcular(visitas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Métricas por visita. Columnas de entrada: COLUMNAS_VISITA (genero 'M'/'F').
+        La primera visita de cada infante queda sin velocidades ni cambios (NaN).
+        """
+        df = visitas.copy()
+        if df.empty:
+            return df
+        df["fecha"] = pd.to_datetime(df["fecha"])
+        df["fecha_nacimiento"] = pd.to_datetime(df["fecha_nacimiento"])
+        df["peso"] = pd.to_numeric(df["peso"], errors="coerce").astype(float)
+        df["talla"] = pd.to_numeric(df["talla"], errors="coerce").astype(float)
+        # Peso o talla <= 0 son errores de captura: cuentan como medición faltante
+        df["peso"] = df["peso"].where(df["peso"] > 0)
+        df["talla"] = df["talla"].where(df["talla"] > 0)
+        df = df.sort_values(["infante_id", "fecha", "id_seguimiento"], kind="mergesort").reset_index(drop=True)
+
+        df["edad_dias"] = (df["fecha"] - df["fecha_nacimiento"]).dt.days.astype(float)
+        genero = df["genero"].map({"M": "male", "F": "female"}).to_numpy(dtype=object)
+        evaluacion = NutritionService.assess_nutritional_status_batch(
+            df["edad_dias"].to_numpy(), df["peso"].to_numpy(), df["talla"].to_numpy(), genero
+        )
+        # Un z-score no finito (p. ej. ±inf por una medida fuera de la curva) también es faltante
+        for columna, origen in (("z_peso_edad", "weight_for_age_zscore"), ("z_talla_edad", "height_for_age_zscore"),
+                                ("z_imc_edad", "bmi_for_age_zscore")):
+            z = evaluacion[origen].to_numpy(dtype=float)
+            df[columna] = np.where(np.isfinite(z), z, np.nan)
+
+        grupo = df.groupby("infante_id", sort=False)
+        dias = grupo["fecha"].diff().dt.days.astype(float)
+        df["dias_desde_anterior"] = dias
+        meses = dias.where(dias > 0) / NutritionService.DAYS_PER_MONTH
+        df["velocidad_peso_kg_mes"] = grupo["peso"].diff() / meses
+        df["velocidad_talla_cm_mes"] = grupo["talla"].diff() / meses
+
+        lineas = TrajectoryService.LINEAS_PERCENTIL
+        for indicador in ("peso_edad", "talla_edad", "imc_edad"):
+            z = df[f"z_{indicador}"]
+            anterior = grupo[f"z_{indicador}"].shift()
+            df[f"delta_z_{indicador}"] = z - anterior
+            # Líneas por debajo del valor: la diferencia entre visitas es el cruce con signo
+            nivel = np.searchsorted(lineas, z.to_numpy(), side="right").astype(float)
+            nivel_anterior = np.searchsorted(lineas, anterior.to_numpy(), side="right").astype(float)
+            cruces = nivel - nivel_anterior
+            cruces[np.isnan(z.to_numpy()) | np.isnan(anterior.to_numpy())] = np.nan
+            df[f"cruces_percentil_{indicador}"] = cruces
+        return df
+
+    @staticmethod
+    def _pendiente(df: pd.DataFrame, columna: str) -> pd.Series:
+        """Pendiente por mínimos cuadrados (por día) de columna vs. fecha en las últimas visitas"""
+        t = (df["fecha"] - df.groupby("infante_id")["fecha"].transform("min")).dt.days.astype(float)
+        y = df[columna]
+        valido = y.notna()
+        t, y = t.where(valido), y.where(valido)
+        g = pd.DataFrame({"infante_id": df["infante_id"], "t": t, "y": y}).groupby("infante_id")
+        t_media, y_media = g["t"].transform("mean"), g["y"].transform("mean")
+        dt = t - t_media
+        partes = pd.DataFrame({
+            "infante_id": df["infante_id"],
+            "sxy": dt * (y - y_media),
+            "sxx": dt * dt,
+        }).groupby("infante_id")
+        sxx = partes["sxx"].sum(min_count=1)
+        return (partes["sxy"].sum(min_count=1) / sxx.where(sxx > 0))
+
+    @staticmethod
+    def resumir(trayectoria: pd.DataFrame, horizonte_dias: int = HORIZONTE_DIAS) -> pd.DataFrame:
+        """
+        Una fila por infante: última visita, cambios respecto de la anterior, proyección a
+        horizonte_dias (recta por las últimas PUNTOS_PROYECCION visitas) y alerta de crecimiento.
+        """
+        if trayectoria.empty:
+            return pd.DataFrame()
+        ultimas = trayectoria.groupby("infante_id", sort=False).tail(TrajectoryService.PUNTOS_PROYECCION)
+        pendiente_peso = TrajectoryService._pendiente(ultimas, "peso")
+        pendiente_talla = TrajectoryService._pendiente(ultimas, "talla")
+        pendiente_z_peso = TrajectoryService._pendiente(ultimas, "z_peso_edad")
+
+        resumen = trayectoria.groupby("infante_id", sort=False).tail(1).set_index("infante_id")
+        resumen["visitas"] = trayectoria.groupby("infante_id", sort=False).size()
+        resumen["peso_proyectado"] = resumen["peso"] + pendiente_peso * horizonte_dias
+        resumen["talla_proyectada"] = resumen["talla"] + pendiente_talla * horizonte_dias
+        resumen["z_peso_edad_proyectado"] = resumen["z_peso_edad"] + pendiente_z_peso * horizonte_dias
+        resumen["fecha_proyeccion"] = resumen["fecha"] + pd.Timedelta(days=horizonte_dias)
+
+        umbral = TrajectoryService.UMBRAL_CAIDA_Z
+        motivos = pd.DataFrame({
+            "caida_z_peso": resumen["delta_z_peso_edad"] <= umbral,
+            "caida_z_talla": resumen["delta_z_talla_edad"] <= umbral,
+            "cruce_percentil_peso": resumen["cruces_percentil_peso_edad"] < 0,
+            "perdida_peso": resumen["velocidad_peso_kg_mes"] < 0,
+        }, index=resumen.index)
+        resumen["alerta_crecimiento"] = motivos.any(axis=1)
+        resumen["motivos"] = [list(motivos.columns[fila]) for fila in motivos.to_numpy()]
+        return resumen.reset_index()
+
+    # ---------- Serialización para la API ----------
+    @staticmethod
+    def _valor(value):
+        if value is None or value is pd.NaT:
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.date().isoformat()
+        if isinstance(value, (float, np.floating)):
+            return None if np.isnan(value) else round(float(value), 3)
+        if isinstance(value, np.integer):
+            return int(value)
+        if isinstance(value, np.bool_):
+            return bool(value)
+        return value
+
+    @staticmethod
+    def _registros(df: pd.DataFrame, columnas: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {c: TrajectoryService._valor(v) for c, v in zip(columnas, fila)}
+            for fila in df[columnas].itertuples(index=False, name=None)
+        ]
+
+    PUNTO = [
+        "id_seguimiento", "fecha", "edad_dias", "peso", "talla", "z_peso_edad", "z_talla_edad", "z_imc_edad",
+        "dias_desde_anterior", "velocidad_peso_kg_mes", "velocidad_talla_cm_mes",
+        "delta_z_peso_edad", "delta_z_talla_edad", "delta_z_imc_edad",
+        "cruces_percentil_peso_edad", "cruces_percentil_talla_edad", "cruces_percentil_imc_edad",
+    ]
+    RESUMEN = [
+        "infante_id", "visitas", "id_seguimiento", "fecha", "peso", "talla",
+        "z_peso_edad", "z_talla_edad", "z_imc_edad",
+        "velocidad_peso_kg_mes", "velocidad_talla_cm_mes", "delta_z_peso_edad", "delta_z_talla_edad",
+        "cruces_percentil_peso_edad", "cruces_percentil_talla_edad",
+        "fecha_proyeccion", "peso_proyectado", "talla_proyectada", "z_peso_edad_proyectado",
+        "alerta_crecimiento", "motivos",
+    ]
+
+    @staticmethod
+    def infante(db: Session, infante_id: int, horizonte_dias: int = HORIZONTE_DIAS) -> Dict[str, Any]:
+        trayectoria = TrajectoryService.calcular(TrajectoryService.cargar_visitas(db, infante_id=infante_id))
+        resumen = TrajectoryService.resumir(trayectoria, horizonte_dias)
+        return {
+            "infante_id": infante_id,
+            "puntos": TrajectoryService._registros(trayectoria, TrajectoryService.PUNTO),
+            "resumen": TrajectoryService._registros(resumen, TrajectoryService.RESUMEN)[0] if not resumen.empty else None,
+        }
+
+    @staticmethod
+    def sede(db: Session, sede_id: Optional[int] = None, solo_alertas: bool = False,
+             horizonte_dias: int = HORIZONTE_DIAS) -> List[Dict[str, Any]]:
+        """Resumen de todos los infantes de una sede (o de todas) en una pasada"""
+        trayectoria = TrajectoryService.calcular(TrajectoryService.cargar_visitas(db, sede_id=sede_id))
+        resumen = TrajectoryService.resumir(trayectoria, horizonte_dias)
+        if resumen.empty:
+            return []
+        if solo_alertas:
+            resumen = resumen[resumen["alerta_crecimiento"]]
+        return TrajectoryService._registros(resumen, TrajectoryService.RESUMEN)
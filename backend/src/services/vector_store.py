@@ -0,0 +1,940 @@
+# backend/src/services/vector_store.py
+# "Vector store" ligero (TF-IDF) persistido por import_id + caché de proceso.
+# Lo usan /import/excel, /import/append, /import/search y /reports.
+
+from __future__ import annotations
+
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+try:
+    import fcntl  # bloqueo entre procesos (workers de uvicorn/gunicorn)
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.getenv("VECTOR_DATA_DIR", "./data/imports")  # carpeta base de persistencia
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Memoria máxima (MB) de los stores cargados en la caché de proceso
+VECTOR_CACHE_MAX_MB = float(os.getenv("VECTOR_CACHE_MAX_MB", "256"))
+
+# Compactación (re-ajuste del TF-IDF) tras appends:
+# - inmediata si el vocabulario delta o las filas añadidas superan esta fracción
+# - en cualquier caso, cada VECTOR_COMPACT_INTERVAL_S segundos para los stores con appends
+VECTOR_COMPACT_RATIO = float(os.getenv("VECTOR_COMPACT_RATIO", "0.2"))
+VECTOR_COMPACT_INTERVAL_S = float(os.getenv("VECTOR_COMPACT_INTERVAL_S", "300"))
+
+
+# --------------------------------------------------------------------------------------
+# Formato binario (v3)
+# --------------------------------------------------------------------------------------
+# manifest.json            -> metadatos (filas, términos, nnz, generación, vocabulario delta, columnas)
+# terms.<g>.bin/.idx       -> términos ordenados (utf-8 concatenado) + offsets int64 (n_terms + 1)
+# idf.<g>.f32              -> IDF float32 en el orden de las columnas de la matriz
+# csr_data.<g>.f32, csr_indices.<g>.bin, csr_indptr.<g>.bin -> buffers CSR (int32 o int64)
+# payload_<j>.bin/.idx     -> valores utf-8 de la columna j + offsets int64 (n_rows + 1)
+# texts.bin/.idx           -> texto vectorizado de cada fila (para re-ajustar en la compactación)
+# Todo se abre con np.memmap: la carga no depende del tamaño y las páginas se comparten entre workers.
+# Los appends escriben al final de los archivos y el manifest (escrito al final) fija cuántos elementos
+# son válidos. La compactación escribe una generación <g> nueva de términos/IDF/matriz.
+# v2 (generación 0, sin sufijo): payload.bin + payload.idx (n_cols, n_rows + 1), sin texts.
+FORMAT_VERSION = 3
+
+
+def _open_array(path: str, dtype, shape=None) -> np.ndarray:
+    """np.memmap de solo lectura (np.memmap no admite archivos vacíos)"""
+    count = int(np.prod(shape)) if shape is not None else None
+    if count == 0 or os.path.getsize(path) == 0:
+        return np.zeros(shape if shape is not None else 0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _write_atomic(path: str, data: bytes):
+    # Escribir a un temporal y reemplazar: los lectores con el archivo mapeado conservan el inodo anterior
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _append_bytes(path: str, valid_size: int, data: bytes):
+    """
+    Añade data tras los primeros valid_size bytes (lo que el manifest da por válido).
+    Si un append anterior quedó a medias, su cola se descarta.
+    """
+    with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+        f.truncate(valid_size)
+        f.seek(valid_size)
+        f.write(data)
+
+
+def _encode_strings(values: Iterable[str]) -> Tuple[bytes, np.ndarray]:
+    """Concatena cadenas utf-8 y devuelve (blob, offsets) con offsets de tamaño len(values) + 1"""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def payload_to_text(payload: Dict[str, str], text_columns: Optional[List[str]] = None) -> str:
+    """Texto que se vectoriza para una fila (mismo criterio que dataframe_to_texts)"""
+    parts = [payload.get(col, "") for col in text_columns] if text_columns else [v for v in payload.values() if str(v).strip()]
+    text = " | ".join([p.strip() for p in parts if p and p.strip()])
+    return text if text else "(fila vacía)"
+
+
+class StringColumn(Sequence):
+    """Columna de cadenas mapeada en memoria: blob utf-8 + offsets (n + 1)"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return max(0, len(self._offsets) - 1)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        """Todos los valores (una sola lectura contigua del blob)"""
+        if len(self) == 0:
+            return []
+        offs = np.asarray(self._offsets)
+        start = int(offs[0])
+        buf = self._blob[start:int(offs[-1])].tobytes()
+        rel = (offs - start).tolist()
+        return [buf[a:b].decode("utf-8") for a, b in zip(rel[:-1], rel[1:])]
+
+
+class PayloadColumns(Sequence):
+    """
+    Payloads en formato columnar mapeado en memoria.
+    store.payloads[i] devuelve el dict de la fila i (como en el formato JSON).
+    """
+
+    def __init__(self, columns: List[str], data: List[StringColumn], n_rows: int):
+        self.columns = columns
+        self._data = data
+        self._n_rows = n_rows
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {col: data[i] for col, data in zip(self.columns, self._data)}
+
+    def column(self, name: str) -> List[str]:
+        return self._data[self.columns.index(name)].tolist()
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({col: data.tolist() for col, data in zip(self.columns, self._data)})
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextlib.contextmanager
+def _store_lock(base: str):
+    """Exclusión de escritores sobre un store: lock de hilo + flock sobre .lock (entre procesos)"""
+    with _thread_locks_guard:
+        lock = _thread_locks.setdefault(base, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(base, ".lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+# --------------------------------------------------------------------------------------
+# VectorStore (persistencia simple por import_id)
+# --------------------------------------------------------------------------------------
+class VectorStore:
+    """
+    "Vector DB" simple por import_id.
+    Persiste en formato binario mapeable (ver arriba) + meta.json.
+    Admite appends sin re-ajustar: los términos nuevos van a un vocabulario delta
+    (IDF suavizado con el nº de filas actual) hasta la siguiente compactación.
+    Los imports antiguos (vocab.json, matrix.npz, payload.json) se siguen pudiendo leer.
+    """
+
+    # Consultas por producto matriz-matriz en search_batch
+    SEARCH_BATCH = 1024
+
+    MATRIX_FILES = ("terms.bin", "terms.idx", "idf.f32", "csr_data.f32", "csr_indices.bin", "csr_indptr.bin")
+
+    def __init__(self, import_id: str):
+        self.import_id = import_id
+        self.base = os.path.join(DATA_DIR, import_id)
+        self.meta_path = os.path.join(self.base, "meta.json")
+        self.manifest_path = os.path.join(self.base, "manifest.json")
+        # formato JSON (v1)
+        self.vocab_path = os.path.join(self.base, "vocab.json")
+        self.matrix_path = os.path.join(self.base, "matrix.npz")
+        self.payload_path = os.path.join(self.base, "payload.json")
+        os.makedirs(self.base, exist_ok=True)
+
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.matrix = None  # scipy.sparse o ndarray
+        self.payloads: Sequence[Dict[str, str]] = []
+        self.texts: Optional[StringColumn] = None
+        self.manifest: Optional[Dict] = None
+        self.mmapped = False
+        self._analyzer = None
+        self._terms_blob = None
+        self._terms_offsets = None
+        self._idf = None
+        self._delta_index: Dict[str, int] = {}
+        self._delta_idf = np.zeros(0, dtype=np.float32)
+        self._inv_norms: Optional[np.ndarray] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.base, name)
+
+    def _matrix_path(self, name: str, generation: int) -> str:
+        # generación 0 = formato v2 (sin sufijo)
+        if generation == 0:
+            return self._path(name)
+        stem, ext = name.split(".", 1)
+        return self._path(f"{stem}.{generation}.{ext}")
+
+    def _read_manifest(self) -> Optional[Dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict):
+        # El manifest se escribe al final: si existe, el resto de archivos está completo
+        _write_atomic(self.manifest_path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+        vector_store_cache.invalidate(self.import_id)
+
+    # ---------------------------------------------------------------- escritura completa
+    def save(self, vectorizer: TfidfVectorizer, matrix, payloads: List[Dict[str, str]],
+             texts: Optional[List[str]] = None, text_columns: Optional[List[str]] = None):
+        with _store_lock(self.base):
+            previous = self._read_manifest() or {}
+            generation = previous.get("generation", 0) + 1
+            manifest = self._write_matrix(vectorizer, matrix, generation)
+
+            columns: List[str] = []
+            for row in payloads:
+                for key in row:
+                    if key not in columns:
+                        columns.append(key)
+            for j, col in enumerate(columns):
+                blob, offsets = _encode_strings(str(row.get(col, "")) for row in payloads)
+                _write_atomic(self._path(f"payload_{j}.bin"), blob)
+                _write_atomic(self._path(f"payload_{j}.idx"), offsets.tobytes())
+
+            if texts is None:
+                texts = [payload_to_text(row, text_columns) for row in payloads]
+            blob, offsets = _encode_strings(texts)
+            _write_atomic(self._path("texts.bin"), blob)
+            _write_atomic(self._path("texts.idx"), offsets.tobytes())
+
+            manifest.update({
+                "format": FORMAT_VERSION,
+                "columns": columns,
+                "text_columns": text_columns,
+                "fitted_rows": manifest["n_rows"],
+                "appended_rows": 0,
+            })
+            self._write_manifest(manifest)
+            self._remove_stale(previous, manifest)
+
+        self._open_binary(manifest)
+
+    def _write_matrix(self, vectorizer: TfidfVectorizer, matrix, generation: int) -> Dict:
+        """Escribe términos, IDF y CSR de una generación; devuelve la parte del manifest"""
+        from scipy import sparse
+
+        # Términos ordenados; sklearn ya asigna las columnas en orden alfabético,
+        # pero se reordena la matriz por si el vocabulario viene de otra fuente
+        terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+        order = np.argsort(np.array(terms, dtype=object), kind="stable") if terms else np.zeros(0, dtype=np.int64)
+        csr = sparse.csr_matrix(matrix, dtype=np.float32, copy=True)
+        if len(order) and not np.array_equal(order, np.arange(len(order))):
+            csr = csr[:, order]
+            terms = [terms[i] for i in order]
+            idf = np.asarray(vectorizer.idf_, dtype=np.float32)[order]
+        else:
+            idf = np.asarray(vectorizer.idf_, dtype=np.float32)
+        csr.sort_indices()
+
+        index_dtype = np.int32 if csr.nnz < np.iinfo(np.int32).max // 2 else np.int64
+        terms_blob, terms_offsets = _encode_strings(terms)
+
+        _write_atomic(self._matrix_path("terms.bin", generation), terms_blob)
+        _write_atomic(self._matrix_path("terms.idx", generation), terms_offsets.tobytes())
+        _write_atomic(self._matrix_path("idf.f32", generation), idf.tobytes())
+        _write_atomic(self._matrix_path("csr_data.f32", generation), csr.data.astype(np.float32).tobytes())
+        _write_atomic(self._matrix_path("csr_indices.bin", generation), csr.indices.astype(index_dtype).tobytes())
+        _write_atomic(self._matrix_path("csr_indptr.bin", generation), csr.indptr.astype(index_dtype).tobytes())
+
+        return {
+            "generation": generation,
+            "n_rows": int(csr.shape[0]),
+            "n_terms": len(terms),
+            "nnz": int(csr.nnz),
+            "index_dtype": np.dtype(index_dtype).name,
+            "delta_terms": [],
+            "delta_df": [],
+            "lowercase": vectorizer.lowercase,
+            "ngram_range": list(vectorizer.ngram_range),
+            "norm": vectorizer.norm,
+        }
+
+    def _remove_stale(self, previous: Dict, manifest: Dict):
+        """Borra archivos de generaciones anteriores y del formato JSON/v2"""
+        stale = [self.vocab_path, self.matrix_path, self.payload_path]
+        if previous and previous.get("generation", 0) != manifest["generation"]:
+            stale += [self._matrix_path(name, previous.get("generation", 0)) for name in self.MATRIX_FILES]
+        if previous.get("format", FORMAT_VERSION) < 3:
+            stale += [self._path("payload.bin"), self._path("payload.idx")]
+        for path in stale:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    # ---------------------------------------------------------------- lectura
+    def load(self) -> bool:
+        self._inv_norms = None
+        manifest = self._read_manifest()
+        if manifest is None:
+            return self._load_legacy()
+        try:
+            self._open_binary(manifest)
+        except FileNotFoundError:
+            # Una compactación concurrente reemplazó la generación: releer el manifest
+            manifest = self._read_manifest()
+            if manifest is None:
+                return False
+            self._open_binary(manifest)
+        return True
+
+    def _open_binary(self, manifest: Dict):
+        from scipy import sparse
+
+        generation = manifest.get("generation", 0)
+        n_rows, n_terms, nnz = manifest["n_rows"], manifest["n_terms"], manifest["nnz"]
+        delta_terms = manifest.get("delta_terms", [])
+        index_dtype = np.dtype(manifest.get("index_dtype", "int32"))
+
+        self._terms_blob = _open_array(self._matrix_path("terms.bin", generation), np.uint8)
+        self._terms_offsets = _open_array(self._matrix_path("terms.idx", generation), np.int64, shape=(n_terms + 1,))
+        self._idf = _open_array(self._matrix_path("idf.f32", generation), np.float32, shape=(n_terms,))
+
+        # Los archivos pueden tener más elementos que los del manifest (append en curso)
+        data = _open_array(self._matrix_path("csr_data.f32", generation), np.float32, shape=(nnz,))
+        indices = _open_array(self._matrix_path("csr_indices.bin", generation), index_dtype, shape=(nnz,))
+        indptr = _open_array(self._matrix_path("csr_indptr.bin", generation), index_dtype, shape=(n_rows + 1,))
+        matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_terms + len(delta_terms)), copy=False)
+
+        columns = manifest.get("columns", [])
+        if manifest.get("format", 2) >= 3:
+            data_cols = [
+                StringColumn(
+                    _open_array(self._path(f"payload_{j}.bin"), np.uint8),
+                    _open_array(self._path(f"payload_{j}.idx"), np.int64, shape=(n_rows + 1,)),
+                )
+                for j in range(len(columns))
+            ]
+            texts = StringColumn(
+                _open_array(self._path("texts.bin"), np.uint8),
+                _open_array(self._path("texts.idx"), np.int64, shape=(n_rows + 1,)),
+            )
+        else:
+            blob = _open_array(self._path("payload.bin"), np.uint8)
+            offsets = _open_array(self._path("payload.idx"), np.int64, shape=(len(columns), n_rows + 1))
+            data_cols = [StringColumn(blob, offsets[j]) for j in range(len(columns))]
+            texts = None
+
+        self.manifest = manifest
+        self.mmapped = True
+        self.matrix = matrix
+        self.payloads = PayloadColumns(columns, data_cols, n_rows)
+        self.texts = texts
+        self._delta_index = {term: n_terms + k for k, term in enumerate(delta_terms)}
+        self._delta_idf = self._smoothed_idf(np.asarray(manifest.get("delta_df", []), dtype=np.float64), n_rows)
+
+        # Solo se necesita el analizador (tokenización + n-gramas), no el vocabulario en un dict
+        self._analyzer = TfidfVectorizer(
+            lowercase=manifest.get("lowercase", True),
+            ngram_range=tuple(manifest.get("ngram_range", (1, 1))),
+        ).build_analyzer()
+        self.vectorizer = None
+
+    def _load_legacy(self) -> bool:
+        if not (os.path.exists(self.vocab_path) and os.path.exists(self.matrix_path) and os.path.exists(self.payload_path)):
+            return False
+
+        with open(self.vocab_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        vec = TfidfVectorizer(
+            lowercase=data.get("lowercase", True),
+            ngram_range=tuple(data.get("ngram_range", (1, 1))),
+            norm=data.get("norm", "l2"),
+        )
+        vec.vocabulary_ = {k: int(v) for k, v in data["vocabulary_"].items()}
+        vec.idf_ = np.array(data["idf_"])
+        vec._tfidf._idf_diag = None
+        self.vectorizer = vec
+
+        try:
+            from scipy import sparse
+            try:
+                self.matrix = sparse.load_npz(self.matrix_path)
+            except Exception:
+                arr = np.load(self.matrix_path)["matrix"]
+                self.matrix = sparse.csr_matrix(arr)
+        except Exception:
+            arr = np.load(self.matrix_path)["matrix"]
+            self.matrix = arr
+
+        with open(self.payload_path, "r", encoding="utf-8") as f:
+            self.payloads = json.load(f)
+
+        self.manifest = None
+        self.mmapped = False
+        return True
+
+    # ---------------------------------------------------------------- vectorización
+    @staticmethod
+    def _smoothed_idf(df: np.ndarray, n_rows: int) -> np.ndarray:
+        """IDF suavizado de sklearn: ln((1 + n) / (1 + df)) + 1"""
+        return (np.log((1.0 + n_rows) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    def term_index(self, term: str) -> int:
+        """Columna del término (búsqueda binaria sobre terms.bin, luego vocabulario delta); -1 si no existe"""
+        target = term.encode("utf-8")
+        offsets, blob = self._terms_offsets, self._terms_blob
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = blob[offsets[mid]:offsets[mid + 1]].tobytes()
+            if current < target:
+                lo = mid + 1
+            elif current > target:
+                hi = mid
+            else:
+                return mid
+        return self._delta_index.get(term, -1)
+
+    def term_indices(self, terms: List[str]) -> np.ndarray:
+        """
+        term_index para varios términos: búsqueda binaria directa sobre terms.bin/terms.idx
+        mapeados (sin copiar el vocabulario). Los términos se recorren ordenados, así cada
+        búsqueda arranca donde terminó la anterior.
+        """
+        offsets, blob = self._terms_offsets, memoryview(self._terms_blob)
+        n_terms = len(offsets) - 1
+        out = np.full(len(terms), -1, dtype=np.int64)
+        encoded = [t.encode("utf-8") for t in terms]
+        lo = 0
+        for i in sorted(range(len(terms)), key=encoded.__getitem__):
+            target, hi = encoded[i], n_terms
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if bytes(blob[offsets[mid]:offsets[mid + 1]]) < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo < n_terms and bytes(blob[offsets[lo]:offsets[lo + 1]]) == target:
+                out[i] = lo
+            else:
+                out[i] = self._delta_index.get(terms[i], -1)
+        return out
+
+    def _idf_of(self, cols: np.ndarray) -> np.ndarray:
+        n_terms = self.manifest["n_terms"]
+        base = cols < n_terms
+        out = np.empty(len(cols), dtype=np.float32)
+        out[base] = self._idf[cols[base]]
+        out[~base] = self._delta_idf[cols[~base] - n_terms]
+        return out
+
+    def _row_vector(self, counts: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(columnas ordenadas, valores tf-idf normalizados L2) de una fila"""
+        cols = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        values = np.array([counts[c] for c in cols.tolist()], dtype=np.float32) * self._idf_of(cols)
+        if self.manifest.get("norm", "l2") == "l2":
+            norm = np.linalg.norm(values)
+            if norm > 0:
+                values /= norm
+        return cols, values
+
+    def transform_query(self, query: str):
+        """Vector TF-IDF (1 x n_columnas, normalizado L2) de una consulta"""
+        return self.transform_queries([query])
+
+    def transform_queries(self, queries: List[str]):
+        """Matriz TF-IDF (n_consultas x n_columnas, filas normalizadas L2)"""
+        from scipy import sparse
+
+        if not self.mmapped:
+            return self.vectorizer.transform(queries)
+
+        tokens = [self._analyzer(query) for query in queries]
+        unique = list({t for row in tokens for t in row})
+        lookup = dict(zip(unique, self.term_indices(unique).tolist())) if unique else {}
+
+        data, indices, indptr = [], [], [0]
+        for row in tokens:
+            counts: Dict[int, int] = {}
+            for token in row:
+                idx = lookup[token]
+                if idx >= 0:
+                    counts[idx] = counts.get(idx, 0) + 1
+            cols, values = self._row_vector(counts)
+            indices.append(cols)
+            data.append(values)
+            indptr.append(indptr[-1] + len(cols))
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.zeros(0, dtype=np.float32),
+                np.concatenate(indices) if indices else np.zeros(0, dtype=np.int64),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(queries), self.matrix.shape[1]),
+        )
+
+    def _row_scale(self) -> Optional[np.ndarray]:
+        """1/‖fila‖ si la matriz no se guardó normalizada L2 (None si ya lo está)"""
+        norm = self.manifest.get("norm", "l2") if self.manifest else getattr(self.vectorizer, "norm", "l2")
+        if norm == "l2":
+            return None
+        if self._inv_norms is None:
+            sq = np.asarray(self.matrix.multiply(self.matrix).sum(axis=1)).ravel()
+            with np.errstate(divide="ignore"):
+                self._inv_norms = np.where(sq > 0, 1.0 / np.sqrt(sq), 0.0).astype(np.float32)
+        return self._inv_norms
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        return self.search_batch([query], top_k=top_k)[0]
+
+    def search_batch(self, queries: List[str], top_k: int = 5) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k por consulta con un único producto disperso matriz-matriz (filas ya normalizadas,
+        así el producto punto es el coseno) y selección con argpartition.
+        Sólo se devuelven filas con similitud > 0.
+        """
+        from scipy import sparse
+
+        if self.matrix is None or (not self.mmapped and not self.vectorizer):
+            raise RuntimeError("Vector store no cargado")
+        matrix = self.matrix if sparse.issparse(self.matrix) else sparse.csr_matrix(self.matrix)
+        scale = self._row_scale()
+        top_k = max(1, top_k)
+
+        results: List[List[Tuple[int, float]]] = []
+        for start in range(0, len(queries), self.SEARCH_BATCH):
+            q = self.transform_queries(queries[start:start + self.SEARCH_BATCH])
+            # (filas x consultas): cada fila del store recorre sólo las consultas que comparten términos
+            sims = (matrix @ q.T.tocsr()).T.tocsr()
+            for i in range(sims.shape[0]):
+                lo, hi = sims.indptr[i], sims.indptr[i + 1]
+                cols, vals = sims.indices[lo:hi], sims.data[lo:hi]
+                if scale is not None:
+                    vals = vals * scale[cols]
+                if len(vals) > top_k:
+                    part = np.argpartition(-vals, top_k - 1)[:top_k]
+                    cols, vals = cols[part], vals[part]
+                order = np.lexsort((cols, -vals))
+                results.append([(int(cols[j]), float(vals[j])) for j in order if vals[j] > 0])
+        return results
+
+    # ---------------------------------------------------------------- append / compactación
+    def append(self, payloads: List[Dict[str, str]], texts: Optional[List[str]] = None) -> Dict:
+        """
+        Añade filas sin re-ajustar el TF-IDF: se vectorizan con el vocabulario existente
+        y los términos nuevos se agregan al vocabulario delta. Devuelve el manifest resultante.
+        """
+        if not payloads:
+            return self.manifest or {}
+
+        with _store_lock(self.base):
+            manifest = self._read_manifest()
+            if manifest is None or manifest.get("format", 2) < 3:
+                # JSON (v1) o v2 sin textos: se reescribe una vez en v3 y se sigue con el append
+                manifest = self._upgrade_locked(manifest)
+            self._open_binary(manifest)
+            if texts is None:
+                texts = [payload_to_text(row, manifest.get("text_columns")) for row in payloads]
+
+            n_rows, n_terms, nnz = manifest["n_rows"], manifest["n_terms"], manifest["nnz"]
+            delta_terms: List[str] = list(manifest.get("delta_terms", []))
+            delta_df: List[int] = list(manifest.get("delta_df", []))
+            new_rows = n_rows + len(payloads)
+
+            # 1) Tokenizar y resolver columnas (términos nuevos -> vocabulario delta)
+            lookup: Dict[str, int] = {}
+            row_counts: List[Dict[int, int]] = []
+            for text in texts:
+                counts: Dict[int, int] = {}
+                for token in self._analyzer(text):
+                    col = lookup.get(token)
+                    if col is None:
+                        col = self.term_index(token)
+                        if col < 0:
+                            col = n_terms + len(delta_terms)
+                            delta_terms.append(token)
+                            delta_df.append(0)
+                            self._delta_index[token] = col
+                        lookup[token] = col
+                    counts[col] = counts.get(col, 0) + 1
+                for col in counts:
+                    if col >= n_terms:
+                        delta_df[col - n_terms] += 1
+                row_counts.append(counts)
+
+            # 2) Vectorizar con el IDF base + IDF delta recalculado con el nº de filas nuevo
+            self._delta_idf = self._smoothed_idf(np.asarray(delta_df, dtype=np.float64), new_rows)
+            data_parts, index_parts, indptr = [], [], np.empty(len(row_counts), dtype=np.int64)
+            position = nnz
+            for i, counts in enumerate(row_counts):
+                cols, values = self._row_vector(counts)
+                data_parts.append(values)
+                index_parts.append(cols)
+                position += len(cols)
+                indptr[i] = position
+
+            index_dtype = np.dtype(manifest.get("index_dtype", "int32"))
+            if position >= np.iinfo(index_dtype).max:
+                raise ValueError("El store superó el tamaño de índice; ejecute compact() antes de seguir añadiendo filas")
+
+            generation = manifest.get("generation", 0)
+            isz = index_dtype.itemsize
+            _append_bytes(self._matrix_path("csr_data.f32", generation), nnz * 4,
+                          np.concatenate(data_parts).astype(np.float32).tobytes() if data_parts else b"")
+            _append_bytes(self._matrix_path("csr_indices.bin", generation), nnz * isz,
+                          np.concatenate(index_parts).astype(index_dtype).tobytes() if index_parts else b"")
+            _append_bytes(self._matrix_path("csr_indptr.bin", generation), (n_rows + 1) * isz,
+                          indptr.astype(index_dtype).tobytes())
+
+            # 3) Payloads y textos al final de sus archivos (columnas nuevas se rellenan con "")
+            columns: List[str] = list(manifest.get("columns", []))
+            for row in payloads:
+                for key in row:
+                    if key not in columns:
+                        columns.append(key)
+            for j, col in enumerate(columns):
+                values = [str(row.get(col, "")) for row in payloads]
+                self._append_strings(f"payload_{j}", n_rows, values, exists=j < len(manifest.get("columns", [])))
+            self._append_strings("texts", n_rows, texts, exists=True)
+
+            manifest.update({
+                "n_rows": new_rows,
+                "nnz": int(position),
+                "delta_terms": delta_terms,
+                "delta_df": delta_df,
+                "columns": columns,
+                "appended_rows": manifest.get("appended_rows", 0) + len(payloads),
+            })
+            self._write_manifest(manifest)
+
+        self._open_binary(manifest)
+        compaction_scheduler.notify(self.import_id, urgent=self.needs_compaction())
+        return manifest
+
+    def _append_strings(self, name: str, n_rows: int, values: List[str], exists: bool):
+        blob_path, idx_path = self._path(f"{name}.bin"), self._path(f"{name}.idx")
+        if exists:
+            offsets = _open_array(idx_path, np.int64, shape=(n_rows + 1,))
+            blob_size = int(offsets[-1])
+        else:
+            # Columna nueva: filas anteriores vacías
+            _write_atomic(blob_path, b"")
+            _write_atomic(idx_path, np.zeros(n_rows + 1, dtype=np.int64).tobytes())
+            blob_size = 0
+        blob, offsets = _encode_strings(values)
+        _append_bytes(blob_path, blob_size, blob)
+        _append_bytes(idx_path, (n_rows + 1) * 8, (offsets[1:] + blob_size).tobytes())
+
+    def needs_compaction(self) -> bool:
+        m = self.manifest or {}
+        if not m.get("appended_rows"):
+            return False
+        delta_ratio = len(m.get("delta_terms", [])) / max(1, m.get("n_terms", 0))
+        rows_ratio = m.get("appended_rows", 0) / max(1, m.get("fitted_rows", 0))
+        return delta_ratio > VECTOR_COMPACT_RATIO or rows_ratio > VECTOR_COMPACT_RATIO
+
+    def compact(self) -> Dict:
+        """Re-ajusta el TF-IDF con todos los textos (IDF actualizado, sin vocabulario delta)"""
+        with _store_lock(self.base):
+            manifest = self._read_manifest()
+            if manifest is None or manifest.get("format", 2) < 3:
+                manifest = self._upgrade_locked(manifest)
+            elif manifest.get("appended_rows"):
+                self._open_binary(manifest)
+                manifest = self._refit_locked(manifest, self.texts.tolist())
+        self._open_binary(manifest)
+        return manifest
+
+    def _refit_locked(self, manifest: Dict, texts: List[str]) -> Dict:
+        vectorizer = TfidfVectorizer(
+            lowercase=manifest.get("lowercase", True),
+            ngram_range=tuple(manifest.get("ngram_range", (1, 2))),
+            norm=manifest.get("norm", "l2"),
+        )
+        matrix = vectorizer.fit_transform(texts)
+        previous = dict(manifest)
+        manifest = {**manifest, **self._write_matrix(vectorizer, matrix, manifest.get("generation", 0) + 1)}
+        manifest.update({"fitted_rows": manifest["n_rows"], "appended_rows": 0})
+        self._write_manifest(manifest)
+        self._remove_stale(previous, manifest)
+        return manifest
+
+    def _upgrade_locked(self, manifest: Optional[Dict]) -> Dict:
+        """Reescribe un store JSON (v1) o v2 en formato v3 (con textos para futuras compactaciones)"""
+        if manifest is None:
+            if not self._load_legacy():
+                raise FileNotFoundError(f"No existe vector store para {self.import_id}")
+            config = {
+                "lowercase": self.vectorizer.lowercase,
+                "ngram_range": list(self.vectorizer.ngram_range),
+                "norm": self.vectorizer.norm,
+            }
+            payloads = list(self.payloads)
+        else:
+            self._open_binary(manifest)
+            config = {k: manifest.get(k) for k in ("lowercase", "ngram_range", "norm")}
+            payloads = list(self.payloads)
+
+        columns = list(self.payloads.columns) if isinstance(self.payloads, PayloadColumns) else []
+        for row in payloads:
+            for key in row:
+                if key not in columns:
+                    columns.append(key)
+        texts = [payload_to_text(row) for row in payloads]
+        for j, col in enumerate(columns):
+            blob, offsets = _encode_strings(str(row.get(col, "")) for row in payloads)
+            _write_atomic(self._path(f"payload_{j}.bin"), blob)
+            _write_atomic(self._path(f"payload_{j}.idx"), offsets.tobytes())
+        blob, offsets = _encode_strings(texts)
+        _write_atomic(self._path("texts.bin"), blob)
+        _write_atomic(self._path("texts.idx"), offsets.tobytes())
+
+        base = {
+            **config,
+            "format": FORMAT_VERSION,
+            "generation": (manifest or {}).get("generation", 0),
+            "n_rows": len(payloads),
+            "columns": columns,
+            "text_columns": None,
+            "appended_rows": len(payloads),  # fuerza el re-ajuste
+        }
+        manifest = self._refit_locked(base, texts) if payloads else base
+        for path in (self._path("payload.bin"), self._path("payload.idx")):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        return manifest
+
+    # ---------------------------------------------------------------- utilidades
+    def payload_frame(self) -> pd.DataFrame:
+        """Payloads como DataFrame (columnar en v2/v3, lista de dicts en v1)"""
+        if isinstance(self.payloads, PayloadColumns):
+            return self.payloads.to_frame()
+        return pd.DataFrame(list(self.payloads))
+
+    def file_signature(self) -> Optional[Tuple]:
+        """Identidad de los archivos persistidos (el manifest se reemplaza en cada cambio); None si no existe"""
+        paths = [self.manifest_path] if os.path.exists(self.manifest_path) else [self.vocab_path, self.matrix_path, self.payload_path]
+        sig = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def memory_bytes(self) -> int:
+        """Estimación de la memoria privada del store cargado (lo mapeado es caché del SO compartida)"""
+        if self.mmapped:
+            delta = sum(sys.getsizeof(t) + 64 for t in self._delta_index)
+            return 64 * 1024 + delta + sys.getsizeof(self.manifest.get("columns", []))
+        total = 0
+        if self.matrix is not None:
+            if hasattr(self.matrix, "data"):  # scipy.sparse
+                for attr in ("data", "indices", "indptr"):
+                    arr = getattr(self.matrix, attr, None)
+                    total += getattr(arr, "nbytes", 0)
+            else:
+                total += getattr(self.matrix, "nbytes", 0)
+        if self.vectorizer is not None:
+            total += self.vectorizer.idf_.nbytes
+            # dict de vocabulario: entrada del dict + str + int por término
+            total += sys.getsizeof(self.vectorizer.vocabulary_)
+            total += sum(sys.getsizeof(k) + 28 for k in self.vectorizer.vocabulary_)
+        for payload in self.payloads:
+            total += sys.getsizeof(payload) + sum(sys.getsizeof(v) for v in payload.values())
+        return total
+
+
+# --------------------------------------------------------------------------------------
+# Compactación en segundo plano
+# --------------------------------------------------------------------------------------
+class CompactionScheduler:
+    """
+    Hilo daemon que compacta los stores con appends pendientes:
+    de inmediato si superan VECTOR_COMPACT_RATIO, o en la siguiente ronda periódica.
+    """
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._pending: Dict[str, float] = {}
+        self._urgent = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def notify(self, import_id: str, urgent: bool = False):
+        with self._lock:
+            self._pending.setdefault(import_id, time.time())
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="vector-store-compaction", daemon=True)
+                self._thread.start()
+        if urgent:
+            self._urgent.set()
+
+    def _run(self):
+        while True:
+            urgent = self._urgent.wait(self.interval_s)
+            self._urgent.clear()
+            now = time.time()
+            with self._lock:
+                pending = list(self._pending.items())
+            for import_id, since in pending:
+                store = VectorStore(import_id)
+                try:
+                    if now - since < self.interval_s:
+                        # Aún no toca la ronda periódica: solo si el delta ya es grande
+                        store.manifest = store._read_manifest()
+                        if not urgent or not store.needs_compaction():
+                            continue
+                    # Se saca antes de compactar: un notify durante la compactación (append
+                    # que ésta puede no incluir) vuelve a dejarlo pendiente para la siguiente ronda
+                    with self._lock:
+                        self._pending.pop(import_id, None)
+                    store.compact()
+                except Exception as e:
+                    logger.warning("Compactación de %s falló: %s", import_id, e)
+
+
+compaction_scheduler = CompactionScheduler(VECTOR_COMPACT_INTERVAL_S)
+
+
+# --------------------------------------------------------------------------------------
+# Caché LRU de stores cargados (por proceso)
+# --------------------------------------------------------------------------------------
+class VectorStoreCache:
+    """
+    LRU de VectorStore cargados, limitada por memoria estimada.
+    Una entrada se descarta si cambió el mtime/tamaño de sus archivos en disco.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[VectorStore, Tuple, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, import_id: str) -> Optional[VectorStore]:
+        store = VectorStore(import_id)
+        signature = store.file_signature()
+        if signature is None:
+            self.invalidate(import_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(import_id)
+            if entry and entry[1] == signature:
+                self._entries.move_to_end(import_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Cargar fuera del lock: no bloquear búsquedas sobre otros imports
+        if not store.load():
+            return None
+        self._put(import_id, store, signature)
+        return store
+
+    def _put(self, import_id: str, store: VectorStore, signature: Tuple):
+        size = store.memory_bytes()
+        with self._lock:
+            self._pop(import_id)
+            if size > self.max_bytes:
+                # No cabe: se sirve sin cachear
+                return
+            self._entries[import_id] = (store, signature, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, import_id: str):
+        entry = self._entries.pop(import_id, None)
+        if entry:
+            self._bytes -= entry[2]
+
+    def invalidate(self, import_id: str):
+        with self._lock:
+            self._pop(import_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_mb": round(self._bytes / 1024 / 1024, 2),
+                "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+vector_store_cache = VectorStoreCache(int(VECTOR_CACHE_MAX_MB * 1024 * 1024))
+
+
+def get_vector_store(import_id: str) -> Optional[VectorStore]:
+    """VectorStore cargado para import_id (desde caché si está vigente); None si no existe"""
+    return vector_store_cache.get(import_id)
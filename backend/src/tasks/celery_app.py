@@ -20,3 +20,7 @@ try:
     import tasks.anemia_tasks  # noqa: F401
 except Exception:
     pass
+try:
+    import tasks.reevaluation_tasks  # noqa: F401
+except Exception:
+    pass
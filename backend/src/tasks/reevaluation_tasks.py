@@ -0,0 +1,62 @@
+from celery import chord
+from tasks.celery_app import celery
+
+
+@celery.task(bind=True)
+def reevaluar_rango(self, desde_id: int, hasta_id: int, sede_id=None, dry_run: bool = False):
+    """Reevalúa las evaluaciones con id en (desde_id, hasta_id]; informa avance como estado PROGRESS."""
+    from src.db.session import SessionLocal
+    from src.services.reevaluation_service import ReevaluationService
+
+    db = SessionLocal()
+    try:
+        return ReevaluationService.reevaluar(
+            db,
+            workers=1,  # el paralelismo lo dan los workers de Celery
+            sede_id=sede_id,
+            desde_id=desde_id,
+            hasta_id=hasta_id,
+            dry_run=dry_run,
+            derivados=False,
+            progreso=lambda estado: self.update_state(state="PROGRESS", meta=estado),
+        )
+    finally:
+        db.close()
+
+
+@celery.task
+def finalizar_reevaluacion(resultados, dry_run: bool = False):
+    """Callback del chord: suma las particiones y reconstruye las tablas derivadas una sola vez."""
+    from src.db.session import SessionLocal
+    from src.services.reevaluation_service import ReevaluationService
+
+    resumen = ReevaluationService.combinar(resultados)
+    if resumen["actualizadas"] and not dry_run:
+        db = SessionLocal()
+        try:
+            ReevaluationService.actualizar_derivados(db)
+        finally:
+            db.close()
+    return resumen
+
+
+@celery.task
+def reevaluar_evaluaciones(sede_id=None, particiones=None, dry_run: bool = False):
+    """
+    Reparte la reevaluación en rangos de id_evaluacion, uno por tarea. Devuelve el id del chord;
+    su resultado (AsyncResult(chord_id).get()) es el resumen combinado.
+    """
+    from src.db.session import SessionLocal
+    from src.services.reevaluation_service import REEVALUACION_PARTICIONES, ReevaluationService
+
+    db = SessionLocal()
+    try:
+        rangos = ReevaluationService.rangos(db, particiones or REEVALUACION_PARTICIONES, sede_id)
+    finally:
+        db.close()
+    if not rangos:
+        return {"particiones": 0, "rangos": []}
+    resultado = chord(
+        reevaluar_rango.s(desde_id, hasta_id, sede_id, dry_run) for desde_id, hasta_id in rangos
+    )(finalizar_reevaluacion.s(dry_run=dry_run))
+    return {"chord_id": resultado.id, "particiones": len(rangos), "rangos": rangos}
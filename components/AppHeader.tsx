@@ -78,12 +78,18 @@ export function AppHeader({ theme, setSidebarOpen }: AppHeaderProps) {
     fetchUserData()
     fetchAlertsCount()
 
-    // Actualizar conteo de alertas cada 30 segundos
-    const interval = setInterval(() => {
-      fetchAlertsCount()
-    }, 30000)
+    // Actualizar conteo de alertas cuando el servidor avisa de una alerta nueva (SSE)
+    const stream = new EventSource("/api/children/alerts/stream?tipos=alerta")
+    stream.addEventListener("actividad", () => fetchAlertsCount())
+    stream.addEventListener("resync", () => fetchAlertsCount())
 
-    return () => clearInterval(interval)
+    // Refresco lento: el conteo es de las últimas 24 h y baja sin que llegue ningún evento
+    const interval = setInterval(fetchAlertsCount, 5 * 60 * 1000)
+
+    return () => {
+      stream.close()
+      clearInterval(interval)
+    }
   }, [router])
 
   const fetchAlertsCount = async () => {
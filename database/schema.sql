@@ -50,6 +50,7 @@ CREATE TABLE acudientes (
     telefono VARCHAR(20),
     correo VARCHAR(100),
     direccion TEXT,
+    nombre_busqueda VARCHAR(150), -- nombre sin tildes ni mayúsculas (lo mantiene la API)
     fecha_creado TIMESTAMP DEFAULT Now(),
     fecha_actualizado TIMESTAMP DEFAULT Now()
 );
@@ -62,6 +63,7 @@ CREATE TABLE infantes(
 	genero VARCHAR(10) NOT NULL,
     acudiente_id INT REFERENCES acudientes(id_acudiente) ON DELETE SET NULL,
     sede_id INT REFERENCES sedes(id_sede) ON DELETE SET NULL,
+    nombre_busqueda VARCHAR(100), -- nombre sin tildes ni mayúsculas (lo mantiene la API)
 	fecha_creado TIMESTAMP DEFAULT Now(),
 	fecha_actualizado TIMESTAMP DEFAULT Now()
 );
@@ -146,6 +148,12 @@ CREATE UNIQUE INDEX idx_usuarios_telefono ON usuarios(telefono);
 CREATE INDEX idx_infantes_nombre ON infantes(nombre);
 CREATE INDEX idx_infantes_genero ON infantes(genero);
 CREATE INDEX idx_infantes_acudiente ON infantes(acudiente_id);
+CREATE INDEX idx_infantes_sede ON infantes(sede_id);
+CREATE INDEX idx_infantes_fecha_nacimiento ON infantes(fecha_nacimiento);
+-- Búsqueda por nombre con similitud de trigramas (GET /api/children/search)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX idx_infantes_nombre_trgm ON infantes USING gin (nombre_busqueda gin_trgm_ops);
+CREATE INDEX idx_acudientes_nombre_trgm ON acudientes USING gin (nombre_busqueda gin_trgm_ops);
 CREATE INDEX idx_seguimientos_infante ON seguimientos(infante_id);
 CREATE INDEX idx_seguimientos_encargado ON seguimientos(encargado_id);
 CREATE INDEX idx_seguimientos_fecha ON seguimientos(fecha);